@@ -6,13 +6,14 @@
 # without the advanced orchestration features.
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form  # FastAPI tools for building endpoints
+from fastapi.responses import StreamingResponse  # For sending answers piece by piece
 from pydantic import BaseModel  # For data validation and serialization
 from typing import Optional  # For optional parameters
-import os  # For file operations
-import uuid  # For generating unique IDs
 from app.services.ai_service import ai_service  # Our AI service that talks to Claude
-from app.services.pdf_service import pdf_service  # Service for handling PDF files
+from app.services.pdf_service import pdf_service, UploadTooLargeError  # Service for handling PDF files
 from app.core.config import settings  # Our configuration settings
+from app.api.streaming import sse_event, SSE_HEADERS, SSE_MEDIA_TYPE  # Server-Sent Events helpers
+from app.services.resilience import UpstreamUnavailableError  # Bedrock busy or down (answered with 503)
 
 # Create a router - this groups related endpoints together
 router = APIRouter()
@@ -84,21 +85,21 @@ async def upload_edna_pdf(
         # ============================================================================
         # FILE SAVING - Save the uploaded file to our server
         # ============================================================================
-        # Generate unique file ID - this prevents file name conflicts
-        file_id = str(uuid.uuid4())  # Creates a unique identifier like "abc123-def456"
-        file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")  # Full path to save file
-
-        # Save file to disk
-        with open(file_path, "wb") as buffer:  # Open file in write-binary mode
-            content = await file.read()  # Read the uploaded file content
-            buffer.write(content)  # Write it to disk
+        # Save the file to disk a chunk at a time (never the whole PDF in memory),
+        # refusing it if it's bigger than MAX_UPLOAD_BYTES. The file is named
+        # after a fingerprint of its content, so the same PDF is only stored once.
+        try:
+            saved = await pdf_service.save_upload(file)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        file_id = saved["file_id"]  # Content fingerprint (SHA-256) of the file
 
         # ============================================================================
         # PDF ANALYSIS - Extract and analyze the E-DNA results
         # ============================================================================
-        # Extract and analyze PDF content
-        pdf_text = pdf_service.extract_text_from_pdf(file_path)  # Get text from PDF
-        edna_analysis = pdf_service.analyze_edna_results(pdf_text)  # Analyze the E-DNA results
+        # Extract and analyze PDF content (a PDF we've seen before is answered
+        # from the analysis cache without reading it again)
+        edna_analysis = await pdf_service.analyze_upload(saved)
 
         # ============================================================================
         # SESSION STORAGE - Remember this user's profile for future conversations
@@ -117,6 +118,8 @@ async def upload_edna_pdf(
             file_id=file_id
         )
 
+    except HTTPException:
+        raise  # Keep our own 400/413 errors as they are
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -149,6 +152,8 @@ async def chat_with_architect(request: ChatRequest):
             needs_pdf_upload=not has_uploaded_pdf,
             redirected=is_redirected
         )
+    except UpstreamUnavailableError:
+        raise  # Answered with 503 + Retry-After (see main.py)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -181,26 +186,90 @@ async def chat_with_alchemist(request: ChatRequest):
             needs_pdf_upload=not has_uploaded_pdf,
             redirected=is_redirected
         )
+    except UpstreamUnavailableError:
+        raise  # Answered with 503 + Retry-After (see main.py)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ============================================================================
+# STREAMING CHAT ENDPOINTS - Same coaches, but the answer arrives word by word
+# ============================================================================
+# Instead of waiting several seconds for the whole answer, the browser gets
+# each piece as soon as Claude writes it (Server-Sent Events). The stream ends
+# with a "done" event carrying the same extra fields as ChatResponse.
+
+def _stream_chat(request: ChatRequest, personality: str, other_agent_name: str) -> StreamingResponse:
+    """Build the streaming response for one coach"""
+    user_session = user_sessions.get(request.user_id or "anonymous", {})
+    has_uploaded_pdf = user_session.get("has_uploaded_pdf", False)
+    edna_profile = user_session.get("edna_profile")
+
+    async def events():
+        pieces = []  # Keep the pieces so we can check the full answer at the end
+        try:
+            async for delta in ai_service.stream_chat_with_claude(
+                message=request.message,
+                personality=personality,
+                user_edna_profile=edna_profile,
+                has_uploaded_pdf=has_uploaded_pdf
+            ):
+                pieces.append(delta)
+                yield sse_event("delta", {"text": delta})
+        except UpstreamUnavailableError as e:
+            # The stream has already started, so no 503 - tell the browser in an event instead
+            yield sse_event("error", {"error": str(e), "retry_after": e.retry_after})
+            return
+
+        response = "".join(pieces)
+        yield sse_event("done", {
+            "personality_used": personality,
+            "user_id": request.user_id,
+            "needs_pdf_upload": not has_uploaded_pdf,
+            "redirected": other_agent_name in response and "switch to chat" in response
+        })
+
+    return StreamingResponse(events(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+
+@router.post("/chat/architect/stream")
+async def stream_chat_with_architect(request: ChatRequest):
+    """
+    Chat with AI Architect (Hanif), streaming the answer as it is written
+    """
+    return _stream_chat(request, "architect", "AI Alchemist")
+
+
+@router.post("/chat/alchemist/stream")
+async def stream_chat_with_alchemist(request: ChatRequest):
+    """
+    Chat with AI Alchemist (Fariza), streaming the answer as it is written
+    """
+    return _stream_chat(request, "alchemist", "AI Architect")
+
+
 @router.get("/health")
 async def health_check():
     """
     Check if AI service is working
     """
     try:
-        test_response = await ai_service.chat_with_claude("Hello", "architect", has_uploaded_pdf=True)
+        test_response = await ai_service.chat_with_claude("Hello", "architect", has_uploaded_pdf=True, use_cache=False)
         return {
             "status": "healthy",
             "bedrock_accessible": True,
             "claude_model": "working",
-            "test_response_length": len(test_response)
+            "test_response_length": len(test_response),
+            "bedrock_resilience": ai_service.resilience.stats(),
+            "bedrock_routing": ai_service.router.stats(),
+            "response_cache": ai_service.response_cache.stats(),
+            "pdf_cache": pdf_service.cache_stats()
         }
     except Exception as e:
         return {
             "status": "unhealthy",
             "error": str(e),
-            "bedrock_accessible": False
+            "bedrock_accessible": False,
+            "bedrock_resilience": ai_service.resilience.stats(),
+            "bedrock_routing": ai_service.router.stats()
         }
@@ -0,0 +1,218 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Dict, Any, List
+from app.core.database import database, get_db
+from app.models.edna_models import EDNAProfile, EDNAQuestion, EDNAResponse, QuizSession
+from app.services.question_graph import question_graph_cache
+
+router = APIRouter()
+
+
+class EDNAProfileResponse(BaseModel):
+    user_id: int
+    quiz_session_id: str
+    core_type: str
+    core_type_confidence: float
+    subtype: Optional[str] = None
+    subtype_confidence: Optional[float] = None
+    learning_styles: Optional[List[str]] = None
+    learning_styles_confidence: Optional[float] = None
+    neurodiversity: Optional[List[str]] = None
+    neurodiversity_confidence: Optional[float] = None
+    mindset: Optional[List[str]] = None
+    mindset_confidence: Optional[float] = None
+    meta_beliefs: Optional[List[str]] = None
+    meta_beliefs_confidence: Optional[float] = None
+    overall_confidence: float
+    completion_percentage: float
+
+    model_config = {"from_attributes": True}
+
+
+class QuizAnswer(BaseModel):
+    question_id: int
+    selected_option: Optional[str] = Field(None, max_length=100)  # None = skipped
+    option_value: Optional[str] = Field(None, max_length=100)
+    response_time_ms: Optional[int] = Field(None, ge=0)
+
+
+class QuizSubmissionRequest(BaseModel):
+    user_id: int
+    quiz_session_id: str = Field(..., min_length=1, max_length=100)
+    answers: List[QuizAnswer] = Field(..., min_length=1)
+    total_questions: Optional[int] = Field(None, ge=1)  # Default: the active questions
+    started_at: Optional[datetime] = None
+    device_type: Optional[str] = Field(None, max_length=50)
+    browser_info: Optional[Dict[str, Any]] = None
+
+
+class QuizSubmissionResponse(BaseModel):
+    quiz_session_id: str
+    user_id: int
+    total_questions: int
+    questions_answered: int
+    questions_skipped: int
+    average_response_time_ms: Optional[float] = None
+    total_time_seconds: Optional[int] = None
+    completion_rate: float
+    is_completed: bool
+
+
+class NextQuestionRequest(BaseModel):
+    question_id: Optional[int] = None  # None = start the quiz
+    answer: Optional[str] = None  # Option letter, text or value
+
+
+class QuizQuestion(BaseModel):
+    id: int
+    question_text: str
+    question_type: str
+    layer: int
+    options: List[Any]
+
+
+class NextQuestionResponse(BaseModel):
+    finished: bool
+    question: Optional[QuizQuestion] = None
+
+
+def session_totals(answers: List[QuizAnswer], total_questions: int,
+                   started_at: Optional[datetime], completed_at: datetime) -> Dict[str, Any]:
+    """
+    QuizSession aggregates for a submission, in one pass over the answers
+    """
+    answered = skipped = timed = total_ms = 0
+    for answer in answers:
+        if answer.selected_option:
+            answered += 1
+        else:
+            skipped += 1
+        if answer.response_time_ms is not None:
+            timed += 1
+            total_ms += answer.response_time_ms
+    if started_at is not None:
+        total_seconds = max(int((completed_at - started_at).total_seconds()), 0)
+    else:
+        total_seconds = round(total_ms / 1000) if timed else None
+    return {
+        "total_questions": total_questions,
+        "questions_answered": answered,
+        "questions_skipped": skipped,
+        "average_response_time_ms": total_ms / timed if timed else None,
+        "total_time_seconds": total_seconds,
+        "completion_rate": min(answered / total_questions, 1.0),  # Fraction answered (0-1)
+        "is_completed": answered + skipped >= total_questions,
+    }
+
+
+async def store_submission(db: AsyncSession, request: QuizSubmissionRequest) -> Dict[str, Any]:
+    """
+    Save a whole quiz session: its answers in one bulk insert plus the
+    QuizSession row, in a constant number of round trips. Submitting the
+    same session again replaces its answers. Answers to unknown or retired
+    questions are rejected (422) before anything is written.
+    """
+    seen = set()
+    for answer in request.answers:
+        if answer.question_id in seen:
+            raise HTTPException(status_code=422, detail=f"Question {answer.question_id} answered twice")
+        seen.add(answer.question_id)
+
+    active = set(await db.scalars(select(EDNAQuestion.id).where(EDNAQuestion.is_active.is_(True))))
+    unknown = sorted(seen - active)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown question ids: {unknown}")
+
+    total_questions = request.total_questions
+    if total_questions is None:
+        total_questions = max(len(active), len(request.answers))
+
+    now = datetime.utcnow()
+    started_at = request.started_at
+    if started_at is not None and started_at.tzinfo is not None:
+        started_at = started_at.astimezone(timezone.utc).replace(tzinfo=None)  # Stored as naive UTC
+    totals = session_totals(request.answers, total_questions, started_at, now)
+
+    session = await db.scalar(select(QuizSession).where(QuizSession.session_id == request.quiz_session_id))
+    if session is None:
+        session = QuizSession(session_id=request.quiz_session_id, user_id=request.user_id,
+                              started_at=started_at or now)
+        db.add(session)
+    elif session.user_id != request.user_id:
+        raise HTTPException(status_code=409, detail="Quiz session belongs to another user")
+    else:
+        await db.execute(delete(EDNAResponse).where(EDNAResponse.quiz_session_id == request.quiz_session_id))
+    for name, value in totals.items():
+        setattr(session, name, value)
+    session.completed_at = now if totals["is_completed"] else None
+    if request.device_type is not None:
+        session.device_type = request.device_type
+    if request.browser_info is not None:
+        session.browser_info = request.browser_info
+
+    rows = [
+        {"user_id": request.user_id, "quiz_session_id": request.quiz_session_id,
+         "question_id": answer.question_id, "selected_option": answer.selected_option,
+         "option_value": answer.option_value, "response_time_ms": answer.response_time_ms, "created_at": now}
+        for answer in request.answers if answer.selected_option
+    ]
+    try:
+        if rows:
+            await db.execute(insert(EDNAResponse), rows)  # One executemany, not a round trip per answer
+        await db.commit()
+    except IntegrityError:
+        # Another first submission of this session got its QuizSession in
+        # first (or a question was removed meanwhile); get_db rolls back
+        raise HTTPException(status_code=409, detail="Quiz session was changed by another submission, please retry")
+    return {"quiz_session_id": request.quiz_session_id, "user_id": request.user_id, **totals}
+
+
+@router.post("/quiz/submit", response_model=QuizSubmissionResponse)
+async def submit_quiz(request: QuizSubmissionRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Submit every answer of a quiz session at once
+    """
+    return await store_submission(db, request)
+
+
+@router.post("/quiz/next", response_model=NextQuestionResponse)
+async def next_question(request: NextQuestionRequest, db: AsyncSession = Depends(get_db)):
+    """
+    The next quiz question after an answer (or the first one)
+    """
+    graph = await question_graph_cache.get(db)
+    if request.question_id is None:
+        question = graph.questions.get(graph.first_id) if graph.first_id is not None else None
+    else:
+        if request.answer is None:
+            raise HTTPException(status_code=422, detail="answer is required with question_id")
+        try:
+            question = graph.next_question(request.question_id, request.answer)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=e.args[0])
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    return {"finished": question is None, "question": question.to_dict() if question else None}
+
+
+@router.get("/profile/{user_id}", response_model=EDNAProfileResponse)
+async def get_profile(user_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Get a user's stored six-layer E-DNA profile
+    """
+    profile = await db.scalar(select(EDNAProfile).where(EDNAProfile.user_id == user_id))
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No E-DNA profile for this user")
+    return profile
+
+
+@router.get("/health/database")
+async def database_health() -> Dict[str, Any]:
+    """
+    Database connection pool status
+    """
+    return database.pool_status()
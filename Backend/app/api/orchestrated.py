@@ -1,12 +1,14 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
-import os
-import uuid
+from typing import Optional, Dict, Any, List
 from app.services.langgraph.orchestrator import orchestrator
 from app.services.langgraph.state import state_manager
-from app.services.pdf_service import pdf_service
+from app.services.pdf_service import pdf_service, UploadTooLargeError
+from app.services.ai_service import ai_service
 from app.core.config import settings
+from app.api.streaming import sse_event, SSE_HEADERS, SSE_MEDIA_TYPE
+from app.services.resilience import UpstreamUnavailableError
 
 router = APIRouter()
 
@@ -44,6 +46,24 @@ class ConversationHistoryResponse(BaseModel):
     user_id: Optional[int] = None
 
 
+class ConversationListItem(BaseModel):
+    conversation_id: str
+    chosen_agent: str
+    workflow_step: str
+    has_edna_profile: bool
+    message_count: int
+    created_at: str
+    updated_at: str
+
+
+class ConversationListResponse(BaseModel):
+    user_id: Optional[int] = None
+    total: int
+    offset: int
+    limit: int
+    conversations: List[ConversationListItem]
+
+
 class UploadToConversationResponse(BaseModel):
     success: bool
     message: str
@@ -57,7 +77,7 @@ async def start_conversation(request: ConversationStartRequest):
     Start a new orchestrated conversation
     """
     try:
-        conversation_id = state_manager.create_conversation(request.user_id)
+        conversation_id = await state_manager.create_conversation(request.user_id)
 
         return ConversationStartResponse(
             conversation_id=conversation_id,
@@ -79,7 +99,7 @@ async def upload_to_conversation(
     """
     try:
         # Check if conversation exists
-        conversation = state_manager.get_conversation(conversation_id)
+        conversation = await state_manager.get_conversation(conversation_id)
         if not conversation:
             raise HTTPException(
                 status_code=404, detail="Conversation not found")
@@ -89,21 +109,18 @@ async def upload_to_conversation(
             raise HTTPException(
                 status_code=400, detail="Only PDF files are allowed")
 
-        # Generate unique file ID
-        file_id = str(uuid.uuid4())
-        file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")
+        # Stream the file to disk in chunks, rejecting oversized uploads early;
+        # identical files are stored once under their content hash
+        try:
+            saved = await pdf_service.save_upload(file)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
 
-        # Save file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-
-        # Extract and analyze PDF content
-        pdf_text = pdf_service.extract_text_from_pdf(file_path)
-        edna_analysis = pdf_service.analyze_edna_results(pdf_text)
+        # Extract and analyze PDF content (cached per content hash)
+        edna_analysis = await pdf_service.analyze_upload(saved)
 
         # Update conversation with E-DNA profile
-        state_manager.update_conversation_edna(conversation_id, edna_analysis)
+        await state_manager.update_conversation_edna(conversation_id, edna_analysis)
 
         return UploadToConversationResponse(
             success=True,
@@ -112,6 +129,8 @@ async def upload_to_conversation(
             conversation_id=conversation_id
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -150,6 +169,8 @@ async def orchestrated_chat_architect(request: OrchestatedChatRequest):
             redirected=is_redirected
         )
 
+    except UpstreamUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -188,27 +209,148 @@ async def orchestrated_chat_alchemist(request: OrchestatedChatRequest):
             redirected=is_redirected
         )
 
+    except UpstreamUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/conversation/chat/collaborate", response_model=OrchestatedChatResponse)
+async def orchestrated_chat_collaborate(request: OrchestatedChatRequest):
+    """
+    Ask AI Architect (Hanif) and AI Alchemist (Fariza) together
+    Both answer at the same time; the reply has both perspectives
+    """
+    try:
+        result = await orchestrator.process_conversation(
+            conversation_id=request.conversation_id,
+            user_message=request.message,
+            chosen_agent=None,  # Keep the agent chosen before
+            collaboration=True
+        )
+
+        if not result.get("success", False):
+            raise HTTPException(
+                status_code=500, detail=result.get("error", "Unknown error"))
+
+        return OrchestatedChatResponse(
+            success=result["success"],
+            response=result["response"],
+            agent=result["agent"],
+            conversation_id=result["conversation_id"],
+            workflow_step=result["workflow_step"],
+            collaboration_mode=result.get("collaboration_mode", False),
+            user_id=request.user_id
+        )
+
+    except UpstreamUnavailableError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _stream_orchestrated_chat(request: OrchestatedChatRequest, chosen_agent: str, other_agent_name: str) -> StreamingResponse:
+    """Stream an orchestrated reply as Server-Sent Events"""
+    if not await state_manager.get_conversation(request.conversation_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    async def events():
+        pieces = []
+        try:
+            async for event in orchestrator.stream_conversation(
+                conversation_id=request.conversation_id,
+                user_message=request.message,
+                chosen_agent=chosen_agent
+            ):
+                if event["type"] == "delta":
+                    pieces.append(event["text"])
+                    yield sse_event("delta", {"text": event["text"]})
+                elif event["type"] == "error":
+                    yield sse_event("error", {"error": event["error"]})
+                else:
+                    response_text = "".join(pieces)
+                    yield sse_event("done", {
+                        "success": True,
+                        "agent": event["agent"],
+                        "conversation_id": event["conversation_id"],
+                        "workflow_step": event["workflow_step"],
+                        "collaboration_mode": event["collaboration_mode"],
+                        "user_id": request.user_id,
+                        "redirected": other_agent_name in response_text and (
+                            "switch to chat" in response_text or "talk to" in response_text)
+                    })
+        except UpstreamUnavailableError as e:
+            yield sse_event("error", {"error": str(e), "retry_after": e.retry_after})
+
+    return StreamingResponse(events(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+
+@router.post("/conversation/chat/architect/stream")
+async def orchestrated_stream_architect(request: OrchestatedChatRequest):
+    """
+    Stream a reply from AI Architect (Hanif) through orchestrated system
+    """
+    return await _stream_orchestrated_chat(request, "architect", "AI Alchemist")
+
+
+@router.post("/conversation/chat/alchemist/stream")
+async def orchestrated_stream_alchemist(request: OrchestatedChatRequest):
+    """
+    Stream a reply from AI Alchemist (Fariza) through orchestrated system
+    """
+    return await _stream_orchestrated_chat(request, "alchemist", "AI Architect")
+
+
 @router.get("/conversation/{conversation_id}/history", response_model=ConversationHistoryResponse)
 async def get_conversation_history(conversation_id: str, user_id: Optional[int] = None):
     """
     Get conversation history
     """
     try:
-        conversation = state_manager.get_conversation(conversation_id)
+        conversation = await state_manager.get_conversation(conversation_id)
         if not conversation:
             raise HTTPException(
                 status_code=404, detail="Conversation not found")
 
         return ConversationHistoryResponse(
             conversation_id=conversation_id,
-            messages=conversation["messages"],
+            messages=await state_manager.get_message_history(conversation_id),
             user_id=user_id
         )
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/conversations", response_model=ConversationListResponse)
+async def list_user_conversations(
+    user_id: int = Query(...),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    List a user's conversations, newest first, one page at a time
+    """
+    try:
+        conversations = await state_manager.get_user_conversations(user_id, offset, limit)
+
+        return ConversationListResponse(
+            user_id=user_id,
+            total=await state_manager.count_user_conversations(user_id),
+            offset=offset,
+            limit=limit,
+            conversations=[
+                ConversationListItem(**dict(
+                    conv,
+                    created_at=conv["created_at"].isoformat(),
+                    updated_at=conv["updated_at"].isoformat()
+                ))
+                for conv in conversations
+            ]
+        )
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -220,14 +362,19 @@ async def orchestrator_health_check():
     """
     try:
         # Test orchestrator functionality
-        active_conversations = len(state_manager.conversations)
+        active_conversations = await state_manager.count_conversations()
 
         return {
             "status": "healthy",
             "orchestrator_accessible": True,
             "langgraph_working": True,
             "state_management": "working",
-            "active_conversations": active_conversations
+            "active_conversations": active_conversations,
+            "conversation_eviction": state_manager.eviction_stats,
+            "response_cache": ai_service.response_cache.stats(),
+            "pdf_cache": pdf_service.cache_stats(),
+            "bedrock_resilience": ai_service.resilience.stats(),
+            "bedrock_routing": ai_service.router.stats()
         }
     except Exception as e:
         return {
@@ -0,0 +1,26 @@
+# ============================================================================
+# STREAMING HELPERS - Send AI answers to the browser word by word
+# ============================================================================
+# Streaming endpoints use Server-Sent Events (SSE): a long-lived HTTP response
+# where every piece of the answer is sent as a small "data:" block the moment
+# Claude writes it. Browsers read these with the built-in EventSource API.
+
+import json  # For turning each event into text
+from typing import Any, Dict  # For type hints
+
+# Headers that stop proxies (nginx, Replit, etc.) from buffering the stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format one Server-Sent Event
+    event: the event name ("delta" for answer pieces, "done" at the end)
+    data: anything JSON-serializable
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
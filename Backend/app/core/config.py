@@ -12,6 +12,10 @@ from dotenv import load_dotenv  # For loading .env file
 # This reads a file called .env that contains our secret settings
 load_dotenv()
 
+# The top folder of the repository (Backend's parent) - shared files like the
+# quiz CSVs live there
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
 class Settings:
     """
     Settings class - holds all configuration values for our application
@@ -26,12 +30,47 @@ class Settings:
     AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")  # Your AWS account secret key
     AWS_REGION = os.getenv("AWS_REGION", "eu-north-1")  # Which AWS region to use (default: Europe)
     CLAUDE_MODEL_ID = os.getenv("CLAUDE_MODEL_ID")  # Which Claude AI model to use
-    
+    BEDROCK_ENDPOINT_URL = os.getenv("BEDROCK_ENDPOINT_URL")  # Optional override (e.g. a local stub server for benchmarks)
+    BEDROCK_MAX_CONCURRENCY = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "16"))  # Max Claude calls in flight per worker
+    BEDROCK_READ_TIMEOUT_SECONDS = int(os.getenv("BEDROCK_READ_TIMEOUT_SECONDS", "60"))  # Give up on a stuck Claude call after this long
+    BEDROCK_PROMPT_CACHING = os.getenv("BEDROCK_PROMPT_CACHING", "false").lower() == "true"  # Let Bedrock reuse the unchanging start of prompts (only sent to models that support it, once the prompt is long enough)
+    BEDROCK_MODEL_MAX_CONCURRENCY = int(os.getenv("BEDROCK_MODEL_MAX_CONCURRENCY", os.getenv("BEDROCK_MAX_CONCURRENCY", "16")))  # Max calls in flight to any one model
+    BEDROCK_MAX_RETRIES = int(os.getenv("BEDROCK_MAX_RETRIES", "3"))  # Tries again after throttling / unavailability (0 = never)
+    BEDROCK_BACKOFF_BASE_SECONDS = float(os.getenv("BEDROCK_BACKOFF_BASE_SECONDS", "0.5"))  # Longest pause before the first retry (doubles each time)
+    BEDROCK_BACKOFF_MAX_SECONDS = float(os.getenv("BEDROCK_BACKOFF_MAX_SECONDS", "8"))  # Never pause longer than this between retries
+    BEDROCK_BREAKER_FAILURES = int(os.getenv("BEDROCK_BREAKER_FAILURES", "5"))  # Failed calls in a row before we stop calling a model
+    BEDROCK_BREAKER_RESET_SECONDS = float(os.getenv("BEDROCK_BREAKER_RESET_SECONDS", "30"))  # How long to stop calling it before trying again
+    BEDROCK_MODEL_IDS = os.getenv("BEDROCK_MODEL_IDS", "")  # Other models / regions to route between, e.g. "model_id@eu-central-1,model_id@eu-west-3" (CLAUDE_MODEL_ID is always one of them)
+    BEDROCK_LIGHT_MODEL_IDS = os.getenv("BEDROCK_LIGHT_MODEL_IDS", "")  # Cheaper model(s) for short turns and summaries, same format (empty = use the main ones)
+    BEDROCK_LIGHT_MAX_CHARS = int(os.getenv("BEDROCK_LIGHT_MAX_CHARS", "60"))  # Messages up to this long count as short turns
+    BEDROCK_ROUTING_WINDOW = int(os.getenv("BEDROCK_ROUTING_WINDOW", "100"))  # Recent calls per model used to rank them (latency, error rate)
+    BEDROCK_ROUTING_WINDOW_SECONDS = float(os.getenv("BEDROCK_ROUTING_WINDOW_SECONDS", "120"))  # Forget calls older than this (so slow models get another try)
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))  # Remembered answers (0 = cache off)
+    RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))  # Forget remembered answers after this long
+
     # ============================================================================
     # DATABASE CONFIGURATION - Settings for storing data
     # ============================================================================
     # This is where we store user profiles, conversation history, etc.
-    DATABASE_URL = os.getenv("DATABASE_URL")  # Connection string to our database
+    DATABASE_URL = os.getenv("DATABASE_URL")  # Connection string to our database (E-DNA quizzes and profiles)
+    DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "10"))  # Database connections kept open per worker
+    DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "20"))  # Extra connections allowed during bursts
+    DATABASE_POOL_TIMEOUT_SECONDS = float(os.getenv("DATABASE_POOL_TIMEOUT_SECONDS", "30"))  # Wait this long for a free connection
+    DATABASE_POOL_RECYCLE_SECONDS = int(os.getenv("DATABASE_POOL_RECYCLE_SECONDS", "1800"))  # Reopen connections older than this
+
+    # Where orchestrated conversations are kept: "memory" (this process only,
+    # lost on restart) or "sql" (shared database, works with several workers)
+    CONVERSATION_STORE = os.getenv("CONVERSATION_STORE", "memory")
+    CONVERSATION_STORE_URL = os.getenv("CONVERSATION_STORE_URL", "sqlite:///conversations.db")  # SQLite file or postgresql:// URL
+    CONVERSATION_CACHE_SIZE = int(os.getenv("CONVERSATION_CACHE_SIZE", "1000"))  # Recent conversations kept in memory
+    CONVERSATION_WRITE_BATCH_SIZE = int(os.getenv("CONVERSATION_WRITE_BATCH_SIZE", "50"))  # Buffered writes before a flush
+    CONVERSATION_FLUSH_INTERVAL_SECONDS = float(os.getenv("CONVERSATION_FLUSH_INTERVAL_SECONDS", "2"))  # Max time a write stays buffered
+    CONVERSATION_TTL_HOURS = float(os.getenv("CONVERSATION_TTL_HOURS", "24"))  # Conversations idle this long are removed
+    CONVERSATION_SWEEP_INTERVAL_SECONDS = float(os.getenv("CONVERSATION_SWEEP_INTERVAL_SECONDS", "300"))  # How often we look for them
+    CONVERSATION_HOT_MESSAGES = int(os.getenv("CONVERSATION_HOT_MESSAGES", "40"))  # Recent messages kept in memory per conversation
+    CONVERSATION_ARCHIVE_DIR = os.getenv("CONVERSATION_ARCHIVE_DIR", "conversation_archive")  # Where older messages go (memory store)
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))  # Earlier-conversation tokens sent to Claude with each message
+    SUMMARY_MODEL_PASS = os.getenv("SUMMARY_MODEL_PASS", "false").lower() == "true"  # Let Claude condense long conversation summaries
     
     # ============================================================================
     # API CONFIGURATION - Settings for our web API
@@ -40,6 +79,19 @@ class Settings:
     API_V1_STR = os.getenv("API_V1_STR", "/api/v1")  # Base path for all API endpoints
     PROJECT_NAME = os.getenv("PROJECT_NAME", "Brandscaling AI Backend")  # Name of our project
     UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")  # Where to store uploaded files
+    MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))  # Biggest PDF we accept (10 MB)
+    UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))  # Uploads are written to disk this much at a time
+    PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))  # Processes reading PDFs in the background
+    PDF_EXTRACT_TIMEOUT_SECONDS = float(os.getenv("PDF_EXTRACT_TIMEOUT_SECONDS", "30"))  # Give up on a PDF that takes longer than this
+    PDF_ANALYSIS_CACHE_SIZE = int(os.getenv("PDF_ANALYSIS_CACHE_SIZE", "512"))  # E-DNA analyses kept in memory (all are kept on disk)
+
+    # ============================================================================
+    # E-DNA QUIZ CONFIGURATION - The quiz's questions and scoring rules
+    # ============================================================================
+    # The same rule tables the website's quiz is built from
+    QUIZ_QUESTIONS_CSV = os.getenv("QUIZ_QUESTIONS_CSV", os.path.join(REPO_ROOT, "quiz_questions_options.csv"))  # Answer options and what they count towards
+    QUIZ_SCORING_CSV = os.getenv("QUIZ_SCORING_CSV", os.path.join(REPO_ROOT, "quiz_scoring_calculation_logic.csv"))  # Thresholds, defaults and valid subtypes
+    QUESTION_GRAPH_CHECK_SECONDS = float(os.getenv("QUESTION_GRAPH_CHECK_SECONDS", "30"))  # How often to check the database for edited questions
     
     # ============================================================================
     # CORS CONFIGURATION - Security settings for web browsers
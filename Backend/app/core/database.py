@@ -0,0 +1,165 @@
+# ============================================================================
+# DATABASE - One shared connection pool for the E-DNA tables
+# ============================================================================
+# The E-DNA models (questions, responses, profiles, quiz sessions) live in the
+# database at DATABASE_URL. Opening a database connection is slow (network
+# round trips, authentication), so we keep a POOL of open connections and
+# lend one to each request instead of connecting every time.
+#
+# Everything is async (SQLAlchemy's asyncio engine), so waiting on the
+# database never blocks the event loop - other users' chats keep streaming.
+#
+# Each request gets its own session through the get_db dependency:
+#
+#     @router.get("/something")
+#     async def something(db: AsyncSession = Depends(get_db)):
+#         ...
+#
+# The session is closed (and its connection handed back to the pool) when
+# the request finishes, and rolled back if the request failed.
+
+from typing import Any, AsyncIterator, Dict, Optional, Sequence  # For type hints
+
+from fastapi import HTTPException  # For answering 503 when no database is set up
+from sqlalchemy import Table
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings  # DATABASE_URL and pool sizes
+from app.models.edna_models import Base  # All our tables
+
+# Plain URLs (like the ones hosting providers give out) mapped to async drivers
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg"
+}
+
+
+def async_database_url(url: str) -> str:
+    """Turn e.g. postgresql://... into postgresql+asyncpg://... (async URLs pass through)"""
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+
+# ...and back again, for the command-line tools that use plain (sync) engines
+SYNC_DRIVERS = {
+    "sqlite+aiosqlite": "sqlite",
+    "postgres": "postgresql",
+    "postgresql+asyncpg": "postgresql"
+}
+
+
+def sync_database_url(url: str) -> str:
+    """Turn e.g. sqlite+aiosqlite://... into sqlite://... (sync URLs pass through)"""
+    scheme, separator, rest = url.partition("://")
+    return f"{SYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+
+def create_database_engine(url: str, **overrides: Any) -> AsyncEngine:
+    """
+    Create a pooled async engine for ``url``
+    Pool sizes come from settings; ``overrides`` are passed to
+    create_async_engine as-is (the benchmarks use this).
+    """
+    url = async_database_url(url)
+    options: Dict[str, Any] = {"pool_pre_ping": True}  # Quietly replace connections the server dropped
+    in_memory = url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith("aiosqlite:"))
+    # An in-memory SQLite database is a single shared connection, and a
+    # different poolclass (e.g. NullPool) doesn't take pool sizes
+    if not in_memory and "poolclass" not in overrides:
+        options.update(
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE_SECONDS
+        )
+    options.update(overrides)
+    return create_async_engine(url, **options)
+
+
+def create_schema(connection, tables: Optional[Sequence[Table]] = None) -> None:
+    """
+    Create missing tables AND missing indexes (run it with connection.run_sync)
+    create_all skips a table that already exists, together with any index
+    added to the model since, so each index is also created on its own
+    (checkfirst=True: only if the database doesn't have it yet).
+    """
+    Base.metadata.create_all(connection, tables=tables)
+    for table in tables or Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+class Database:
+    """
+    The app's engine and session factory, created on first use
+    (so the server still starts when DATABASE_URL isn't set)
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url
+        self._engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[async_sessionmaker] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.url)
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            if not self.url:
+                raise RuntimeError("DATABASE_URL is not set")
+            self._engine = create_database_engine(self.url)
+            # expire_on_commit=False: objects stay readable after commit
+            # without another trip to the database
+            self._session_factory = async_sessionmaker(self._engine, expire_on_commit=False)
+        return self._engine
+
+    def session(self) -> AsyncSession:
+        """A new session (use with ``async with``)"""
+        self.engine  # Make sure the factory exists
+        return self._session_factory()
+
+    async def create_tables(self) -> None:
+        """Create any missing E-DNA tables and indexes (existing ones are left alone)"""
+        async with self.engine.begin() as connection:
+            await connection.run_sync(create_schema)
+
+    async def dispose(self) -> None:
+        """Close every pooled connection (called when the app shuts down)"""
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            self._session_factory = None
+
+    def pool_status(self) -> Dict[str, Any]:
+        """Connection pool numbers for the health endpoints"""
+        if self._engine is None:
+            return {"configured": self.configured, "connected": False}
+        pool = self._engine.pool
+        status: Dict[str, Any] = {"configured": True, "connected": True, "pool": type(pool).__name__}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, name):
+                status[name] = getattr(pool, name)()
+        return status
+
+
+# The one database everyone shares
+database = Database(settings.DATABASE_URL)
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """
+    FastAPI dependency: a database session for the current request
+    Rolled back if the request fails, always closed at the end.
+    """
+    if not database.configured:
+        raise HTTPException(status_code=503, detail="Database is not configured (set DATABASE_URL)")
+    async with database.session() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
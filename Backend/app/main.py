@@ -6,11 +6,49 @@
 # and defines the main endpoints that users can access.
 
 # Import the tools we need to build our AI business coaching website
-from fastapi import FastAPI  # The main web framework we use
+from contextlib import asynccontextmanager  # For startup/shutdown hooks
+from fastapi import FastAPI, HTTPException, Request  # The main web framework we use
+from fastapi.responses import JSONResponse  # For answering with an error before reading the body
 from fastapi.middleware.cors import CORSMiddleware  # Allows frontend to talk to backend
 from app.core.config import settings  # Our configuration settings (API keys, etc.)
 from app.api.bedrock import router as bedrock_router  # Simple chat endpoints
 from app.api.orchestrated import router as orchestrated_router  # Advanced chat with smart routing
+from app.api.edna import router as edna_router  # Stored E-DNA profiles
+import asyncio  # For background tasks
+from app.services.ai_service import ai_service  # Shared Claude client (owns a worker thread pool)
+from app.services.langgraph.state import state_manager  # Conversation storage
+from app.services.pdf_service import pdf_service, UploadTooLargeError  # PDF reading (owns a worker process pool)
+from app.core.database import database  # E-DNA database (owns a connection pool)
+from app.services.resilience import UpstreamUnavailableError  # Bedrock busy or down
+import math  # For rounding Retry-After up to whole seconds
+
+
+# ============================================================================
+# STARTUP AND SHUTDOWN - Things to do when the server starts or stops
+# ============================================================================
+# Anything that owns background resources (thread pools, timers, etc.)
+# gets started and stopped here, so restarts don't leave stray workers behind.
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if database.configured:
+        await database.create_tables()  # Create any missing E-DNA tables and indexes
+    # Write buffered conversation changes to the store every few seconds
+    flush_task = asyncio.create_task(
+        state_manager.run_flush_loop(settings.CONVERSATION_FLUSH_INTERVAL_SECONDS))
+    # Remove conversations nobody has touched for CONVERSATION_TTL_HOURS
+    eviction_task = asyncio.create_task(
+        state_manager.run_eviction_loop(settings.CONVERSATION_TTL_HOURS,
+                                        settings.CONVERSATION_SWEEP_INTERVAL_SECONDS))
+
+    yield  # The server handles requests while we're paused here
+
+    eviction_task.cancel()
+    flush_task.cancel()
+    await state_manager.flush()  # Don't lose the last few messages on shutdown
+    ai_service.shutdown()  # Stop the Claude worker threads
+    pdf_service.shutdown()  # Stop the PDF reading processes
+    await database.dispose()  # Close the pooled database connections
 
 # ============================================================================
 # CREATE OUR WEBSITE/API - This is like building the main building
@@ -22,7 +60,8 @@ from app.api.orchestrated import router as orchestrated_router  # Advanced chat
 app = FastAPI(
     title=settings.PROJECT_NAME,  # Name that appears in API documentation
     description="AI Backend for Brandscaling - Powers AI Architect (Hanif) and AI Alchemist (Fariza) with LangGraph orchestration",  # Description for API docs
-    version="2.0.0"  # Current version of our API
+    version="2.0.0",  # Current version of our API
+    lifespan=lifespan  # Startup/shutdown hooks defined above
 )
 
 # ============================================================================
@@ -41,6 +80,62 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all request headers
 )
 
+# ============================================================================
+# UPLOAD SIZE LIMIT - Turn away huge uploads before reading them
+# ============================================================================
+# The browser tells us how big the request is (Content-Length) up front.
+# If it's clearly over MAX_UPLOAD_BYTES we answer 413 straight away instead of
+# receiving the whole file first. Without a Content-Length (chunked uploads)
+# the bytes are counted as they arrive and reading stops - with a 413 - as
+# soon as there are too many, BEFORE Starlette has stored the whole body.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # Room for form fields and part headers
+
+
+class UploadSizeLimit:
+    """Plain ASGI middleware, so it sees the body while it's being received"""
+
+    def __init__(self, app, max_body_bytes: int):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+        too_large = HTTPException(status_code=413, detail=str(UploadTooLargeError(settings.MAX_UPLOAD_BYTES)))
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_body_bytes:
+            return await JSONResponse(status_code=413, content={"detail": too_large.detail})(scope, receive, send)
+
+        received = 0
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    raise too_large  # FastAPI answers it like any other HTTPException
+            return message
+
+        await self.app(scope, counting_receive, send)
+
+
+app.add_middleware(UploadSizeLimit, max_body_bytes=settings.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES)
+
+# ============================================================================
+# BEDROCK BUSY OR DOWN - Say so honestly instead of sending an apology as a reply
+# ============================================================================
+# When Claude can't be reached (throttled after all retries, or the circuit
+# breaker is open) we answer 503 Service Unavailable with a Retry-After header,
+# so the frontend knows it's temporary and when to try again.
+
+@app.exception_handler(UpstreamUnavailableError)
+async def upstream_unavailable(request: Request, exc: UpstreamUnavailableError):
+    retry_after = max(math.ceil(exc.retry_after), 1)
+    return JSONResponse(status_code=503, headers={"Retry-After": str(retry_after)},
+                        content={"detail": "The AI coaches are busy right now, please try again shortly.",
+                                 "retry_after": retry_after})
+
 # ============================================================================
 # CONNECT ALL THE PIECES - Link our different services together
 # ============================================================================
@@ -54,6 +149,9 @@ app.include_router(bedrock_router, prefix=settings.API_V1_STR,  # /api/v1/...
 app.include_router(orchestrated_router,
                    prefix=f"{settings.API_V1_STR}/orchestrated",  # /api/v1/orchestrated/...
                    tags=["Orchestrated AI Agents"])  # Groups endpoints in API documentation
+app.include_router(edna_router,
+                   prefix=f"{settings.API_V1_STR}/edna",  # /api/v1/edna/...
+                   tags=["E-DNA Profiles"])  # Groups endpoints in API documentation
 
 
 # ============================================================================
@@ -85,14 +183,25 @@ async def root():
             "upload_edna": f"{settings.API_V1_STR}/upload",  # Upload your E-DNA quiz results
             "chat_architect": f"{settings.API_V1_STR}/chat/architect",  # Talk to Hanif (strategy coach)
             "chat_alchemist": f"{settings.API_V1_STR}/chat/alchemist",  # Talk to Fariza (branding coach)
+            "chat_architect_stream": f"{settings.API_V1_STR}/chat/architect/stream",  # Hanif's answer, word by word
+            "chat_alchemist_stream": f"{settings.API_V1_STR}/chat/alchemist/stream",  # Fariza's answer, word by word
             "health": f"{settings.API_V1_STR}/health",  # Check if system is working
 
             # New orchestrated endpoints - Advanced way with smart routing
             "start_conversation": f"{settings.API_V1_STR}/orchestrated/conversation/start",  # Start advanced conversation
             "upload_to_conversation": f"{settings.API_V1_STR}/orchestrated/conversation/{{conversation_id}}/upload",  # Upload files to specific conversation
             "orchestrated_chat": f"{settings.API_V1_STR}/orchestrated/conversation/chat",  # Smart chat that picks the right coach
+            "orchestrated_chat_stream": f"{settings.API_V1_STR}/orchestrated/conversation/chat/{{agent}}/stream",  # Smart chat, streamed
+            "orchestrated_chat_collaborate": f"{settings.API_V1_STR}/orchestrated/conversation/chat/collaborate",  # Ask both coaches at once
             "conversation_history": f"{settings.API_V1_STR}/orchestrated/conversation/{{conversation_id}}/history",  # Get chat history
-            "orchestrator_health": f"{settings.API_V1_STR}/orchestrated/health/orchestrator"  # Check advanced system health
+            "user_conversations": f"{settings.API_V1_STR}/orchestrated/conversations?user_id={{user_id}}",  # List a user's conversations, newest first
+            "orchestrator_health": f"{settings.API_V1_STR}/orchestrated/health/orchestrator",  # Check advanced system health
+
+            # E-DNA profile endpoints - Stored quiz results
+            "next_quiz_question": f"{settings.API_V1_STR}/edna/quiz/next",  # The next question after an answer
+            "submit_quiz": f"{settings.API_V1_STR}/edna/quiz/submit",  # Save a whole quiz session's answers at once
+            "edna_profile": f"{settings.API_V1_STR}/edna/profile/{{user_id}}",  # A user's six-layer profile
+            "database_health": f"{settings.API_V1_STR}/edna/health/database"  # Database connection pool status
         }
     }
 
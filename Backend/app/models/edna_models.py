@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, JSON, Boolean, DateTime, ForeignKey, Float, Text
+from sqlalchemy import Column, Integer, String, JSON, Boolean, DateTime, ForeignKey, Float, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -9,6 +9,8 @@ Base = declarative_base()
 class EDNAQuestion(Base):
     """E-DNA quiz questions with branching logic"""
     __tablename__ = "edna_questions"
+    # Lets "load the active quiz" read questions already in quiz order
+    __table_args__ = (Index("ix_edna_questions_active_order", "is_active", "order_index"),)
 
     id = Column(Integer, primary_key=True)
     question_text = Column(Text, nullable=False)
@@ -28,6 +30,14 @@ class EDNAQuestion(Base):
 class EDNAResponse(Base):
     """User responses to E-DNA quiz questions"""
     __tablename__ = "edna_responses"
+    __table_args__ = (
+        # One quiz's answers (and "has this question been answered yet?")
+        Index("ix_edna_responses_session_question", "quiz_session_id", "question_id"),
+        # One user's answers, newest first
+        Index("ix_edna_responses_user_created", "user_id", "created_at"),
+        # Per-question statistics
+        Index("ix_edna_responses_question", "question_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False)
@@ -48,6 +58,8 @@ class EDNAResponse(Base):
 class EDNAProfile(Base):
     """Complete six-layer E-DNA profile for users"""
     __tablename__ = "edna_profiles"
+    # user_id is unique (so already indexed); this finds the profile a quiz produced
+    __table_args__ = (Index("ix_edna_profiles_quiz_session", "quiz_session_id"),)
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, unique=True, nullable=False)
@@ -90,6 +102,8 @@ class EDNAProfile(Base):
 class QuizSession(Base):
     """Track quiz sessions and completion status"""
     __tablename__ = "quiz_sessions"
+    # Lets "a user's quizzes" read one user's rows already in date order
+    __table_args__ = (Index("ix_quiz_sessions_user_started", "user_id", "started_at"),)
 
     id = Column(Integer, primary_key=True)
     session_id = Column(String(100), unique=True, nullable=False)
@@ -115,3 +129,33 @@ class QuizSession(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow,
                         onupdate=datetime.utcnow)
+
+
+class ConversationRecord(Base):
+    """Orchestrated conversation metadata (messages live in conversation_messages)"""
+    __tablename__ = "conversations"
+    # Lets "list my conversations" read one user's rows already in date order
+    __table_args__ = (Index("ix_conversations_user_created", "user_id", "created_at"),)
+
+    conversation_id = Column(String(36), primary_key=True)
+    user_id = Column(Integer, nullable=True)
+    # Every ConversationState field except messages and timestamps
+    data = Column(JSON, nullable=False)
+    # Bumped by every write, so workers can tell their cached copy is stale
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ConversationMessage(Base):
+    """One message of an orchestrated conversation, in arrival order"""
+    __tablename__ = "conversation_messages"
+
+    id = Column(Integer, primary_key=True)
+    conversation_id = Column(String(36), ForeignKey(
+        "conversations.conversation_id", ondelete="CASCADE"), nullable=False, index=True)
+    role = Column(String(20), nullable=False)
+    content = Column(Text, nullable=False)
+    agent = Column(String(50), nullable=True)
+    timestamp = Column(DateTime, nullable=False)
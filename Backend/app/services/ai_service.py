@@ -5,10 +5,21 @@
 # It handles sending messages to the AI, getting responses, and deciding which
 # coach (Hanif or Fariza) should handle each user question.
 
+import asyncio  # For running Claude calls without freezing the server
 import boto3  # AWS SDK for Python - lets us talk to AWS services
 import json  # For formatting data to send to AI
-from typing import Optional, Dict  # For type hints (makes code clearer)
+import threading  # For telling a worker thread to stop streaming early
+import time  # For measuring how fast each model answers
+from botocore.config import Config  # Connection pool and timeout settings for boto3
+from concurrent.futures import ThreadPoolExecutor  # Worker threads for blocking boto3 calls
+from typing import Optional, Dict, List, AsyncIterator, Callable, Union  # For type hints (makes code clearer)
 from app.core.config import settings  # Our configuration settings
+from app.services.response_cache import ResponseCache  # Remembers answers to repeated questions
+from app.services.routing import ARCHITECT_KEYWORDS, ALCHEMIST_KEYWORDS, keyword_router  # Shared keyword lists + compiled router
+from app.services.personas import (  # Hanif's and Fariza's prompts, built once
+    cached_prefix_tokens, system_blocks, system_text, without_cache_markers)
+from app.services.resilience import BedrockResilience, UpstreamUnavailableError  # Retries + circuit breaker
+from app.services.model_router import Endpoint, ModelRouter, parse_endpoints  # Which model / region answers
 
 class BedrockAIService:
     """
@@ -21,12 +32,52 @@ class BedrockAIService:
         Initialize the AI service - set up connection to AWS Bedrock
         This is like setting up the phone line to talk to Claude
         """
-        # Create a client to talk to AWS Bedrock (the service that hosts Claude)
-        self.bedrock = boto3.client(
-            'bedrock-runtime',  # The AWS service that runs AI models
-            region_name=settings.AWS_REGION,  # Which AWS region to use
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,  # Your AWS account ID
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY  # Your AWS password
+        # Retries with backoff when Bedrock is busy, a limit per model, and a
+        # circuit breaker that fails fast while Bedrock is down (resilience.py)
+        self.resilience = BedrockResilience(
+            max_retries=settings.BEDROCK_MAX_RETRIES,
+            backoff_base_seconds=settings.BEDROCK_BACKOFF_BASE_SECONDS,
+            backoff_max_seconds=settings.BEDROCK_BACKOFF_MAX_SECONDS,
+            max_concurrency_per_model=settings.BEDROCK_MODEL_MAX_CONCURRENCY,
+            failure_threshold=settings.BEDROCK_BREAKER_FAILURES,
+            reset_seconds=settings.BEDROCK_BREAKER_RESET_SECONDS
+        )
+
+        # Which model (and region) answers each call: the fastest healthy one,
+        # or the cheaper model for short turns (model_router.py)
+        self.router = ModelRouter(
+            parse_endpoints([settings.CLAUDE_MODEL_ID, settings.BEDROCK_MODEL_IDS], settings.AWS_REGION),
+            parse_endpoints([settings.BEDROCK_LIGHT_MODEL_IDS], settings.AWS_REGION, light=True),
+            self.resilience,
+            light_max_chars=settings.BEDROCK_LIGHT_MAX_CHARS,
+            window_size=settings.BEDROCK_ROUTING_WINDOW,
+            window_seconds=settings.BEDROCK_ROUTING_WINDOW_SECONDS
+        )
+
+        # Create a client to talk to AWS Bedrock (the service that hosts Claude),
+        # one for each region a model is used in
+        self._clients = {region: self._create_client(region)
+                         for region in set(self.router.regions()) | {settings.AWS_REGION}}
+        self.bedrock = self._clients[settings.AWS_REGION]
+
+        # ============================================================================
+        # NON-BLOCKING CALLS - Keep the server responsive while Claude is thinking
+        # ============================================================================
+        # boto3 is synchronous: calling it directly inside an async endpoint would
+        # freeze every other request on this worker (health checks included) until
+        # Claude answers. Instead we hand each call to a small pool of worker threads
+        # and cap how many can be in flight at once, so a traffic spike queues up
+        # politely instead of opening unlimited connections to AWS.
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.BEDROCK_MAX_CONCURRENCY,
+            thread_name_prefix="bedrock"
+        )
+        self._semaphore = asyncio.Semaphore(settings.BEDROCK_MAX_CONCURRENCY)
+
+        # Repeated questions get the remembered answer instead of a new Claude call
+        self.response_cache = ResponseCache(
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
         )
         
         # ============================================================================
@@ -37,44 +88,39 @@ class BedrockAIService:
         # who knows which coach specializes in what topics.
         
         # Enhanced agent specializations with more specific keywords
+        # (the lists themselves live in app/services/routing.py, shared with the
+        # workflow engine, and are compiled once into keyword_router)
         self.agent_specializations = {
-            "architect": [  # Hanif's keywords - business strategy and systems
-                "scale", "scaling", "systematic", "strategy", "framework", "process", 
-                "optimization", "efficiency", "metrics", "analytics", "operations",
-                "growth", "revenue", "profit", "business model", "systems", "structure",
-                "planning", "performance", "data", "roi", "kpi", "funnel", "conversion"
-            ],
-            "alchemist": [  # Fariza's keywords - branding and personal development
-                "brand", "branding", "personal brand", "authentic", "purpose", 
-                "vision", "creativity", "transformation", "energy", "alignment",
-                "intuition", "spiritual", "mindset", "beliefs", "values", "mission",
-                "manifestation", "soul", "heart", "passion", "calling", "identity"
-            ]
+            "architect": ARCHITECT_KEYWORDS,  # Hanif's keywords - business strategy and systems
+            "alchemist": ALCHEMIST_KEYWORDS  # Fariza's keywords - branding and personal development
         }
     
+    def _create_client(self, region: str):
+        """A Bedrock client for one AWS region"""
+        return boto3.client(
+            'bedrock-runtime',  # The AWS service that runs AI models
+            region_name=region,  # Which AWS region to use
+            endpoint_url=settings.BEDROCK_ENDPOINT_URL,  # None means the real AWS endpoint
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,  # Your AWS account ID
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,  # Your AWS password
+            config=Config(
+                max_pool_connections=settings.BEDROCK_MAX_CONCURRENCY,  # One HTTP connection per in-flight call
+                read_timeout=settings.BEDROCK_READ_TIMEOUT_SECONDS,
+                retries={"mode": "standard", "total_max_attempts": 1}  # We retry ourselves (resilience.py)
+            )
+        )
+
     def check_agent_specialization(self, message: str, current_agent: str) -> Dict[str, str]:
         """
         Check if message should be handled by a different agent
         This is like a smart receptionist who reads your question and decides
         which coach would be best to help you with it.
         """
-        # Convert message to lowercase so we can match keywords regardless of case
-        message_lower = message.lower()
-        
-        # Count keyword matches with more precise matching
-        # We count how many keywords from each coach's specialty appear in the message
-        architect_matches = 0  # How many Hanif keywords we found
-        alchemist_matches = 0  # How many Fariza keywords we found
-        
-        # Check for architect keywords (Hanif's specialties)
-        for keyword in self.agent_specializations["architect"]:
-            if keyword in message_lower:  # If this keyword appears in the message
-                architect_matches += 1  # Count it as a match for Hanif
-        
-        # Check for alchemist keywords (Fariza's specialties)
-        for keyword in self.agent_specializations["alchemist"]:
-            if keyword in message_lower:  # If this keyword appears in the message
-                alchemist_matches += 1  # Count it as a match for Fariza
+        # Count keyword matches - one pass over the message scores every coach
+        # (case-insensitive; each keyword counts once however often it appears)
+        scores = keyword_router.scan(message)
+        architect_matches = scores["architect"]  # How many Hanif keywords we found
+        alchemist_matches = scores["alchemist"]  # How many Fariza keywords we found
         
         # Debug logging (remove in production) - helps us see what's happening
         print(f"DEBUG: Message: '{message}'")
@@ -102,12 +148,172 @@ class BedrockAIService:
         
         # If no redirection needed, stay with current coach
         return {"should_redirect": False}
+
+    def _request_for(self, request_body: str, endpoint: Endpoint) -> str:
+        """
+        The request as this model should get it
+        Prompt-caching markers are only kept for a model that supports prompt
+        caching, and only when the marked part is long enough for it to be
+        cached - other models reject the request.
+        """
+        if '"cache_control"' not in request_body:
+            return request_body  # Nothing marked (BEDROCK_PROMPT_CACHING is off)
+        body = json.loads(request_body)
+        if endpoint.caches(cached_prefix_tokens(body["system"])):
+            return request_body
+        body["system"] = without_cache_markers(body["system"])
+        return json.dumps(body)
+
+    def _invoke_model_sync(self, request_body: str, endpoint: Endpoint) -> dict:
+        """
+        Send one request to Claude and read the whole answer (blocking)
+        This runs inside a worker thread - never call it from async code directly.
+        """
+        response = self._clients[endpoint.region].invoke_model(
+            modelId=endpoint.model_id,
+            body=self._request_for(request_body, endpoint)
+        )
+        # Reading the body is network I/O too, so it stays in the worker thread
+        return json.loads(response['body'].read())
+
+    def _endpoints(self, model_id: Optional[str], light: bool, streamed: bool = False) -> List[Endpoint]:
+        """The models to try for one call, best first (just the one asked for, if any)"""
+        return [self.router.endpoint(model_id)] if model_id else self.router.candidates(light, streamed)
+
+    async def invoke_model(self, request_body: str, model_id: Optional[str] = None, light: bool = False) -> dict:
+        """
+        Call Claude without blocking the event loop
+        Waits for a free slot (at most BEDROCK_MAX_CONCURRENCY calls at once),
+        then runs the blocking boto3 call in our worker thread pool.
+        The router picks the model (light=True allows the cheaper one). If it
+        can't answer we move straight on to the next model; the last one is
+        retried as usual. Raises UpstreamUnavailableError if none can answer.
+        """
+        endpoints = self._endpoints(model_id, light)
+
+        async def attempt(endpoint: Endpoint) -> dict:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                started = time.perf_counter()
+                try:
+                    result = await loop.run_in_executor(self._executor, self._invoke_model_sync, request_body, endpoint)
+                except Exception as e:
+                    self.router.failed(endpoint, time.perf_counter() - started, e)
+                    raise
+                self.router.succeeded(endpoint, time.perf_counter() - started)
+                return result
+
+        for position, endpoint in enumerate(endpoints):
+            last = position == len(endpoints) - 1
+            try:
+                return await self.resilience.call(endpoint.name, lambda: attempt(endpoint),
+                                                  max_retries=None if last else 0)
+            except UpstreamUnavailableError:
+                if last:
+                    raise
+                print(f"⚠️ {endpoint.name} can't answer right now - trying {endpoints[position + 1].name}")
+
+    def _stream_model_sync(self, request_body: str, endpoint: Endpoint, push: Callable[[object], None],
+                           stop: threading.Event) -> None:
+        """
+        Ask Claude for a streamed answer and push each text piece as it arrives (blocking)
+        Runs inside a worker thread; stops early if the listener has gone away.
+        """
+        response = self._clients[endpoint.region].invoke_model_with_response_stream(
+            modelId=endpoint.model_id,
+            body=self._request_for(request_body, endpoint)
+        )
+        stream = response['body']
+        try:
+            for event in stream:
+                if stop.is_set():  # The user disconnected - stop reading
+                    break
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                data = json.loads(chunk['bytes'])
+                # Claude sends the answer as a series of "content_block_delta" events
+                if data.get('type') == 'content_block_delta' and data['delta'].get('type') == 'text_delta':
+                    push(data['delta']['text'])
+        finally:
+            stream.close()
+
+    async def stream_model(self, request_body: str, model_id: Optional[str] = None,
+                           light: bool = False) -> AsyncIterator[str]:
+        """
+        Stream Claude's answer without blocking the event loop
+        Routed, retried and passed on to the next model like invoke_model, as
+        long as nothing has been streamed yet.
+        """
+        endpoints = self._endpoints(model_id, light, streamed=True)
+        for position, endpoint in enumerate(endpoints):
+            last = position == len(endpoints) - 1
+            streamed = False
+            try:
+                async for piece in self.resilience.stream(endpoint.name,
+                                                          lambda: self._stream_once(request_body, endpoint),
+                                                          max_retries=None if last else 0):
+                    streamed = True
+                    yield piece
+                return
+            except UpstreamUnavailableError:
+                if last or streamed:
+                    raise
+                print(f"⚠️ {endpoint.name} can't answer right now - trying {endpoints[position + 1].name}")
+
+    async def _stream_once(self, request_body: str, endpoint: Endpoint) -> AsyncIterator[str]:
+        """
+        One streamed Claude call
+        The worker thread reads Bedrock's response stream and hands each text
+        piece over to us through a queue, so we can pass it on immediately.
+        The router is told how long the first piece took (what the user waits for).
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()  # Marker meaning "no more pieces"
+        stop = threading.Event()
+
+        def push(item: object) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        def run() -> None:
+            try:
+                self._stream_model_sync(request_body, endpoint, push, stop)
+            except Exception as e:
+                push(e)  # Re-raised on the async side below
+            finally:
+                push(finished)
+
+        async with self._semaphore:
+            started = time.perf_counter()
+            measured = False
+            worker = loop.run_in_executor(self._executor, run)
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is finished:
+                        break
+                    if isinstance(item, Exception):
+                        self.router.failed(endpoint, time.perf_counter() - started, item, streamed=True)
+                        raise item
+                    if not measured:
+                        self.router.succeeded(endpoint, time.perf_counter() - started, streamed=True)
+                        measured = True
+                    yield item
+            finally:
+                stop.set()  # Tell the worker to stop if we left early
+                await asyncio.shield(worker)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads (called when the app shuts down)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
     
-    async def chat_with_claude(self, message: str, personality: str, user_edna_profile: Optional[dict] = None, has_uploaded_pdf: bool = False) -> str:
+    def _canned_reply(self, message: str, personality: str, has_uploaded_pdf: bool,
+                      redirect: bool = True) -> Optional[str]:
         """
-        Chat with Claude using Hanif or Fariza's personality with proper workflow
-        This is the main function that sends messages to Claude AI and gets responses back.
-        It also handles the personality switching and PDF upload requirements.
+        Return a fixed reply when Claude doesn't need to be called at all
+        (the user hasn't uploaded their E-DNA PDF yet, or the question belongs
+        to the other coach - unless redirect=False). Returns None when Claude should answer.
         """
         
         # ============================================================================
@@ -149,7 +355,8 @@ Your E-DNA results will help me provide the most transformative and personalized
 Use the /upload endpoint to share your E-DNA results PDF, and let's begin this beautiful transformation together! ✨"""
         
         # FIXED: Check redirection BEFORE generating response
-        redirect_check = self.check_agent_specialization(message, personality)
+        # (not when both coaches are answering together - each covers their own side)
+        redirect_check = self.check_agent_specialization(message, personality) if redirect else {"should_redirect": False}
         if redirect_check["should_redirect"]:
             if personality == "architect":
                 return f"""I appreciate your question about branding and authentic expression, but this is exactly the kind of transformational work that the AI Alchemist (Fariza) specializes in.
@@ -169,114 +376,126 @@ Hanif excels at creating frameworks, optimizing processes, and building scalable
 
 Please switch to chat with the AI Architect using the /api/v1/chat/architect endpoint, and he'll give you the systematic guidance you're looking for."""
         
-        # Hanif "The Architect" personality
-        architect_prompt = f"""You are Hanif Khan, "The Architect" from Brandscaling.
-
-PERSONALITY TRAITS:
-- Precise, calm, and strategic
-- You cut through complexity with exact, no-fluff communication
-- You always ask "What's the root problem here?"
-- You focus on systematic solutions and frameworks
-- You believe "Most problems are decisions avoided—not strategy missing"
-
-COMMUNICATION STYLE:
-- Direct and to-the-point
-- Use systematic thinking
-- Break down complex problems into clear steps
-- Focus on root causes, not symptoms
-- Provide actionable frameworks
-- Start responses with "**The root problem here:**" when identifying issues
-
-EXPERTISE:
-- Business scaling strategies
-- Performance optimization
-- Systematic process design
-- Strategic decision-making
-- Operational efficiency
-- Revenue optimization
-- Systems and frameworks
-
-USER'S E-DNA PROFILE: {user_edna_profile if user_edna_profile else "Architect type - systematic, strategic thinker"}
-
-RESPONSE FORMAT:
-- Start with identifying the core issue using "**The root problem here:**"
-- Provide numbered, systematic steps
-- Include specific, actionable advice
-- End with a strategic insight or framework
-- Keep responses focused and precise
-
-Remember: You are Hanif Khan. Respond as him, with his precise, strategic approach."""
-
-        # Fariza "The Alchemist" personality  
-        alchemist_prompt = f"""You are Fariza Javed, "The Alchemist" from Brandscaling.
-
-PERSONALITY TRAITS:
-- Warm, magnetic, and empowering
-- You sense what the market wants before it knows it wants it
-- You help founders align internal evolution with external brand presence
-- You believe "You can't scale what you haven't clarified"
-- You focus on authentic transformation and energetic alignment
-
-COMMUNICATION STYLE:
-- Warm and nurturing tone
-- Use transformational language
-- Focus on authentic alignment
-- Inspire depth and clarity
-- Provide intuitive insights
-- Often start with empathetic expressions like "*leans in*" or "Beautiful soul"
-
-EXPERTISE:
-- Personal brand development
-- Authentic scaling methods
-- Energy optimization
-- Creative manifestation
-- Purpose-profit alignment
-- Transformational leadership
-- Intuitive business guidance
-
-USER'S E-DNA PROFILE: {user_edna_profile if user_edna_profile else "Alchemist type - intuitive, transformational leader"}
-
-RESPONSE FORMAT:
-- Start with empathetic understanding and warm connection
-- Guide through transformational insights
-- Focus on authentic alignment and purpose
-- Provide creative, intuitive solutions
-- End with empowering affirmation
-- Use warm, inspiring language throughout
-
-Remember: You are Fariza Javed. Respond as her, with her warm, transformational approach."""
-
-        # Choose personality prompt
-        if personality.lower() == "alchemist":
-            system_prompt = alchemist_prompt
-        else:
-            system_prompt = architect_prompt
-        
-        try:
-            # Prepare the request body
-            request_body = json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 1000,
-                "system": system_prompt,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": message
-                    }
-                ]
-            })
-
-            # Call Claude via Bedrock
-            response = self.bedrock.invoke_model(
-                modelId=settings.CLAUDE_MODEL_ID,
-                body=request_body
-            )
+        # No fixed reply needed - Claude should answer this one
+        return None
+
+    def _build_system_prompt(self, personality: str, user_edna_profile: Optional[dict] = None,
+                             conversation_summary: Optional[str] = None) -> List[dict]:
+        """
+        The instructions that tell Claude to act as Hanif or Fariza
+        The coaches' instructions are written once in personas.py; here we
+        only add the user's profile (one short line) and the summary of the
+        earlier conversation, laid out so Bedrock can cache the unchanging part.
+        """
+        return system_blocks(personality, user_edna_profile, conversation_summary,
+                             cache=settings.BEDROCK_PROMPT_CACHING)
+
+    def _build_request_body(self, message: str, system_prompt: Union[str, List[dict]],
+                            history: Optional[List[Dict[str, str]]] = None) -> str:
+        """
+        Build the JSON request we send to Claude (system prompt + recent turns + user message)
+        The earlier turns aren't marked for prompt caching: the history window
+        moves along with every message, so a cached copy would never be reused.
+        """
+        return json.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 1000,
+            "system": system_prompt,
+            "messages": list(history or []) + [
+                {
+                    "role": "user",
+                    "content": message
+                }
+            ]
+        })
 
-            result = json.loads(response['body'].read())
-            return result['content'][0]['text']
+    async def condense_summary(self, summary: str) -> str:
+        """
+        Ask Claude to rewrite a conversation's running notes as a short summary
+        Errors are raised, not turned into a reply - the caller just keeps
+        the notes it already has. Uses the cheaper model if there is one.
+        """
+        system_prompt = ("You summarize coaching conversations. Rewrite the notes you are given as a "
+                         "short paragraph (at most 80 words) covering what the user wants, what they "
+                         "were advised and any open questions. Reply with the summary only.")
+        result = await self.invoke_model(self._build_request_body(summary, system_prompt), light=True)
+        return result['content'][0]['text']
+
+    async def chat_with_claude(self, message: str, personality: str, user_edna_profile: Optional[dict] = None, has_uploaded_pdf: bool = False, use_cache: bool = True,
+                               history: Optional[List[Dict[str, str]]] = None, conversation_summary: Optional[str] = None,
+                               redirect: bool = True) -> str:
+        """
+        Chat with Claude using Hanif or Fariza's personality with proper workflow
+        This is the main function that sends messages to Claude AI and gets responses back.
+        It also handles the personality switching and PDF upload requirements.
+        Set use_cache=False to always ask Claude (e.g. for health checks).
+        history / conversation_summary give Claude the earlier conversation
+        (see langgraph/context.py for how they're picked).
+        Set redirect=False to answer even questions that belong to the other
+        coach (when both coaches answer together).
+        """
+        # Fixed replies (PDF upload request, redirect to the other coach) skip Claude
+        canned = self._canned_reply(message, personality, has_uploaded_pdf, redirect)
+        if canned is not None:
+            return canned
 
+        try:
+            system_prompt = self._build_system_prompt(personality, user_edna_profile, conversation_summary)
+
+            # Asked the same thing at the same point before? Answer from the cache, no Claude call
+            # (the profile is part of the prompt text, so it's covered by the prompt fingerprint)
+            cache_key = ResponseCache.make_key(personality, system_text(system_prompt), message, history=history)
+            if use_cache:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+            request_body = self._build_request_body(message, system_prompt, history)
+
+            # Call Claude via Bedrock (in a worker thread, so other users aren't blocked);
+            # short turns like "thanks!" may go to the cheaper model
+            result = await self.invoke_model(request_body, light=self.router.is_light(message))
+            reply = result['content'][0]['text']
+            self.response_cache.set(cache_key, reply)  # Only real answers are cached, never errors
+            return reply
+
+        except UpstreamUnavailableError:
+            raise  # Bedrock is busy or down: the API answers 503, not an apology as if it were a reply
         except Exception as e:
             return f"I apologize, but I'm experiencing technical difficulties. Please try again. Error: {str(e)}"
 
+    async def stream_chat_with_claude(self, message: str, personality: str, user_edna_profile: Optional[dict] = None, has_uploaded_pdf: bool = False,
+                                      history: Optional[List[Dict[str, str]]] = None, conversation_summary: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Same as chat_with_claude, but hands back the answer piece by piece
+        The first words reach the user as soon as Claude writes them, instead
+        of after the whole answer is finished. Fixed replies come as one piece.
+        """
+        canned = self._canned_reply(message, personality, has_uploaded_pdf)
+        if canned is not None:
+            yield canned
+            return
+
+        try:
+            system_prompt = self._build_system_prompt(personality, user_edna_profile, conversation_summary)
+
+            cache_key = ResponseCache.make_key(personality, system_text(system_prompt), message, history=history)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+            pieces = []
+            async for delta in self.stream_model(self._build_request_body(message, system_prompt, history),
+                                                 light=self.router.is_light(message)):
+                pieces.append(delta)
+                yield delta
+            self.response_cache.set(cache_key, "".join(pieces))
+
+        except UpstreamUnavailableError:
+            raise  # Bedrock is busy or down: the endpoint sends an error event instead
+        except Exception as e:
+            yield f"I apologize, but I'm experiencing technical difficulties. Please try again. Error: {str(e)}"
+
 # Create global instance
 ai_service = BedrockAIService()
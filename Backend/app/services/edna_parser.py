@@ -0,0 +1,214 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+# Layer order matches the EDNAProfile columns
+LAYERS = ("core_type", "subtype", "learning_styles", "neurodiversity", "mindset", "meta_beliefs")
+
+# A layer's section runs from its heading to the next heading, capped at this
+# many characters, so appendices after the profile never leak into it
+SECTION_MAX_CHARS = 1500
+MAX_META_BELIEFS = 5
+MAX_BELIEF_CHARS = 160
+_BULLETS = "-•*·"
+
+SUBTYPES_BY_TYPE = {
+    "architect": ("master-strategist", "systemised-builder", "internal-analyzer", "ultimate-strategist"),
+    "alchemist": ("visionary-oracle", "magnetic-perfectionist", "energetic-empath", "ultimate-alchemist"),
+    "blurred": ("overthinker", "performer", "self-forsaker", "self-betrayer")
+}
+
+# Term pattern -> normalized value, per layer
+_LAYER_TERMS = {
+    "core_type": {f"{core_type}s?": core_type for core_type in SUBTYPES_BY_TYPE},
+    "subtype": {
+        subtype.replace("-", r"[\s-]"): subtype for subtypes in SUBTYPES_BY_TYPE.values() for subtype in subtypes
+    },
+    "learning_styles": {
+        r"visual": "visual",
+        r"auditory": "auditory",
+        r"kinaesthetic|kinesthetic": "kinesthetic",
+        r"reading\s*/\s*writing|read\s*/\s*write": "reading/writing",
+        r"social": "social",
+        r"solitary": "solitary",
+        r"logical": "logical"
+    },
+    "neurodiversity": {
+        r"adhd": "ADHD",
+        r"dyslexi[ac]": "dyslexia",
+        r"dyspraxi[ac]": "dyspraxia",
+        r"dyscalculi[ac]": "dyscalculia",
+        r"autis(?:m|tic)|asd": "autism",
+        r"neurotypical": "neurotypical"
+    },
+    "mindset": {
+        r"growth": "growth",
+        r"fixed": "fixed",
+        r"high\s+risk\s+tolerance|risk[\s-]tolerant": "high risk tolerance",
+        r"low\s+risk\s+tolerance|risk[\s-]averse": "low risk tolerance",
+        r"abundance": "abundance",
+        r"scarcity": "scarcity"
+    }
+}
+
+_HEADINGS = {
+    "core_type": r"core\s+(?:e-?dna\s+)?type|e-?dna\s+type",
+    "subtype": r"(?:e-?dna\s+)?subtype",
+    "learning_styles": r"learning\s+styles?",
+    "neurodiversity": r"neuro-?diversity",
+    "mindset": r"mindset",
+    "meta_beliefs": r"meta[\s-]?beliefs?"
+}
+# A line starting e.g. "Layer 3: Learning Styles:" or "Your core E-DNA type -"
+_HEADING_PATTERN = (
+    r"^[ \t]*(?:layer\s*\d+\s*[:.\-–]\s*)?(?:your\s+)?(?:"
+    + "|".join(f"(?P<h_{layer}>{pattern})" for layer, pattern in _HEADINGS.items())
+    + r")\b[ \t]*(?:[:\-–]|$)"
+)
+
+HEADING = re.compile(_HEADING_PATTERN, re.IGNORECASE | re.MULTILINE)
+
+# Per layer: one alternation of its terms, group name -> normalized value
+_TERMS: Dict[str, Tuple["re.Pattern", Dict[str, str]]] = {}
+for _layer, _terms in _LAYER_TERMS.items():
+    _values = {f"t{index}": value for index, value in enumerate(_terms.values())}
+    _TERMS[_layer] = (
+        re.compile("|".join(rf"\b(?P<t{index}>{pattern})\b" for index, pattern in enumerate(_terms)), re.IGNORECASE),
+        _values
+    )
+
+
+def heading_layer(match: "re.Match") -> str:
+    """Layer named by a HEADING match"""
+    return match.lastgroup[2:]
+
+
+def _meta_beliefs(section: str) -> List[str]:
+    """Belief lines of a section; a bulleted list wins over lead-in text"""
+    beliefs: List[str] = []
+    bulleted = False
+    for line in section.splitlines():
+        line = line.strip()
+        is_bullet = bool(line) and line[0] in _BULLETS
+        if bulleted and not is_bullet:
+            break
+        if is_bullet and not bulleted:
+            beliefs, bulleted = [], True
+        line = " ".join(line.lstrip(_BULLETS).split())
+        if len(line) < 3:
+            continue
+        beliefs.append(line if len(line) <= MAX_BELIEF_CHARS else line[:MAX_BELIEF_CHARS - 3].rstrip() + "...")
+        if len(beliefs) == MAX_META_BELIEFS:
+            break
+    return beliefs
+
+
+def _find_terms(layer: str, section: str) -> List[str]:
+    """Distinct terms of a layer in its section, in order of appearance
+
+    Values on the heading line ("Mindset: Growth") are the answer when
+    there are any; otherwise the rest of the section is read.
+    """
+    pattern, values = _TERMS[layer]
+    line_end = section.find("\n")
+    found: List[str] = []
+    for text in (section[:line_end], section) if line_end != -1 else (section,):
+        for match in pattern.finditer(text):
+            value = values[match.lastgroup]
+            if value not in found:
+                found.append(value)
+        if found:
+            break
+    return found
+
+
+def parse_report_sections(text: str) -> Tuple[Dict[str, Any], bool]:
+    """parse_edna_report, plus whether every layer came from its own section
+
+    When it did, text after the sections can't change the profile, which is
+    what lets the PDF scan stop reading early.
+    """
+    # The whole report is scanned once, for headings; terms are only looked
+    # for inside the (short) sections
+    sections: Dict[str, Tuple[int, int]] = {}  # Layer -> (start, end) of its first section
+    headings = list(HEADING.finditer(text))
+    for index, match in enumerate(headings):
+        layer = heading_layer(match)
+        if layer not in sections:
+            end = headings[index + 1].start() if index + 1 < len(headings) else len(text)
+            sections[layer] = (match.end(), min(end, match.end() + SECTION_MAX_CHARS))
+    terms = {
+        layer: _find_terms(layer, text[start:end]) if layer in _TERMS else []
+        for layer, (start, end) in sections.items()
+    }
+
+    profile: Dict[str, Any] = {}
+
+    # Layer 1: core type (labeled, else the old keyword precedence)
+    labeled_type = terms.get("core_type")
+    if labeled_type:
+        core_type, confidence = labeled_type[0], 0.95
+    else:
+        text_lower = text.lower()
+        core_type = next((t for t in SUBTYPES_BY_TYPE if t in text_lower), None)
+        confidence = 0.6 if core_type else 0.0
+    profile["core_type"] = core_type.capitalize() if core_type else "Unknown"
+    profile["core_type_confidence"] = confidence
+
+    # Layer 2: subtype, trusted less when it doesn't belong to the core type
+    labeled_subtype = terms.get("subtype")
+    if labeled_subtype:
+        subtype, confidence = labeled_subtype[0], 0.9
+    else:
+        anywhere = _TERMS["subtype"][0].search(text)
+        subtype = _TERMS["subtype"][1][anywhere.lastgroup] if anywhere else None
+        confidence = 0.5 if subtype else 0.0
+    if subtype and core_type and subtype not in SUBTYPES_BY_TYPE[core_type]:
+        confidence /= 2
+    profile["subtype"] = subtype
+    profile["subtype_confidence"] = confidence
+
+    # Layers 3-5: vocabularies read from their own sections
+    for layer in ("learning_styles", "neurodiversity", "mindset"):
+        found = terms.get(layer)
+        profile[layer] = found or None
+        profile[f"{layer}_confidence"] = 0.9 if found else (0.3 if layer in sections else 0.0)
+
+    # Layer 6: meta-beliefs are free text lines
+    beliefs = _meta_beliefs(text[slice(*sections["meta_beliefs"])]) if "meta_beliefs" in sections else []
+    profile["meta_beliefs"] = beliefs or None
+    profile["meta_beliefs_confidence"] = 0.8 if beliefs else 0.0
+
+    confidences = [profile[f"{layer}_confidence"] for layer in LAYERS]
+    profile["overall_confidence"] = round(sum(confidences) / len(LAYERS), 3)
+    profile["completion_percentage"] = round(100 * sum(1 for c in confidences if c >= 0.5) / len(LAYERS), 1)
+
+    # Kept for callers of the original type-only analysis
+    profile["edna_type"] = profile["core_type"]
+    profile["confidence"] = profile["core_type_confidence"]
+    profile["profile_summary"] = format_profile(profile)
+    return profile, bool(labeled_type and labeled_subtype)
+
+
+def parse_edna_report(text: str) -> Dict[str, Any]:
+    """Parse E-DNA report text into an EDNAProfile-shaped dict
+
+    Each layer is read from the first section headed with its name (e.g.
+    "Learning Styles: Visual, Kinesthetic"). Confidence reflects how the value
+    was found: labeled in its own section, inferred from elsewhere in the
+    text, or missing (0.0).
+    """
+    return parse_report_sections(text)[0]
+
+
+def format_profile(profile: Dict[str, Any]) -> str:
+    """One-line profile for prompts, listing only the layers that were found"""
+    core = profile["core_type"]
+    if profile.get("subtype"):
+        core += f" ({profile['subtype']})"
+    parts = [core]
+    for layer, label in (("learning_styles", "learning"), ("neurodiversity", "neurodiversity"), ("mindset", "mindset")):
+        if profile.get(layer):
+            parts.append(f"{label}: {', '.join(profile[layer])}")
+    if profile.get("meta_beliefs"):
+        parts.append(f"beliefs: {'; '.join(profile['meta_beliefs'])}")
+    return " | ".join(parts)
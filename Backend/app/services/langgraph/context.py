@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional, TypedDict
+
+from app.core.config import settings
+
+
+class ConversationContext(TypedDict):
+    """What Bedrock sees of the conversation besides the current message"""
+    history: List[Dict[str, str]]  # Recent turns, oldest first, alternating user/assistant
+    summary: Optional[str]  # Rolling summary of everything older
+    tokens: int  # Estimated tokens used by history + summary
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def build_context(state: Dict[str, Any], token_budget: Optional[int] = None) -> ConversationContext:
+    """Assemble a token-budgeted window of recent turns plus the rolling summary
+
+    The latest user message is the one being answered, so it (and anything
+    after it) is left out of the history. Older turns are added newest first
+    until the budget runs out; the summary is charged against the budget
+    first. Bedrock needs the history to start with a user turn and to
+    alternate roles, so consecutive same-role messages are merged and a
+    leading assistant turn (e.g. the PDF request) is dropped.
+    """
+    budget = settings.CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    summary = state.get("conversation_summary")
+    used = estimate_tokens(summary) if summary else 0
+    if used > budget:
+        summary, used = None, 0
+
+    messages = state["messages"]
+    end = len(messages)
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index]["role"] == "user":
+            end = index
+            break
+
+    window: List[Dict[str, str]] = []
+    for index in range(end - 1, -1, -1):  # Newest first, without copying the list
+        message = messages[index]
+        cost = estimate_tokens(message["content"])
+        if used + cost > budget:
+            break
+        used += cost
+        window.append(message)
+    window.reverse()
+
+    history: List[Dict[str, str]] = []
+    for message in window:
+        role = "user" if message["role"] == "user" else "assistant"
+        if not history and role != "user":
+            used -= estimate_tokens(message["content"])
+            continue
+        if history and history[-1]["role"] == role:
+            history[-1]["content"] += "\n\n" + message["content"]
+        else:
+            history.append({"role": role, "content": message["content"]})
+
+    # The current user message follows, so the history must end on an assistant turn
+    if history and history[-1]["role"] == "user":
+        used -= estimate_tokens(history.pop()["content"])
+
+    return ConversationContext(history=history, summary=summary, tokens=max(used, 0))
@@ -1,10 +1,20 @@
-from typing import Dict, List, Optional, Any, Annotated
+from typing import Dict, List, Optional, Any, Annotated, AsyncIterator
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, END
 import asyncio
 import json
 
-from .state import ConversationState, AgentResponse, WorkflowDecision, state_manager
+from .state import ConversationState, TurnState, AgentResponse, WorkflowDecision, state_manager
+from .context import build_context
+from .summarizer import summarizer
+from .workflows import workflow_engine
 from ..ai_service import ai_service
+from ..resilience import UpstreamUnavailableError
+from app.core.config import settings
+
+PDF_REQUEST_PROMPT = "A user wants to start a conversation but hasn't uploaded their E-DNA quiz results yet. Ask them to upload their PDF so you can provide personalized guidance."
+
+COLLABORATORS = {"architect": "Hanif Khan - The Architect", "alchemist": "Fariza Javed - The Alchemist"}
 
 
 class BrandscalingOrchestrator:
@@ -17,14 +27,16 @@ class BrandscalingOrchestrator:
         """Build the LangGraph workflow"""
 
         # Create the state graph
-        workflow = StateGraph(ConversationState)
+        workflow = StateGraph(TurnState)
 
         # Add nodes (workflow steps)
         workflow.add_node("check_pdf_upload", self._check_pdf_upload)
         workflow.add_node("route_to_chosen_agent", self._route_to_chosen_agent)
         workflow.add_node("architect_response", self._architect_response)
         workflow.add_node("alchemist_response", self._alchemist_response)
-        workflow.add_node("finalize_response", self._finalize_response)
+        workflow.add_node("collaboration_response", self._collaboration_response)
+        workflow.add_node("merge_collaboration", self._merge_collaboration)
+        workflow.add_node("finalize_response", self._finalize_node)
 
         # Set entry point
         workflow.set_entry_point("check_pdf_upload")
@@ -34,7 +46,7 @@ class BrandscalingOrchestrator:
             "check_pdf_upload",
             self._pdf_upload_condition,
             {
-                "needs_pdf": END,
+                "needs_pdf": "finalize_response",
                 "has_pdf": "route_to_chosen_agent"
             }
         )
@@ -44,220 +56,248 @@ class BrandscalingOrchestrator:
             self._agent_routing_condition,
             {
                 "architect": "architect_response",
-                "alchemist": "alchemist_response"
+                "alchemist": "alchemist_response",
+                "collaboration": "collaboration_response"
             }
         )
 
         # Add edges to finalization
         workflow.add_edge("architect_response", "finalize_response")
         workflow.add_edge("alchemist_response", "finalize_response")
+        workflow.add_edge("collaboration_response", "merge_collaboration")
+        workflow.add_edge("merge_collaboration", "finalize_response")
         workflow.add_edge("finalize_response", END)
 
         return workflow.compile()
 
-    async def _check_pdf_upload(self, state: ConversationState) -> ConversationState:
+    async def _check_pdf_upload(self, state: TurnState) -> Dict[str, Any]:
         """Check if PDF upload is required"""
         if not state["needs_pdf_upload"]:
-            state["workflow_step"] = "route_to_chosen_agent"
-        else:
-            # Get PDF request from the chosen agent (following Task 3 logic)
-            chosen_agent = state.get("chosen_agent", "architect")
-
-            pdf_request = await ai_service.chat_with_claude(
-                message="A user wants to start a conversation but hasn't uploaded their E-DNA quiz results yet. Ask them to upload their PDF so you can provide personalized guidance.",
-                personality=chosen_agent,
-                user_edna_profile=None,
-                has_uploaded_pdf=False
-            )
+            return {"workflow_step": "route_to_chosen_agent"}
 
-            # Add chosen agent's PDF request message
-            upload_message = {
-                "role": "assistant",
-                "content": pdf_request,
-                "agent": chosen_agent
-            }
-            state["messages"].append(upload_message)
-            state["workflow_step"] = "pdf_upload"
+        # Get PDF request from the chosen agent (following Task 3 logic)
+        chosen_agent = state.get("chosen_agent", "architect")
+
+        pdf_request = await ai_service.chat_with_claude(
+            message=PDF_REQUEST_PROMPT,
+            personality=chosen_agent,
+            user_edna_profile=None,
+            has_uploaded_pdf=False
+        )
 
-        return state
+        if state["stream"]:
+            get_stream_writer()(pdf_request)
+        return {"response": pdf_request, "agent": chosen_agent, "workflow_step": "pdf_upload"}
 
-    async def _route_to_chosen_agent(self, state: ConversationState) -> ConversationState:
+    async def _route_to_chosen_agent(self, state: TurnState) -> Dict[str, Any]:
         """Route to the agent chosen by user (following Task 3 logic)"""
+        if state.get("collaboration_mode"):
+            print("🎯 Routing to both agents")
+            return {"current_agent": "both", "workflow_step": "collaboration_response"}
+
         chosen_agent = state.get("chosen_agent", "architect")
         print(f"🎯 Routing to user's chosen agent: {chosen_agent}")
 
-        state["current_agent"] = chosen_agent
-        state["workflow_step"] = f"{chosen_agent}_response"
-        return state
+        return {"current_agent": chosen_agent, "workflow_step": f"{chosen_agent}_response"}
 
-    async def _architect_response(self, state: ConversationState) -> ConversationState:
+    async def _architect_response(self, state: TurnState) -> Dict[str, Any]:
         """Get response from Architect (Hanif) - Following Task 3 logic"""
         print(
             f"🏗️ Getting Architect response for conversation {state['conversation_id']}")
+        return await self._agent_response(state, "architect")
 
-        # Get latest user message
-        latest_message = self._get_latest_user_message(state)
-        if not latest_message:
-            return state
-
-        try:
-            # Call existing AI service - it will handle redirection using Task 3 logic
-            response = await ai_service.chat_with_claude(
-                message=latest_message,
-                personality="architect",
-                user_edna_profile=state["edna_profile"],
-                has_uploaded_pdf=not state["needs_pdf_upload"]
-            )
-
-            # Add response to conversation
-            state_manager.add_message(
-                state["conversation_id"],
-                "assistant",
-                response,
-                "architect"
-            )
-
-            state["architect_input"] = response
-
-        except Exception as e:
-            print(f"❌ Error getting architect response: {e}")
-            error_response = "I apologize, but I'm experiencing technical difficulties. Please try again."
-            state_manager.add_message(
-                state["conversation_id"],
-                "assistant",
-                error_response,
-                "architect"
-            )
-            state["architect_input"] = error_response
-
-        state["workflow_step"] = "finalize"
-        return state
-
-    async def _alchemist_response(self, state: ConversationState) -> ConversationState:
+    async def _alchemist_response(self, state: TurnState) -> Dict[str, Any]:
         """Get response from Alchemist (Fariza) - Following Task 3 logic"""
         print(
             f"✨ Getting Alchemist response for conversation {state['conversation_id']}")
-
-        # Get latest user message
-        latest_message = self._get_latest_user_message(state)
-        if not latest_message:
-            return state
-
+        return await self._agent_response(state, "alchemist")
+
+    async def _agent_response(self, state: TurnState, agent: str) -> Dict[str, Any]:
+        """One agent answers the user's message"""
+        request = dict(
+            message=state["user_message"],
+            personality=agent,
+            user_edna_profile=state["edna_profile"],
+            has_uploaded_pdf=not state["needs_pdf_upload"],
+            history=state["history"],
+            conversation_summary=state["conversation_summary"]
+        )
         try:
             # Call existing AI service - it will handle redirection using Task 3 logic
-            response = await ai_service.chat_with_claude(
-                message=latest_message,
-                personality="alchemist",
-                user_edna_profile=state["edna_profile"],
-                has_uploaded_pdf=not state["needs_pdf_upload"]
-            )
+            if state["stream"]:
+                write = get_stream_writer()
+                pieces = []
+                async for delta in ai_service.stream_chat_with_claude(**request):
+                    pieces.append(delta)
+                    write(delta)
+                response = "".join(pieces)
+            else:
+                response = await ai_service.chat_with_claude(**request)
+
+        except UpstreamUnavailableError:
+            raise  # Bedrock busy or down: the API answers 503 instead of storing an apology
+        except Exception as e:
+            print(f"❌ Error getting {agent} response: {e}")
+            response = "I apologize, but I'm experiencing technical difficulties. Please try again."
+            if state["stream"]:
+                get_stream_writer()(response)
 
-            # Add response to conversation
-            state_manager.add_message(
-                state["conversation_id"],
-                "assistant",
-                response,
-                "alchemist"
-            )
+        return {"response": response, "agent": agent, f"{agent}_input": response, "workflow_step": "finalize"}
 
-            state["alchemist_input"] = response
+    async def _collaboration_response(self, state: TurnState) -> Dict[str, Any]:
+        """Get Architect's and Alchemist's responses at the same time
 
-        except Exception as e:
-            print(f"❌ Error getting alchemist response: {e}")
-            error_response = "I apologize, but I'm experiencing technical difficulties. Please try again."
-            state_manager.add_message(
-                state["conversation_id"],
-                "assistant",
-                error_response,
-                "alchemist"
-            )
-            state["alchemist_input"] = error_response
+        The turn takes as long as the slower of the two answers, not both
+        added together. If one agent can't answer (Bedrock busy), the other's
+        answer is used alone.
+        """
+        print(
+            f"🤝 Getting collaborative response for conversation {state['conversation_id']}")
 
-        state["workflow_step"] = "finalize"
-        return state
+        prompts = workflow_engine.get_collaboration_prompt(
+            state["user_message"], state["conversation_summary"] or "This is the start of the conversation.")
 
-    async def _finalize_response(self, state: ConversationState) -> ConversationState:
-        """Finalize the response and update state"""
+        # The collaboration prompts carry the message and summary themselves
+        answers = await asyncio.gather(*(
+            ai_service.chat_with_claude(
+                message=prompts[agent],
+                personality=agent,
+                user_edna_profile=state["edna_profile"],
+                has_uploaded_pdf=not state["needs_pdf_upload"],
+                history=state["history"],
+                redirect=False
+            )
+            for agent in COLLABORATORS
+        ), return_exceptions=True)
+
+        update: Dict[str, Any] = {"workflow_step": "merge_collaboration"}
+        unavailable = None
+        for agent, answer in zip(COLLABORATORS, answers):
+            if isinstance(answer, UpstreamUnavailableError):
+                print(f"❌ {agent} couldn't answer: {answer}")
+                unavailable = answer
+                answer = None
+            elif isinstance(answer, BaseException):
+                raise answer
+            update[f"{agent}_input"] = answer
+
+        if unavailable and not any(update[f"{agent}_input"] for agent in COLLABORATORS):
+            raise unavailable
+
+        return update
+
+    async def _merge_collaboration(self, state: TurnState) -> Dict[str, Any]:
+        """Combine both agents' answers into one reply"""
+        sections = [f"**{title}:**\n\n{state[f'{agent}_input']}"
+                    for agent, title in COLLABORATORS.items() if state.get(f"{agent}_input")]
+        if not sections:
+            return {}
+
+        return {"response": "\n\n---\n\n".join(sections), "agent": "both", "workflow_step": "finalize"}
+
+    async def _finalize_node(self, state: TurnState) -> Dict[str, Any]:
+        """Graph step: finalize, unless stream_conversation will (see there)"""
+        return {} if state["stream"] else await self._finalize_response(state)
+
+    async def _finalize_response(self, state: TurnState) -> Dict[str, Any]:
+        """Record the reply and update the conversation summary"""
         print(
             f"✅ Finalizing response for conversation {state['conversation_id']}")
 
-        # Update conversation summary if needed
-        if len(state["messages"]) > 5:
-            state["conversation_summary"] = state_manager.get_conversation_summary(
-                state["conversation_id"])
-
-        state["workflow_step"] = "completed"
-        state["updated_at"] = state_manager.conversations[state["conversation_id"]]["updated_at"]
-
-        return state
-
-    def _get_latest_user_message(self, state: ConversationState) -> Optional[str]:
-        """Get the latest user message from conversation"""
-        for msg in reversed(state["messages"]):
-            if msg["role"] == "user":
-                return msg["content"]
-        return None
+        # The only place a turn's reply is written (through the state manager
+        # so the conversation's routing counters stay in step)
+        conversation_id = state["conversation_id"]
+        if state.get("response") is not None:
+            await state_manager.add_message(conversation_id, "assistant", state["response"], state.get("agent"))
+        if state["workflow_step"] == "pdf_upload":
+            return {}
+
+        # Fold this turn into the rolling summary (only the new messages are read)
+        conversation_summary = await state_manager.get_conversation_summary(conversation_id)
+
+        summary_state = (await state_manager.get_conversation(conversation_id))["summary_state"]
+        if settings.SUMMARY_MODEL_PASS and summarizer.needs_condensing(summary_state):
+            # Other turns may fold new points while the model writes
+            covered = summarizer.checkpoint(summary_state)
+            try:
+                abstract = await ai_service.condense_summary(summarizer.render(summary_state))
+                if await state_manager.set_summary_abstract(conversation_id, abstract, covered):
+                    conversation_summary = (await state_manager.get_conversation(conversation_id))["conversation_summary"]
+            except Exception as e:
+                print(f"❌ Error condensing conversation summary: {e}")
+
+        return {"conversation_summary": conversation_summary, "workflow_step": "completed"}
+
+    def _new_turn(self, conversation: ConversationState, user_message: str, stream: bool = False) -> TurnState:
+        """The graph's input for one turn: the message plus what's needed to answer it"""
+        context = build_context(conversation) if self._pdf_upload_condition(conversation) == "has_pdf" else None
+        return TurnState(
+            conversation_id=conversation["conversation_id"],
+            user_message=user_message,
+            chosen_agent=conversation["chosen_agent"],
+            current_agent=conversation["current_agent"],
+            collaboration_mode=conversation["collaboration_mode"],
+            needs_pdf_upload=conversation["needs_pdf_upload"],
+            edna_profile=conversation["edna_profile"],
+            history=context["history"] if context else [],
+            conversation_summary=context["summary"] if context else None,
+            workflow_step="check_pdf_upload",
+            stream=stream,
+            response=None,
+            agent=None,
+            architect_input=None,
+            alchemist_input=None
+        )
 
     # Condition functions for workflow routing
-    def _pdf_upload_condition(self, state: ConversationState) -> str:
+    def _pdf_upload_condition(self, state: Dict[str, Any]) -> str:
         """Determine if PDF upload is needed"""
         if state["needs_pdf_upload"] or not state["edna_profile"]:
             return "needs_pdf"
         return "has_pdf"
 
-    def _agent_routing_condition(self, state: ConversationState) -> str:
+    def _agent_routing_condition(self, state: TurnState) -> str:
         """Route to the agent chosen by user (following Task 3 logic)"""
+        if state.get("collaboration_mode"):
+            return "collaboration"
         return state.get("chosen_agent", "architect")
 
-    async def process_conversation(self, conversation_id: str, user_message: str, chosen_agent: str) -> Dict[str, Any]:
+    async def process_conversation(self, conversation_id: str, user_message: str, chosen_agent: Optional[str],
+                                   collaboration: bool = False) -> Dict[str, Any]:
         """
         Main entry point for processing conversations - Following Task 3 Logic
 
         Args:
             conversation_id: The conversation ID
             user_message: The user's message
-            chosen_agent: The agent explicitly chosen by user ("architect" or "alchemist")
+            chosen_agent: The agent explicitly chosen by user ("architect" or "alchemist");
+                None keeps the previous choice
+            collaboration: Both agents answer together (the user asked for both)
         """
         print(
             f"🚀 Processing conversation {conversation_id} with chosen agent: {chosen_agent}")
 
-        # Get or create conversation state
-        state = state_manager.get_conversation(conversation_id)
-        if not state:
+        # Set the user's chosen agent (following Task 3 logic) and add their message
+        conversation = await state_manager.start_turn(conversation_id, user_message, chosen_agent, collaboration)
+        if not conversation:
             print(f"❌ Conversation {conversation_id} not found")
             return {"error": "Conversation not found"}
 
-        # Set the user's chosen agent (following Task 3 logic)
-        state["chosen_agent"] = chosen_agent
-        state["current_agent"] = chosen_agent
-
-        # Add user message to conversation
-        state_manager.add_message(conversation_id, "user", user_message)
-
-        # Refresh state after adding message
-        state = state_manager.get_conversation(conversation_id)
-        state["chosen_agent"] = chosen_agent  # Ensure it's set
-
         try:
-            # Run the workflow
-            result = await self.graph.ainvoke(state)
-
-            # Get the latest assistant message
-            latest_response = None
-            for msg in reversed(result["messages"]):
-                if msg["role"] == "assistant":
-                    latest_response = msg
-                    break
+            # Run the workflow on this turn only - the conversation stays with state_manager
+            result = await self.graph.ainvoke(self._new_turn(conversation, user_message))
 
             return {
                 "success": True,
-                "response": latest_response["content"] if latest_response else "No response generated",
-                "agent": latest_response.get("agent", chosen_agent) if latest_response else chosen_agent,
+                "response": result["response"] if result["response"] is not None else "No response generated",
+                "agent": result["agent"] or result["chosen_agent"],
                 "workflow_step": result["workflow_step"],
-                "collaboration_mode": False,  # Following Task 3 - no forced collaboration
+                "collaboration_mode": result["collaboration_mode"],  # Only when the user asked for both
                 "conversation_id": conversation_id
             }
 
+        except UpstreamUnavailableError:
+            raise
         except Exception as e:
             print(f"❌ Error processing conversation: {e}")
             return {
@@ -266,6 +306,52 @@ class BrandscalingOrchestrator:
                 "conversation_id": conversation_id
             }
 
+    async def stream_conversation(self, conversation_id: str, user_message: str, chosen_agent: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming counterpart of process_conversation
+
+        Runs the same graph with stream=True and yields {"type": "delta",
+        "text": ...} events as the agent's answer arrives, then one
+        {"type": "done", ...} event. Finalizing (recording the reply, folding
+        the summary) happens here rather than in the graph, in a finally: if
+        the client goes away mid-answer, the part it was sent is still
+        recorded.
+        """
+        print(
+            f"🚀 Streaming conversation {conversation_id} with chosen agent: {chosen_agent}")
+
+        conversation = await state_manager.start_turn(conversation_id, user_message, chosen_agent)
+        if not conversation:
+            print(f"❌ Conversation {conversation_id} not found")
+            yield {"type": "error", "error": "Conversation not found", "conversation_id": conversation_id}
+            return
+
+        turn = self._new_turn(conversation, user_message, stream=True)
+        pieces: List[str] = []
+        try:
+            async for mode, chunk in self.graph.astream(turn, stream_mode=["custom", "values"]):
+                if mode == "custom":
+                    pieces.append(chunk)
+                    yield {"type": "delta", "text": chunk}
+                else:
+                    turn = chunk
+            if not pieces and turn["response"]:  # Answered without streaming (both agents)
+                pieces.append(turn["response"])
+                yield {"type": "delta", "text": turn["response"]}
+        finally:
+            if pieces:
+                turn.update(response="".join(pieces), agent=turn["agent"] or chosen_agent,
+                            workflow_step="pdf_upload" if turn["workflow_step"] == "pdf_upload" else "finalize")
+                turn.update(await self._finalize_response(turn))
+
+        yield {
+            "type": "done",
+            "agent": turn["agent"],
+            "workflow_step": turn["workflow_step"],
+            "collaboration_mode": turn["collaboration_mode"],
+            "conversation_id": conversation_id
+        }
+
 
 # Global orchestrator instance
 orchestrator = BrandscalingOrchestrator()
@@ -0,0 +1,465 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import copy
+import json
+import time
+
+from sqlalchemy import delete, func, insert, inspect, select, text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.database import create_database_engine, create_schema
+from app.models.edna_models import ConversationRecord, ConversationMessage
+from .storage import ConversationStore, ExpiryIndex, estimate_state_size
+
+
+def _json_dumps(obj: Any) -> str:
+    return json.dumps(obj, default=str)
+
+
+def _normalize(data: Dict[str, Any]) -> Dict[str, Any]:
+    """``data`` as it reads back from the JSON column (a detached copy)"""
+    return json.loads(_json_dumps(data))
+
+
+def _merge(base: Any, ours: Any, theirs: Any) -> Any:
+    """Three-way merge of JSON values: our changes since ``base`` applied on top of ``theirs``
+
+    Dicts merge key by key and counters add up both sides' increments; any
+    other value we changed replaces theirs.
+    """
+    if ours == base:
+        return theirs
+    if isinstance(base, dict) and isinstance(ours, dict) and isinstance(theirs, dict):
+        return dict(theirs, **{key: _merge(base.get(key), value, theirs.get(key)) for key, value in ours.items()})
+    if type(base) is int and type(ours) is int and type(theirs) is int:
+        return theirs + ours - base
+    return ours
+
+
+class SQLConversationStore(ConversationStore):
+    """SQLAlchemy-backed store (SQLite or Postgres) with a read-through cache
+
+    Recently used conversations are kept in an LRU cache of live states.
+    Message appends and metadata changes are buffered and written in one
+    transaction once ``batch_size`` writes are pending, ``flush_interval``
+    seconds have passed, or ``flush`` is called (the app does this on a timer
+    and at shutdown). All database I/O goes through SQLAlchemy's async
+    engine, so it never blocks the event loop.
+
+    Every worker shares the database. Each conversation row carries a
+    ``version`` that every write bumps: a cache hit checks it (one primary
+    key lookup) and reloads the conversation if another worker wrote it
+    since, and metadata is written with a conditional update on the version
+    it was read at. If another worker got there first, only the fields this
+    worker changed are merged into theirs (counters keep both workers'
+    increments).
+
+    Every message is written to conversation_messages, so trimming the live
+    state loses nothing; loading a conversation only reads its latest
+    ``hot_messages`` rows.
+    """
+
+    def __init__(self, url: str, cache_size: int = 1000, batch_size: int = 50,
+                 flush_interval: float = 2.0, hot_messages: int = 40):
+        self.engine = create_database_engine(url, json_serializer=_json_dumps)
+        self._session_factory = async_sessionmaker(self.engine, expire_on_commit=False)
+        self._schema_ready = False
+        self._schema_lock = asyncio.Lock()
+
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.hot_messages = hot_messages
+
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cache_expiry = ExpiryIndex()  # Cached ids ordered by updated_at
+        # Row version each cached (or evicted but unwritten) state is based
+        # on - 0 until its first write - and its data as of that version
+        self._versions: Dict[str, int] = {}
+        self._written: Dict[str, Dict[str, Any]] = {}
+        self._reload: Set[str] = set()  # Merged with another worker's write: re-read on next get
+        self._dirty: Set[str] = set()
+        self._evicted: Dict[str, Dict[str, Any]] = {}  # Dirty states pushed out of the cache
+        self._pending_messages: List[Dict[str, Any]] = []
+        self._oldest_pending: Optional[float] = None
+        self._flush_lock = asyncio.Lock()
+
+    async def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        async with self._schema_lock:
+            if not self._schema_ready:
+                async with self.engine.begin() as connection:
+                    await connection.run_sync(self._create_schema)
+                self._schema_ready = True
+
+    @staticmethod
+    def _create_schema(connection) -> None:
+        create_schema(connection, [ConversationRecord.__table__, ConversationMessage.__table__])
+        # Tables created before conversations had a version column
+        columns = {column["name"] for column in inspect(connection).get_columns("conversations")}
+        if "version" not in columns:
+            connection.execute(text(
+                "ALTER TABLE conversations ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+    # Read-through cache
+
+    def _cache_put(self, state: Dict[str, Any], version: int, written: Dict[str, Any]) -> None:
+        conversation_id = state["conversation_id"]
+        self._cache[conversation_id] = state
+        self._cache.move_to_end(conversation_id)
+        self._versions[conversation_id] = version
+        self._written[conversation_id] = written
+        self._cache_expiry.touch(conversation_id, state["updated_at"])
+        while len(self._cache) > self.cache_size:
+            evicted_id, evicted = self._cache.popitem(last=False)
+            self._cache_expiry.discard(evicted_id)
+            if evicted_id in self._dirty:
+                # Keep its pending metadata write reachable until the next flush
+                self._evicted[evicted_id] = evicted
+            else:
+                self._forget(evicted_id)
+
+    def _forget(self, conversation_id: str) -> None:
+        self._versions.pop(conversation_id, None)
+        self._written.pop(conversation_id, None)
+        self._reload.discard(conversation_id)
+
+    def _live(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """The state we hold for a conversation, if any (taking back one pushed out with unwritten changes)"""
+        state = self._cache.get(conversation_id)
+        if state is None and conversation_id in self._evicted:
+            state = self._evicted.pop(conversation_id)
+            self._cache_put(state, self._versions[conversation_id], self._written[conversation_id])
+        return state
+
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        await self._ensure_schema()
+        state = self._live(conversation_id)
+        if state is not None and conversation_id not in self._reload:
+            async with self._session_factory() as session:
+                version = await session.scalar(select(ConversationRecord.version).where(
+                    ConversationRecord.conversation_id == conversation_id))
+            # No row yet is fine for a conversation created here and not flushed
+            if (version or 0) == self._versions.get(conversation_id) and self._cache.get(conversation_id) is state:
+                self._cache.move_to_end(conversation_id)
+                return state
+
+        if state is not None and self._cache.get(conversation_id) is state:
+            return await self._refresh(state)
+
+        # Pending writes must land before we read the conversation back
+        await self.flush()
+        loaded = await self._load(conversation_id)
+        if loaded is None:
+            return None
+        # Another request may have loaded it while we waited; everyone must
+        # share one live object
+        cached = self._live(conversation_id)
+        if cached is not None:
+            return cached
+        self._cache_put(*loaded)
+        return loaded[0]
+
+    async def _refresh(self, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Re-read a cached conversation another worker has written since"""
+        conversation_id = state["conversation_id"]
+        # Holding the flush lock: no write of this conversation is in flight
+        # while we read it back
+        async with self._flush_lock:
+            await self._flush()
+            loaded = await self._load(conversation_id)
+            if loaded is None:
+                self._drop(conversation_id)  # Deleted by another worker
+                return None
+            cached = self._live(conversation_id)
+            if cached is None:
+                self._cache_put(*loaded)  # Pushed out of the cache while we were reading
+                return loaded[0]
+            if cached is not state or conversation_id in self._dirty:
+                # Replaced or changed again while we were reading: the next
+                # flush merges it
+                self._reload.add(conversation_id)
+                return cached
+
+            # In place, so requests already holding the state see the update
+            fresh, version, written = loaded
+            state.clear()
+            state.update(fresh)
+            self._reload.discard(conversation_id)
+            self._cache_put(state, version, written)
+            return state
+
+    async def _load(self, conversation_id: str) -> Optional[Tuple[Dict[str, Any], int, Dict[str, Any]]]:
+        async with self._session_factory() as session:
+            record = await session.get(ConversationRecord, conversation_id)
+            if record is None:
+                return None
+            query = select(ConversationMessage).where(
+                ConversationMessage.conversation_id == conversation_id
+            ).order_by(ConversationMessage.id.desc())
+            if self.hot_messages:
+                query = query.limit(self.hot_messages)
+            rows = (await session.execute(query)).scalars().all()
+        return self._to_state(record, reversed(rows)), record.version, _normalize(record.data)
+
+    @staticmethod
+    def _to_message(row) -> Dict[str, Any]:
+        return {
+            "role": row.role,
+            "content": row.content,
+            "timestamp": row.timestamp.isoformat(),
+            "agent": row.agent
+        }
+
+    @classmethod
+    def _to_state(cls, record, rows) -> Dict[str, Any]:
+        state = _normalize(record.data)
+        state.update(
+            conversation_id=record.conversation_id,
+            user_id=record.user_id,
+            messages=[cls._to_message(row) for row in rows],
+            created_at=record.created_at,
+            updated_at=record.updated_at
+        )
+        return state
+
+    # Buffered writes
+
+    async def create(self, state: Dict[str, Any]) -> None:
+        self._cache_put(state, 0, {})
+        await self.save(state)
+
+    async def append_message(self, conversation_id: str, message: Dict[str, Any]) -> None:
+        self._pending_messages.append({
+            "conversation_id": conversation_id,
+            "role": message["role"],
+            "content": message["content"],
+            "agent": message.get("agent"),
+            "timestamp": datetime.fromisoformat(message["timestamp"])
+        })
+        # No flush here: the manager's save() follows, so the message and the
+        # metadata change are buffered together before anything is awaited
+
+    async def archive_messages(self, conversation_id: str, messages: List[Dict[str, Any]]) -> None:
+        pass  # Already written (or queued) by append_message
+
+    async def load_history(self, conversation_id: str) -> List[Dict[str, Any]]:
+        await self._ensure_schema()
+        await self.flush()
+        async with self._session_factory() as session:
+            rows = (await session.execute(select(ConversationMessage).where(
+                ConversationMessage.conversation_id == conversation_id
+            ).order_by(ConversationMessage.id))).scalars().all()
+        return [self._to_message(row) for row in rows]
+
+    async def save(self, state: Dict[str, Any]) -> None:
+        self._dirty.add(state["conversation_id"])
+        if state["conversation_id"] in self._cache:
+            self._cache_expiry.touch(state["conversation_id"], state["updated_at"])
+        await self._note_pending()
+
+    async def _note_pending(self) -> None:
+        now = time.monotonic()
+        if self._oldest_pending is None:
+            self._oldest_pending = now
+        if (len(self._pending_messages) + len(self._dirty) >= self.batch_size
+                or now - self._oldest_pending >= self.flush_interval):
+            await self.flush()
+
+    @staticmethod
+    def _record_values(state: Dict[str, Any]) -> Dict[str, Any]:
+        data = {
+            key: value for key, value in state.items()
+            if key not in ("conversation_id", "user_id", "messages", "created_at", "updated_at")
+        }
+        return {
+            "conversation_id": state["conversation_id"],
+            "user_id": state["user_id"],
+            "data": _normalize(data),
+            "created_at": state["created_at"],
+            "updated_at": state["updated_at"]
+        }
+
+    async def _write_record(self, session, values: Dict[str, Any], version: int,
+                            base: Dict[str, Any]) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Write one conversation's metadata over row ``version`` (whose data was ``base``)
+
+        Returns (new version, data written), or None if the conversation is gone.
+        """
+        conversation_id = values["conversation_id"]
+        if version == 0:
+            await session.execute(insert(ConversationRecord).values(version=1, **values))
+            return 1, values["data"]
+
+        ours = values["data"]
+        data = ours
+        changes = {key: value for key, value in values.items() if key != "conversation_id"}
+        while True:
+            result = await session.execute(update(ConversationRecord).where(
+                ConversationRecord.conversation_id == conversation_id,
+                ConversationRecord.version == version
+            ).values(dict(changes, data=data, version=version + 1)))
+            if result.rowcount:
+                return version + 1, data
+
+            # Another worker wrote it since we read it: keep their changes to
+            # the fields we didn't touch
+            row = (await session.execute(select(ConversationRecord.data, ConversationRecord.version).where(
+                ConversationRecord.conversation_id == conversation_id))).first()
+            if row is None:
+                return None  # Deleted by another worker
+            theirs, version = row
+            data = _merge(base, ours, theirs)
+            self._reload.add(conversation_id)
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._dirty and not self._pending_messages:
+            self._oldest_pending = None
+            return
+        await self._ensure_schema()
+
+        # Take the buffers before the first await: changes made while
+        # this flush runs go into the next one
+        states = {conv_id: self._cache.get(conv_id) or self._evicted.get(conv_id) for conv_id in self._dirty}
+        writes = [(self._record_values(state), self._versions.get(conv_id, 0), self._written.get(conv_id, {}))
+                  for conv_id, state in states.items() if state is not None]
+        messages, evicted = self._pending_messages, self._evicted
+        self._dirty, self._pending_messages, self._evicted = set(), [], {}
+        self._oldest_pending = None
+
+        written: Dict[str, Optional[Tuple[int, Dict[str, Any]]]] = {}
+        try:
+            async with self._session_factory.begin() as session:
+                # Parent rows first so message foreign keys resolve
+                for values, version, base in writes:
+                    written[values["conversation_id"]] = await self._write_record(session, values, version, base)
+                if messages:
+                    existing = set((await session.execute(select(ConversationRecord.conversation_id).where(
+                        ConversationRecord.conversation_id.in_({msg["conversation_id"] for msg in messages})
+                    ))).scalars())
+                    messages = [msg for msg in messages if msg["conversation_id"] in existing]
+                if messages:
+                    await session.execute(insert(ConversationMessage), messages)
+        except BaseException:
+            # Nothing was written: put it all back for the next attempt
+            self._dirty.update(values["conversation_id"] for values, _, _ in writes)
+            self._pending_messages[:0] = messages
+            self._evicted = {**evicted, **self._evicted}
+            self._oldest_pending = time.monotonic()
+            raise
+
+        for values, _, _ in writes:
+            conv_id = values["conversation_id"]
+            result = written[conv_id]
+            if result is None:
+                self._drop(conv_id)
+                continue
+            tracked = self._cache.get(conv_id) or self._evicted.get(conv_id)
+            if tracked is not None and tracked is not states[conv_id]:
+                continue  # Read again while we were writing: that copy keeps its own version
+            self._versions[conv_id], merged = result
+            if merged is not values["data"]:
+                self._absorb(states[conv_id], values["data"], merged)
+            self._written[conv_id] = merged
+            if conv_id not in self._cache and conv_id not in self._dirty:
+                self._evicted.pop(conv_id, None)
+                self._forget(conv_id)
+
+    @staticmethod
+    def _absorb(state: Dict[str, Any], wrote: Dict[str, Any], merged: Dict[str, Any]) -> None:
+        """Bring another worker's changes into our live state (keeping any we made during the flush)"""
+        for key, value in merged.items():
+            if value != wrote.get(key):
+                ours = _normalize({key: state.get(key)})[key]
+                # A copy: the live state must not share objects with the data written
+                state[key] = copy.deepcopy(_merge(wrote.get(key), ours, value))
+
+    # Deletion and queries
+
+    def _drop(self, conversation_id: str) -> None:
+        self._cache.pop(conversation_id, None)
+        self._cache_expiry.discard(conversation_id)
+        self._evicted.pop(conversation_id, None)
+        self._dirty.discard(conversation_id)
+        self._forget(conversation_id)
+        self._pending_messages = [
+            msg for msg in self._pending_messages if msg["conversation_id"] != conversation_id
+        ]
+
+    async def delete(self, conversation_id: str) -> bool:
+        await self._ensure_schema()
+        self._drop(conversation_id)
+        async with self._session_factory.begin() as session:
+            await session.execute(delete(ConversationMessage).where(
+                ConversationMessage.conversation_id == conversation_id))
+            result = await session.execute(delete(ConversationRecord).where(
+                ConversationRecord.conversation_id == conversation_id))
+        return result.rowcount > 0
+
+    async def list_user_conversations(self, user_id: Optional[int], offset: int = 0,
+                                      limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        await self._ensure_schema()
+        await self.flush()
+        # Served by the (user_id, created_at) index: cost follows this user's
+        # conversation count, not the table size. Only the listed fields are
+        # read out of the JSON, so no state is loaded or cached.
+        data = ConversationRecord.data
+        query = select(
+            ConversationRecord.conversation_id,
+            data["chosen_agent"].as_string().label("chosen_agent"),
+            data["workflow_step"].as_string().label("workflow_step"),
+            data["edna_profile"].as_string().isnot(None).label("has_edna_profile"),
+            data[("routing_stats", "message_count")].as_integer().label("message_count"),
+            ConversationRecord.created_at,
+            ConversationRecord.updated_at,
+        ).where(
+            ConversationRecord.user_id == user_id
+        ).order_by(ConversationRecord.created_at.desc()).offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        async with self._session_factory() as session:
+            rows = (await session.execute(query)).mappings().all()
+        return [dict(row, has_edna_profile=bool(row["has_edna_profile"])) for row in rows]
+
+    async def count_user_conversations(self, user_id: Optional[int]) -> int:
+        await self._ensure_schema()
+        await self.flush()
+        async with self._session_factory() as session:
+            return await session.scalar(
+                select(func.count(ConversationRecord.conversation_id)).where(
+                    ConversationRecord.user_id == user_id))
+
+    async def evict_expired(self, cutoff: datetime) -> Tuple[int, int]:
+        await self._ensure_schema()
+        await self.flush()
+        # Indexed range delete on updated_at; also catches conversations that
+        # other workers (or earlier runs) wrote and never touched again
+        async with self._session_factory.begin() as session:
+            expired = select(ConversationRecord.conversation_id).where(
+                ConversationRecord.updated_at < cutoff)
+            await session.execute(delete(ConversationMessage).where(
+                ConversationMessage.conversation_id.in_(expired)))
+            result = await session.execute(delete(ConversationRecord).where(
+                ConversationRecord.updated_at < cutoff))
+
+        reclaimed = 0
+        for conv_id in self._cache_expiry.pop_expired(cutoff):
+            state = self._cache.pop(conv_id, None)
+            if state is not None:
+                reclaimed += estimate_state_size(state)
+            if conv_id not in self._dirty:
+                self._forget(conv_id)
+        return result.rowcount, reclaimed
+
+    async def count(self) -> int:
+        await self._ensure_schema()
+        await self.flush()
+        async with self._session_factory() as session:
+            return await session.scalar(select(func.count(ConversationRecord.conversation_id)))
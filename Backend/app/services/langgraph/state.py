@@ -1,7 +1,13 @@
 from typing import Dict, List, Optional, Any, TypedDict
-from datetime import datetime
+from datetime import datetime, timedelta
+import asyncio
 import uuid
 
+from app.core.config import settings
+from ..routing import keyword_router
+from .storage import ConversationStore, create_conversation_store
+from .summarizer import new_summary_state, summarizer
+
 
 class ConversationState(TypedDict):
     """State structure for LangGraph conversations - Following Task 3 Logic"""
@@ -13,12 +19,50 @@ class ConversationState(TypedDict):
     chosen_agent: str  # User's explicit choice: "architect" or "alchemist"
     current_agent: str  # Currently active agent
     workflow_step: str
-    collaboration_mode: bool  # Always False in Task 3 logic
+    collaboration_mode: bool  # True while both agents answer together (collaborate endpoint)
     conversation_summary: Optional[str]
+    summary_state: Dict[str, Any]  # Rolling-summary state behind conversation_summary
+    routing_stats: Dict[str, int]  # Running counters kept up to date by add_message
     created_at: datetime
     updated_at: datetime
 
 
+class TurnState(TypedDict):
+    """What the LangGraph workflow carries for one turn
+
+    Only this turn's inputs and results - never the conversation's message
+    list - so running the graph costs the same however long the conversation
+    is. Nodes return just the keys they change; the reply is recorded with
+    state_manager once, by finalize.
+    """
+    conversation_id: str
+    user_message: str  # The message being answered
+    chosen_agent: str
+    current_agent: str
+    collaboration_mode: bool
+    needs_pdf_upload: bool
+    edna_profile: Optional[Dict[str, Any]]
+    history: List[Dict[str, str]]  # Earlier turns for Claude, picked by build_context
+    conversation_summary: Optional[str]
+    workflow_step: str
+    stream: bool  # Agents pass their answer to the graph's stream writer piece by piece
+    response: Optional[str]  # The reply to record
+    agent: Optional[str]  # Who it's from ("both" in collaboration mode)
+    architect_input: Optional[str]  # Each agent's answer in collaboration mode
+    alchemist_input: Optional[str]
+
+
+def new_routing_stats() -> Dict[str, int]:
+    """Empty per-conversation routing counters"""
+    return {
+        "message_count": 0,
+        "user_messages": 0,
+        "architect_questions": 0,  # User messages with at least one architect keyword
+        "alchemist_questions": 0,  # User messages with at least one alchemist keyword
+        "collaboration_requests": 0  # User messages with at least one collaboration trigger
+    }
+
+
 class AgentResponse(TypedDict):
     """Response from an individual agent"""
     content: str
@@ -36,16 +80,34 @@ class WorkflowDecision(TypedDict):
 
 
 class ConversationStateManager:
-    """Manages conversation state - Following Task 3 Logic"""
+    """Manages conversation state - Following Task 3 Logic
+
+    Conversations live in a pluggable ConversationStore (in-memory by default,
+    SQL when settings.CONVERSATION_STORE == "sql"). Every mutation goes through
+    this class so the store can persist it. The methods are coroutines because
+    the store may have to wait on its database.
 
-    def __init__(self):
-        self.conversations: Dict[str, ConversationState] = {}
+    Only the latest ``hot_messages`` messages stay in the live state; older
+    ones are handed to the store's archive (see get_message_history).
+    """
 
-    def create_conversation(self, user_id: Optional[int] = None) -> str:
+    def __init__(self, store: Optional[ConversationStore] = None, hot_messages: Optional[int] = None):
+        self.store = store or create_conversation_store()
+        self.hot_messages = settings.CONVERSATION_HOT_MESSAGES if hot_messages is None else hot_messages
+        self.eviction_stats: Dict[str, Any] = {
+            "sweeps": 0,
+            "evicted_total": 0,
+            "bytes_reclaimed_total": 0,
+            "last_sweep_at": None,
+            "last_evicted": 0,
+            "last_bytes_reclaimed": 0
+        }
+
+    async def create_conversation(self, user_id: Optional[int] = None) -> str:
         """Create a new conversation"""
         conversation_id = str(uuid.uuid4())
 
-        self.conversations[conversation_id] = ConversationState(
+        await self.store.create(ConversationState(
             conversation_id=conversation_id,
             user_id=user_id,
             messages=[],
@@ -56,94 +118,211 @@ class ConversationStateManager:
             workflow_step="initial",
             collaboration_mode=False,  # Following Task 3 - no forced collaboration
             conversation_summary=None,
+            summary_state=new_summary_state(),
+            routing_stats=new_routing_stats(),
             created_at=datetime.now(),
             updated_at=datetime.now()
-        )
+        ))
 
         return conversation_id
 
-    def get_conversation(self, conversation_id: str) -> Optional[ConversationState]:
+    async def get_conversation(self, conversation_id: str) -> Optional[ConversationState]:
         """Get conversation by ID"""
-        return self.conversations.get(conversation_id)
+        return await self.store.get(conversation_id)
 
-    def update_conversation_edna(self, conversation_id: str, edna_profile: Dict[str, Any]) -> bool:
+    async def update_conversation_edna(self, conversation_id: str, edna_profile: Dict[str, Any]) -> bool:
         """Update conversation with E-DNA profile"""
-        if conversation_id in self.conversations:
-            self.conversations[conversation_id]["edna_profile"] = edna_profile
-            self.conversations[conversation_id]["needs_pdf_upload"] = False
-            self.conversations[conversation_id]["updated_at"] = datetime.now()
+        conversation = await self.store.get(conversation_id)
+        if conversation:
+            conversation["edna_profile"] = edna_profile
+            conversation["needs_pdf_upload"] = False
+            conversation["updated_at"] = datetime.now()
+            await self.store.save(conversation)
             return True
         return False
 
-    def add_message(self, conversation_id: str, role: str, content: str, agent: Optional[str] = None) -> bool:
+    async def add_message(self, conversation_id: str, role: str, content: str, agent: Optional[str] = None) -> bool:
         """Add message to conversation"""
-        if conversation_id in self.conversations:
-            message = {
-                "role": role,
-                "content": content,
-                "timestamp": datetime.now().isoformat(),
-                "agent": agent
-            }
-
-            self.conversations[conversation_id]["messages"].append(message)
-            self.conversations[conversation_id]["updated_at"] = datetime.now()
+        conversation = await self.store.get(conversation_id)
+        if conversation:
+            await self._append_message(conversation, role, content, agent)
             return True
         return False
 
-    def set_chosen_agent(self, conversation_id: str, chosen_agent: str) -> bool:
+    async def start_turn(self, conversation_id: str, user_message: str, chosen_agent: Optional[str] = None,
+                   collaboration_mode: bool = False) -> Optional[ConversationState]:
+        """Record the user's message and who should answer it, with a single lookup
+
+        chosen_agent None keeps the previous choice. Returns the conversation,
+        or None if there's no such conversation.
+        """
+        conversation = await self.store.get(conversation_id)
+        if not conversation:
+            return None
+        if chosen_agent in ["architect", "alchemist"]:
+            conversation["chosen_agent"] = chosen_agent
+            conversation["current_agent"] = chosen_agent
+        conversation["collaboration_mode"] = collaboration_mode
+        await self._append_message(conversation, "user", user_message)
+        return conversation
+
+    async def _append_message(self, conversation: ConversationState, role: str, content: str,
+                        agent: Optional[str] = None) -> None:
+        message = {
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat(),
+            "agent": agent
+        }
+
+        conversation["messages"].append(message)
+        conversation["updated_at"] = datetime.now()
+        self._update_routing_stats(conversation, role, content)
+        await self.store.append_message(conversation["conversation_id"], message)
+        await self._archive_overflow(conversation)
+        await self.store.save(conversation)
+
+    async def _archive_overflow(self, conversation: ConversationState) -> None:
+        """Move messages beyond the hot window out of the live state
+
+        Trimmed in place: callers may hold the same list object.
+        """
+        messages = conversation["messages"]
+        overflow = len(messages) - self.hot_messages
+        if self.hot_messages and overflow > 0:
+            archived = messages[:overflow]
+            del messages[:overflow]
+            await self.store.archive_messages(conversation["conversation_id"], archived)
+
+    async def get_message_history(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Full message history, including messages archived out of the live state"""
+        return await self.store.load_history(conversation_id)
+
+    def _update_routing_stats(self, conversation: ConversationState, role: str, content: str) -> None:
+        """Fold one new message into the conversation's routing counters"""
+        stats = conversation["routing_stats"]
+        stats["message_count"] += 1
+        if role != "user":
+            return
+
+        scores = keyword_router.scan(content)
+        stats["user_messages"] += 1
+        if scores["architect"]:
+            stats["architect_questions"] += 1
+        if scores["alchemist"]:
+            stats["alchemist_questions"] += 1
+        if scores["collaboration"]:
+            stats["collaboration_requests"] += 1
+
+    async def set_chosen_agent(self, conversation_id: str, chosen_agent: str) -> bool:
         """Set the user's chosen agent - Following Task 3 Logic"""
-        if conversation_id in self.conversations and chosen_agent in ["architect", "alchemist"]:
-            self.conversations[conversation_id]["chosen_agent"] = chosen_agent
-            self.conversations[conversation_id]["current_agent"] = chosen_agent
-            self.conversations[conversation_id]["updated_at"] = datetime.now()
+        conversation = await self.store.get(conversation_id)
+        if conversation and chosen_agent in ["architect", "alchemist"]:
+            conversation["chosen_agent"] = chosen_agent
+            conversation["current_agent"] = chosen_agent
+            conversation["updated_at"] = datetime.now()
+            await self.store.save(conversation)
             return True
         return False
 
-    def get_conversation_summary(self, conversation_id: str) -> Optional[str]:
-        """Get conversation summary"""
-        conversation = self.get_conversation(conversation_id)
+    async def get_conversation_summary(self, conversation_id: str) -> Optional[str]:
+        """Get conversation summary
+
+        Folds only the messages added since the last call into the stored
+        rolling summary, so the cost doesn't grow with the conversation.
+        """
+        conversation = await self.get_conversation(conversation_id)
         if not conversation:
             return None
 
-        # Simple summary generation
-        messages = conversation["messages"]
-        if len(messages) < 3:
-            return None
+        summary_state = conversation.setdefault("summary_state", new_summary_state())
+        message_count = conversation["routing_stats"]["message_count"]
+        new_count = message_count - summary_state["folded_count"]
+        if new_count <= 0:
+            return conversation["conversation_summary"]
+
+        # Anything already archived out of the hot window is skipped
+        summarizer.fold(summary_state, conversation["messages"][-new_count:])
+        summary_state["folded_count"] = message_count
+        conversation["conversation_summary"] = summarizer.render(summary_state) if message_count >= 3 else None
+        await self.store.save(conversation)
+        return conversation["conversation_summary"]
 
-        user_messages = [msg["content"]
-                         for msg in messages if msg["role"] == "user"]
-        if user_messages:
-            return f"User has asked about: {', '.join(user_messages[:3])}"
+    async def set_summary_abstract(self, conversation_id: str, abstract: str, covered: int) -> bool:
+        """Store a model-written abstract in place of the summary points it covers
 
-        return None
+        ``covered`` is summarizer.checkpoint() of the notes that were
+        condensed: points other turns folded in meanwhile are kept.
+        """
+        conversation = await self.get_conversation(conversation_id)
+        if not conversation or not summarizer.absorb_abstract(conversation["summary_state"], abstract, covered):
+            return False
+        conversation["conversation_summary"] = summarizer.render(conversation["summary_state"])
+        await self.store.save(conversation)
+        return True
 
-    def delete_conversation(self, conversation_id: str) -> bool:
+    async def delete_conversation(self, conversation_id: str) -> bool:
         """Delete conversation"""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
-            return True
-        return False
+        return await self.store.delete(conversation_id)
+
+    async def get_user_conversations(self, user_id: Optional[int], offset: int = 0,
+                                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get a user's conversations, newest first (one page if limit is given)
+
+        Returns list entries (id, agent, step, message count, timestamps),
+        not full states.
+        """
+        return await self.store.list_user_conversations(user_id, offset, limit)
+
+    async def count_user_conversations(self, user_id: Optional[int]) -> int:
+        """Number of conversations a user has"""
+        return await self.store.count_user_conversations(user_id)
+
+    async def cleanup_old_conversations(self, hours: float = 24) -> int:
+        """Clean up conversations older than specified hours
+
+        The stores keep conversations ordered by updated_at, so a sweep only
+        touches the expired ones instead of scanning everything.
+        """
+        cutoff_time = datetime.now() - timedelta(hours=hours)
+        evicted, reclaimed = await self.store.evict_expired(cutoff_time)
 
-    def get_user_conversations(self, user_id: int) -> List[ConversationState]:
-        """Get all conversations for a user"""
-        return [
-            conv for conv in self.conversations.values()
-            if conv["user_id"] == user_id
-        ]
+        self.eviction_stats["sweeps"] += 1
+        self.eviction_stats["evicted_total"] += evicted
+        self.eviction_stats["bytes_reclaimed_total"] += reclaimed
+        self.eviction_stats["last_sweep_at"] = datetime.now().isoformat()
+        self.eviction_stats["last_evicted"] = evicted
+        self.eviction_stats["last_bytes_reclaimed"] = reclaimed
+        return evicted
 
-    def cleanup_old_conversations(self, hours: int = 24) -> int:
-        """Clean up conversations older than specified hours"""
-        cutoff_time = datetime.now().timestamp() - (hours * 3600)
-        to_delete = []
+    async def count_conversations(self) -> int:
+        """Number of stored conversations"""
+        return await self.store.count()
 
-        for conv_id, conv in self.conversations.items():
-            if conv["updated_at"].timestamp() < cutoff_time:
-                to_delete.append(conv_id)
+    async def flush(self) -> None:
+        """Write any buffered changes to the store"""
+        await self.store.flush()
 
-        for conv_id in to_delete:
-            del self.conversations[conv_id]
+    async def run_eviction_loop(self, ttl_hours: float, interval_seconds: float) -> None:
+        """Periodically evict expired conversations (started with the app lifespan)"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                evicted = await self.cleanup_old_conversations(ttl_hours)
+                if evicted:
+                    print(
+                        f"🧹 Evicted {evicted} expired conversations, reclaimed ~{self.eviction_stats['last_bytes_reclaimed']} bytes")
+            except Exception as e:
+                print(f"❌ Error evicting expired conversations: {e}")
 
-        return len(to_delete)
+    async def run_flush_loop(self, interval_seconds: float) -> None:
+        """Periodically flush buffered writes (started with the app lifespan)"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.store.flush()
+            except Exception as e:
+                print(f"❌ Error flushing conversation store: {e}")
 
 
 # Global state manager instance
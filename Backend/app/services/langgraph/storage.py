@@ -0,0 +1,249 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+import os
+import sys
+
+from app.core.config import settings
+
+
+def estimate_state_size(state: Dict[str, Any]) -> int:
+    """Rough number of bytes a live conversation state holds"""
+    size = sys.getsizeof(state) + sys.getsizeof(state["messages"])
+    for message in state["messages"]:
+        size += sys.getsizeof(message) + sum(sys.getsizeof(value) for value in message.values())
+    for key in ("edna_profile", "conversation_summary", "routing_stats", "summary_state"):
+        size += sys.getsizeof(state.get(key))
+    return size
+
+
+def list_entry(state: Dict[str, Any]) -> Dict[str, Any]:
+    """The few fields a conversation list shows, taken from a full state"""
+    return {
+        "conversation_id": state["conversation_id"],
+        "chosen_agent": state["chosen_agent"],
+        "workflow_step": state["workflow_step"],
+        "has_edna_profile": state["edna_profile"] is not None,
+        "message_count": state["routing_stats"]["message_count"],
+        "created_at": state["created_at"],
+        "updated_at": state["updated_at"],
+    }
+
+
+class ExpiryIndex:
+    """Conversation ids ordered by ``updated_at``, oldest first
+
+    ``updated_at`` only ever moves forward, so re-touching an id moves it to
+    the end and the order stays sorted. Popping expired ids therefore only
+    looks at entries that really are expired (plus one to stop on).
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, datetime]" = OrderedDict()
+
+    def touch(self, conversation_id: str, updated_at: datetime) -> None:
+        self._entries[conversation_id] = updated_at
+        self._entries.move_to_end(conversation_id)
+
+    def discard(self, conversation_id: str) -> None:
+        self._entries.pop(conversation_id, None)
+
+    def pop_expired(self, cutoff: datetime) -> List[str]:
+        expired = []
+        while self._entries:
+            conversation_id, updated_at = next(iter(self._entries.items()))
+            if updated_at >= cutoff:
+                break
+            self._entries.popitem(last=False)
+            expired.append(conversation_id)
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ConversationStore(ABC):
+    """Storage backend behind ConversationStateManager
+
+    The manager mutates the ConversationState returned by ``get`` in place and
+    then reports what changed through ``append_message`` / ``save`` so that
+    persistent backends can write it out. Every method is a coroutine so a
+    backend can wait on its database without blocking the event loop.
+    """
+
+    @abstractmethod
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Return the live state for a conversation, or None"""
+
+    @abstractmethod
+    async def create(self, state: Dict[str, Any]) -> None:
+        """Register a newly created conversation"""
+
+    @abstractmethod
+    async def append_message(self, conversation_id: str, message: Dict[str, Any]) -> None:
+        """Record a message already appended to the live state"""
+
+    @abstractmethod
+    async def save(self, state: Dict[str, Any]) -> None:
+        """Record changes to a conversation's non-message fields"""
+
+    @abstractmethod
+    async def archive_messages(self, conversation_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Keep messages the manager just trimmed out of the live state"""
+
+    @abstractmethod
+    async def load_history(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Every message of a conversation, archived ones included, oldest first"""
+
+    @abstractmethod
+    async def delete(self, conversation_id: str) -> bool:
+        """Remove a conversation and its messages"""
+
+    @abstractmethod
+    async def list_user_conversations(self, user_id: Optional[int], offset: int = 0,
+                                      limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """A user's conversations, newest first, optionally one page of them
+
+        Each entry carries only the fields ``list_entry`` builds, not the
+        full state.
+        """
+
+    @abstractmethod
+    async def count_user_conversations(self, user_id: Optional[int]) -> int:
+        """Number of conversations belonging to a user"""
+
+    @abstractmethod
+    async def evict_expired(self, cutoff: datetime) -> Tuple[int, int]:
+        """Remove conversations not updated since ``cutoff``
+
+        Returns (conversations evicted, approximate bytes of memory reclaimed).
+        """
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of stored conversations"""
+
+    async def flush(self) -> None:
+        """Write out any buffered changes"""
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store: the live state objects are the storage
+
+    Messages trimmed out of the live state are appended to one JSONL file
+    per conversation under ``archive_dir``.
+    """
+
+    def __init__(self, archive_dir: Optional[str] = None):
+        self.archive_dir = archive_dir or settings.CONVERSATION_ARCHIVE_DIR
+        self.conversations: Dict[str, Dict[str, Any]] = {}
+        self._expiry = ExpiryIndex()
+        # user_id -> that user's conversation ids in creation order (dict as an
+        # ordered set), so listing a user never scans everyone's conversations
+        self._user_index: Dict[Optional[int], Dict[str, None]] = {}
+
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return self.conversations.get(conversation_id)
+
+    async def create(self, state: Dict[str, Any]) -> None:
+        self.conversations[state["conversation_id"]] = state
+        self._expiry.touch(state["conversation_id"], state["updated_at"])
+        self._user_index.setdefault(state["user_id"], {})[state["conversation_id"]] = None
+
+    async def append_message(self, conversation_id: str, message: Dict[str, Any]) -> None:
+        pass  # Already appended to the live state
+
+    async def save(self, state: Dict[str, Any]) -> None:
+        # Already mutated in place; just keep the expiry order current
+        self._expiry.touch(state["conversation_id"], state["updated_at"])
+
+    def _archive_path(self, conversation_id: str) -> str:
+        return os.path.join(self.archive_dir, f"{conversation_id}.jsonl")
+
+    async def archive_messages(self, conversation_id: str, messages: List[Dict[str, Any]]) -> None:
+        # File I/O runs on a thread so the event loop keeps serving other chats
+        await asyncio.to_thread(self._write_archive, conversation_id, messages)
+
+    def _write_archive(self, conversation_id: str, messages: List[Dict[str, Any]]) -> None:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with open(self._archive_path(conversation_id), "a", encoding="utf-8") as archive:
+            archive.writelines(json.dumps(message) + "\n" for message in messages)
+
+    async def load_history(self, conversation_id: str) -> List[Dict[str, Any]]:
+        state = self.conversations.get(conversation_id)
+        if state is None:
+            return []
+        return await asyncio.to_thread(self._read_archive, conversation_id) + state["messages"]
+
+    def _read_archive(self, conversation_id: str) -> List[Dict[str, Any]]:
+        try:
+            with open(self._archive_path(conversation_id), encoding="utf-8") as archive:
+                return [json.loads(line) for line in archive]
+        except FileNotFoundError:
+            return []
+
+    def _drop_archive(self, conversation_id: str) -> None:
+        try:
+            os.remove(self._archive_path(conversation_id))
+        except FileNotFoundError:
+            pass
+
+    async def delete(self, conversation_id: str) -> bool:
+        self._expiry.discard(conversation_id)
+        state = self.conversations.pop(conversation_id, None)
+        if state is None:
+            return False
+        self._unindex_user(state)
+        self._drop_archive(conversation_id)
+        return True
+
+    def _unindex_user(self, state: Dict[str, Any]) -> None:
+        user_ids = self._user_index.get(state["user_id"])
+        if user_ids is not None:
+            user_ids.pop(state["conversation_id"], None)
+            if not user_ids:
+                del self._user_index[state["user_id"]]
+
+    async def list_user_conversations(self, user_id: Optional[int], offset: int = 0,
+                                      limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        newest_first = reversed(self._user_index.get(user_id, {}))
+        stop = offset + limit if limit is not None else None
+        return [list_entry(self.conversations[conv_id])
+                for conv_id in islice(newest_first, offset, stop)]
+
+    async def count_user_conversations(self, user_id: Optional[int]) -> int:
+        return len(self._user_index.get(user_id, ()))
+
+    async def evict_expired(self, cutoff: datetime) -> Tuple[int, int]:
+        evicted, reclaimed = 0, 0
+        for conv_id in self._expiry.pop_expired(cutoff):
+            state = self.conversations.pop(conv_id, None)
+            if state is not None:
+                self._unindex_user(state)
+                self._drop_archive(conv_id)
+                evicted += 1
+                reclaimed += estimate_state_size(state)
+        return evicted, reclaimed
+
+    async def count(self) -> int:
+        return len(self.conversations)
+
+
+def create_conversation_store() -> ConversationStore:
+    """Build the backend selected by settings.CONVERSATION_STORE"""
+    if settings.CONVERSATION_STORE == "sql":
+        # Imported lazily so the in-memory default doesn't need SQLAlchemy
+        from .sql_storage import SQLConversationStore
+
+        return SQLConversationStore(
+            settings.CONVERSATION_STORE_URL,
+            cache_size=settings.CONVERSATION_CACHE_SIZE,
+            batch_size=settings.CONVERSATION_WRITE_BATCH_SIZE,
+            flush_interval=settings.CONVERSATION_FLUSH_INTERVAL_SECONDS,
+            hot_messages=settings.CONVERSATION_HOT_MESSAGES
+        )
+    return InMemoryConversationStore()
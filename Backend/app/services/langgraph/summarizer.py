@@ -0,0 +1,115 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional
+import re
+
+from ..routing import keyword_router
+
+MAX_POINTS = 8  # Extractive points kept verbatim; older ones survive as topics
+MAX_POINT_CHARS = 160
+MAX_TOPICS = 6
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_MARKDOWN = re.compile(r"[*_#>`]+")
+
+
+def _points_total(summary_state: Dict[str, Any], held: int) -> int:
+    # States saved before points_total existed count the points they hold
+    return summary_state.get("points_total", held)
+
+
+def new_summary_state() -> Dict[str, Any]:
+    """Empty rolling-summary state for a new conversation"""
+    return {
+        "folded_count": 0,  # routing_stats.message_count already folded in (kept by the state manager)
+        "abstract": None,  # Model-written summary of everything before `points`
+        "points": [],  # Recent extractive points, oldest first
+        "points_total": 0,  # Points ever added (identifies what an abstract covers)
+        "condensed_total": 0,  # points_total the current abstract covers
+        "topics": {}  # Keyword -> user messages mentioning it
+    }
+
+
+def _key_sentence(text: str) -> Optional[str]:
+    """Pick the most informative sentence of a message
+
+    Questions win (they say what the user wants), then sentences containing
+    routing keywords, then the first sentence.
+    """
+    sentences = [s.strip() for s in _SENTENCE_END.split(_MARKDOWN.sub("", text).strip()) if s.strip()]
+    if not sentences:
+        return None
+    best = next((s for s in sentences if s.endswith("?")), None)
+    if best is None:
+        best = next((s for s in sentences if keyword_router.matched_keywords(s)), sentences[0])
+    best = " ".join(best.split())
+    if len(best) > MAX_POINT_CHARS:
+        best = best[:MAX_POINT_CHARS - 3].rstrip() + "..."
+    return best
+
+
+class ConversationSummarizer:
+    """Rolling conversation summary updated one turn at a time
+
+    ``fold`` only looks at messages added since the previous call, so each
+    turn costs O(new messages) regardless of conversation length. The state
+    lives in the conversation (``summary_state``) and is persisted with it.
+    """
+
+    def fold(self, summary_state: Dict[str, Any], new_messages: List[Dict[str, Any]]) -> None:
+        """Fold messages not yet seen into the summary state (in place)"""
+        topics = Counter(summary_state["topics"])
+        points = summary_state["points"]
+        before = len(points)
+
+        for message in new_messages:
+            sentence = _key_sentence(message["content"])
+            if message["role"] == "user":
+                topics.update(keyword_router.matched_keywords(message["content"]))
+                if sentence:
+                    points.append(f"User: {sentence}")
+            elif sentence:
+                agent = (message.get("agent") or "assistant").capitalize()
+                points.append(f"{agent}: {sentence}")
+
+        summary_state["points_total"] = _points_total(summary_state, before) + len(points) - before
+        del points[:-MAX_POINTS]
+        summary_state["topics"] = dict(topics)
+
+    def render(self, summary_state: Dict[str, Any]) -> Optional[str]:
+        """Summary text used as model context"""
+        lines = []
+        if summary_state["abstract"]:
+            lines.append(summary_state["abstract"])
+        if summary_state["topics"]:
+            top = Counter(summary_state["topics"]).most_common(MAX_TOPICS)
+            lines.append("Topics so far: " + ", ".join(word for word, _ in top))
+        lines.extend(f"- {point}" for point in summary_state["points"])
+        return "\n".join(lines) or None
+
+    def needs_condensing(self, summary_state: Dict[str, Any]) -> bool:
+        """True once the extractive points are full and the oldest would start dropping"""
+        return len(summary_state["points"]) >= MAX_POINTS
+
+    def checkpoint(self, summary_state: Dict[str, Any]) -> int:
+        """Marks what a render covers; hand it back to absorb_abstract"""
+        return _points_total(summary_state, len(summary_state["points"]))
+
+    def absorb_abstract(self, summary_state: Dict[str, Any], abstract: str, covered: int) -> bool:
+        """Replace the points an abstract covers with the abstract (in place)
+
+        ``covered`` is the checkpoint taken when the condensed notes were
+        rendered. Points folded in since (while the model was writing) are
+        kept; an abstract older than the one in place is dropped. Returns
+        whether it was used.
+        """
+        if covered <= summary_state.get("condensed_total", 0):
+            return False
+        newer = self.checkpoint(summary_state) - covered
+        summary_state["abstract"] = abstract.strip()
+        summary_state["points"] = summary_state["points"][-newer:] if newer > 0 else []
+        summary_state["condensed_total"] = covered
+        return True
+
+
+# Global summarizer instance
+summarizer = ConversationSummarizer()
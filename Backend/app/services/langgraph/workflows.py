@@ -1,5 +1,6 @@
 from typing import Dict, List, Optional, Any
 from .state import ConversationState, AgentResponse, WorkflowDecision, state_manager
+from ..routing import ARCHITECT_KEYWORDS, ALCHEMIST_KEYWORDS, COLLABORATION_KEYWORDS, keyword_router
 import re
 
 
@@ -7,34 +8,20 @@ class WorkflowEngine:
     """Manages workflow decisions and agent coordination"""
 
     def __init__(self):
-        # Keywords for determining agent specialization
-        self.architect_keywords = [
-            "scale", "scaling", "systematic", "strategy", "framework", "process",
-            "optimization", "efficiency", "metrics", "analytics", "operations",
-            "growth", "revenue", "profit", "business model", "systems", "structure",
-            "planning", "performance", "data", "roi", "kpi", "funnel", "conversion"
-        ]
-
-        self.alchemist_keywords = [
-            "brand", "branding", "personal brand", "authentic", "purpose",
-            "vision", "creativity", "transformation", "energy", "alignment",
-            "intuition", "spiritual", "mindset", "beliefs", "values", "mission",
-            "manifestation", "soul", "heart", "passion", "calling", "identity"
-        ]
+        # Keywords for determining agent specialization (shared with the AI
+        # service; all three lists are compiled once into keyword_router)
+        self.architect_keywords = ARCHITECT_KEYWORDS
+        self.alchemist_keywords = ALCHEMIST_KEYWORDS
 
         # Collaboration triggers
-        self.collaboration_keywords = [
-            "complete strategy", "full business plan", "end-to-end", "holistic approach",
-            "both perspective", "comprehensive", "everything", "all aspects"
-        ]
+        self.collaboration_keywords = COLLABORATION_KEYWORDS
 
     def analyze_user_message(self, message: str, current_agent: Optional[str] = None) -> WorkflowDecision:
         """Analyze user message to determine workflow decision"""
-        message_lower = message.lower()
+        scores = keyword_router.scan(message)
 
         # Check for collaboration needs
-        collaboration_score = sum(
-            1 for keyword in self.collaboration_keywords if keyword in message_lower)
+        collaboration_score = scores["collaboration"]
 
         if collaboration_score > 0:
             return WorkflowDecision(
@@ -45,10 +32,8 @@ class WorkflowEngine:
             )
 
         # Count keyword matches
-        architect_matches = sum(
-            1 for keyword in self.architect_keywords if keyword in message_lower)
-        alchemist_matches = sum(
-            1 for keyword in self.alchemist_keywords if keyword in message_lower)
+        architect_matches = scores["architect"]
+        alchemist_matches = scores["alchemist"]
 
         # Determine best agent
         if architect_matches > alchemist_matches:
@@ -76,33 +61,27 @@ class WorkflowEngine:
             reason=reason
         )
 
-    def should_collaborate(self, conversation_id: str) -> bool:
+    async def should_collaborate(self, conversation_id: str) -> bool:
         """Determine if agents should collaborate based on conversation history"""
-        state = state_manager.get_conversation(conversation_id)
+        state = await state_manager.get_conversation(conversation_id)
         if not state:
             return False
 
-        messages = state["messages"]
-        if len(messages) < 4:  # Need some conversation history
+        # Counters are maintained by state_manager.add_message, so this is O(1)
+        # however long the conversation is
+        stats = state["routing_stats"]
+        if stats["message_count"] < 4:  # Need some conversation history
             return False
 
-        # Check if user has asked both types of questions
-        architect_questions = 0
-        alchemist_questions = 0
-
-        for msg in messages:
-            if msg["role"] == "user":
-                content = msg["content"].lower()
-                if any(keyword in content for keyword in self.architect_keywords):
-                    architect_questions += 1
-                if any(keyword in content for keyword in self.alchemist_keywords):
-                    alchemist_questions += 1
-
         # Collaborate if user has asked both types of questions
-        return architect_questions > 0 and alchemist_questions > 0
+        return stats["architect_questions"] > 0 and stats["alchemist_questions"] > 0
 
     def get_collaboration_prompt(self, user_message: str, conversation_summary: str) -> Dict[str, str]:
-        """Generate prompts for agent collaboration"""
+        """Generate prompts for agent collaboration
+
+        Both agents answer at the same time, so neither prompt waits for the
+        other's answer; the orchestrator puts the two together afterwards.
+        """
 
         architect_prompt = f"""You are Hanif Khan, The Architect, collaborating with Fariza (The Alchemist) to provide comprehensive guidance.
 
@@ -124,12 +103,11 @@ Respond with your strategic analysis and framework, then mention how this connec
 COLLABORATION CONTEXT:
 - User Message: {user_message}
 - Conversation Summary: {conversation_summary}
-- Hanif's Strategic Input: [Will be provided]
 - Your Role: Provide the transformational, authentic alignment perspective
 
 COLLABORATION INSTRUCTIONS:
 1. Focus on your expertise: purpose, branding, transformation, authentic alignment
-2. Build upon Hanif's strategic framework
+2. Acknowledge that Hanif is answering alongside you with the strategic framework
 3. Show how authentic alignment enhances systematic approaches
 4. Provide the transformational perspective that complements his systematic approach
 
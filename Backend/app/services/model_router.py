@@ -0,0 +1,219 @@
+# ============================================================================
+# MODEL ROUTER - Decide which Claude model (and AWS region) answers each call
+# ============================================================================
+# CLAUDE_MODEL_ID used to be the only choice: one model, in one region. Now
+# several "endpoints" (a model in a region) can be listed, and for every call
+# the router puts them in order, best first, by:
+#
+#   * how fast each one has answered lately (p50 / p95 of its recent calls)
+#   * how often its recent calls failed (throttled / unavailable)
+#   * how busy it is right now (calls in flight vs its limit)
+#   * whether its circuit breaker is open (resilience.py) - those go last
+#
+# Streamed calls are timed to their first piece (what the user waits for),
+# plain calls to the whole answer, so the two are measured - and ranked -
+# separately.
+#
+# The caller tries the first endpoint and falls back to the next one if it
+# can't answer. An endpoint that slows down gets a higher p95, so traffic moves
+# to the others within a few calls. Measurements expire after a while, so a
+# slow endpoint is tried again later - one call at a time - to see if it has
+# recovered.
+#
+# Short turns ("thanks!", "ok") and background work (summaries) can go to a
+# cheaper model (BEDROCK_LIGHT_MODEL_IDS); the main models are its fallback.
+#
+# Endpoints are written "model_id" (in AWS_REGION) or "model_id@region".
+
+import time  # For expiring old measurements
+from collections import deque  # The recent calls of each endpoint
+from typing import Any, Dict, Iterable, List, Optional  # For type hints
+
+from app.services.resilience import OPEN, HALF_OPEN, BedrockResilience, classify
+
+ERROR_WEIGHT = 4.0  # An endpoint failing 25% of its calls ranks as if twice as slow
+
+# Claude models Bedrock can prompt-cache, with the fewest tokens a cached
+# prefix needs (most specific names first). Models not listed here reject
+# the "cache_control" markers.
+PROMPT_CACHE_MIN_TOKENS = (
+    ("claude-opus-4-5", 4096),
+    ("claude-haiku-4-5", 4096),
+    ("claude-3-5-haiku", 2048),
+    ("claude-3-7-sonnet", 1024),
+    ("claude-sonnet-4", 1024),
+    ("claude-opus-4", 1024),
+)
+
+
+def prompt_cache_min_tokens(model_id: str) -> Optional[int]:
+    """Smallest prefix (in tokens) the model will cache, None if it can't cache prompts"""
+    for family, minimum in PROMPT_CACHE_MIN_TOKENS:
+        if family in model_id:
+            return minimum
+    return None
+
+
+class Endpoint:
+    """One Claude model in one AWS region"""
+
+    def __init__(self, model_id: str, region: str, default_region: str, light: bool = False):
+        self.model_id = model_id
+        self.region = region
+        self.light = light  # One of the cheaper models for short turns
+        self.cache_min_tokens = prompt_cache_min_tokens(model_id)  # None: no prompt caching
+        # The name used for its circuit breaker and stats (plain model id in the usual region)
+        self.name = model_id if region == default_region else f"{model_id}@{region}"
+
+    def caches(self, prefix_tokens: int) -> bool:
+        """Would this model cache a marked prefix of this many tokens?"""
+        return self.cache_min_tokens is not None and prefix_tokens >= self.cache_min_tokens
+
+
+def parse_endpoints(specs: Iterable[Optional[str]], default_region: str, light: bool = False) -> List[Endpoint]:
+    """Endpoints from "model_id" / "model_id@region" entries (commas allowed, blanks and repeats skipped)"""
+    endpoints, seen = [], set()
+    for spec in specs:
+        for item in (spec or "").split(","):
+            model_id, _, region = item.strip().partition("@")
+            if not model_id:
+                continue
+            endpoint = Endpoint(model_id, region.strip() or default_region, default_region, light)
+            if endpoint.name not in seen:
+                seen.add(endpoint.name)
+                endpoints.append(endpoint)
+    return endpoints
+
+
+class LatencyWindow:
+    """
+    The recent calls to one endpoint: at most ``size`` of them, none older than ``max_age_seconds``
+    Percentiles are worked out when asked for and kept until the next call is recorded.
+    """
+
+    def __init__(self, size: int, max_age_seconds: float, clock=time.monotonic):
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        self._samples: deque = deque(maxlen=size)  # (when, seconds, ok)
+        self._stats: Optional[Dict[str, Any]] = None
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self._samples.append((self._clock(), seconds, ok))
+        self._stats = None
+
+    def stats(self) -> Dict[str, Any]:
+        """samples, p50 / p95 seconds of the successful calls (None if there are none), error_rate"""
+        oldest = self._clock() - self.max_age_seconds
+        while self._samples and self._samples[0][0] < oldest:
+            self._samples.popleft()
+            self._stats = None
+        if self._stats is None:
+            latencies = sorted(seconds for _, seconds, ok in self._samples if ok)
+            count = len(self._samples)
+            self._stats = {
+                "samples": count,
+                "p50": latencies[len(latencies) // 2] if latencies else None,
+                "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+                "error_rate": (count - len(latencies)) / count if count else 0.0
+            }
+        return self._stats
+
+
+class ModelRouter:
+    """Ranks the configured endpoints for each call and collects their latency"""
+
+    def __init__(self, endpoints: List[Endpoint], light_endpoints: List[Endpoint], resilience: BedrockResilience,
+                 light_max_chars: int = 60, window_size: int = 100, window_seconds: float = 120.0):
+        self.endpoints = endpoints
+        self.light_endpoints = light_endpoints
+        self.resilience = resilience  # For each endpoint's breaker and calls in flight
+        self.light_max_chars = light_max_chars
+        # One window per endpoint and kind of call (streamed or not)
+        self._windows = {(endpoint.name, streamed): LatencyWindow(window_size, window_seconds)
+                         for endpoint in light_endpoints + endpoints for streamed in (False, True)}
+        self.picks = {endpoint.name: 0 for endpoint in light_endpoints + endpoints}  # Times ranked first
+
+    def regions(self) -> List[str]:
+        return sorted({endpoint.region for endpoint in self.light_endpoints + self.endpoints})
+
+    def endpoint(self, model_id: str) -> Endpoint:
+        """The endpoint for a model asked for by id (first match, or the model in the first endpoint's region)"""
+        for endpoint in self.endpoints + self.light_endpoints:
+            if model_id in (endpoint.name, endpoint.model_id):
+                return endpoint
+        region = self.endpoints[0].region if self.endpoints else ""
+        return Endpoint(model_id, region, region)
+
+    def is_light(self, message: str) -> bool:
+        """Is this a short turn the cheaper model can answer?"""
+        return bool(self.light_endpoints) and len(message.strip()) <= self.light_max_chars
+
+    def candidates(self, light: bool = False, streamed: bool = False) -> List[Endpoint]:
+        """Endpoints to try for one call, best first (light ones first for light calls)
+
+        Ranked by their recent calls of the same kind (streamed or not).
+        """
+        ranked = self._rank(self.endpoints, streamed)
+        if light and self.light_endpoints:
+            ranked = self._rank(self.light_endpoints, streamed) + ranked
+        if not ranked:
+            raise ValueError("No Claude model configured (set CLAUDE_MODEL_ID)")
+        self.picks[ranked[0].name] = self.picks.get(ranked[0].name, 0) + 1
+        return ranked
+
+    def _rank(self, endpoints: List[Endpoint], streamed: bool) -> List[Endpoint]:
+        def score(endpoint: Endpoint):
+            guard = self.resilience.guard(endpoint.name)
+            state = guard.breaker.state
+            if state == OPEN:
+                return (3, 0.0)  # Fails straight away - only worth a try when nothing else works
+            stats = self._windows[endpoint.name, streamed].stats()
+            if stats["p95"] is None:
+                if stats["samples"]:
+                    return (2, 0.0)  # Every recent call failed
+                # Not measured lately: try it, but only one call at a time until we know how it does
+                return (1, 0.0) if guard.in_flight or state == HALF_OPEN else (0, 0.0)
+            busy = 1 + guard.in_flight / guard.max_concurrency  # A full endpoint looks twice as slow
+            return (0, stats["p95"] * (1 + ERROR_WEIGHT * stats["error_rate"]) * busy)
+
+        return sorted(endpoints, key=score)  # Stable: ties keep the configured order
+
+    def succeeded(self, endpoint: Endpoint, seconds: float, streamed: bool = False) -> None:
+        """Count a call that answered (only configured endpoints are measured)"""
+        window = self._windows.get((endpoint.name, streamed))
+        if window is not None:
+            window.record(seconds, True)
+
+    def failed(self, endpoint: Endpoint, seconds: float, exc: BaseException, streamed: bool = False) -> None:
+        """Count a failed call - only errors that say something about the endpoint (throttled, down)"""
+        window = self._windows.get((endpoint.name, streamed))
+        if classify(exc) is not None and window is not None:
+            window.record(seconds, False)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Recent latency and error rate of every endpoint (shown by the health endpoints)
+
+        Plain calls are timed to the whole answer, streamed ones ("stream")
+        to their first piece.
+        """
+        result = {}
+        for endpoint in self.light_endpoints + self.endpoints:
+            result[endpoint.name] = {
+                "model_id": endpoint.model_id,
+                "region": endpoint.region,
+                "light": endpoint.light,
+                **self._window_stats(self._windows[endpoint.name, False]),
+                "stream": self._window_stats(self._windows[endpoint.name, True]),
+                "picked_first": self.picks.get(endpoint.name, 0)
+            }
+        return result
+
+    @staticmethod
+    def _window_stats(window: LatencyWindow) -> Dict[str, Any]:
+        stats = window.stats()
+        return {
+            "samples": stats["samples"],
+            "p50_ms": round(stats["p50"] * 1000) if stats["p50"] is not None else None,
+            "p95_ms": round(stats["p95"] * 1000) if stats["p95"] is not None else None,
+            "error_rate": round(stats["error_rate"], 3)
+        }
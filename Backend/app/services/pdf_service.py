@@ -1,47 +1,339 @@
 import PyPDF2
+import asyncio
+import hashlib
+import json
+import multiprocessing
 import os
-from typing import Optional
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, TypedDict
+
+from app.core.config import settings
+from app.services.edna_parser import (
+    HEADING, LAYERS, SECTION_MAX_CHARS, heading_layer, parse_edna_report, parse_report_sections)
+
+
+def iter_page_texts(file_path: str) -> Iterator[str]:
+    """Yield the text of each page, parsing pages only as they are consumed"""
+    with open(file_path, 'rb') as file:
+        for page in PyPDF2.PdfReader(file).pages:
+            yield page.extract_text()
+
+
+# Past the start of the last layer section, enough text to be sure the
+# section is complete (section cap plus a heading and a term)
+_SECTION_SETTLE_CHARS = SECTION_MAX_CHARS + 128
+
+
+def scan_edna_pages(pages: Iterable[str]) -> Tuple[Dict[str, Any], int]:
+    """Early-terminating analysis: stop reading once nothing more is needed
+
+    Same result as analyze_edna_results on the full text, but consumes
+    pages only until all six layer sections have been read and every layer
+    came from its own section. Headings are looked for once per page (plus a
+    short overlap for headings split across pages). Returns (analysis,
+    pages read).
+    """
+    parts: List[str] = []
+    tail, context = "", 0  # End of the text so far; tail[:context] is only there for ^
+    length = 0
+    first_heading: Dict[str, int] = {}  # Layer -> where its first section starts
+    last_heading = -1
+    exhaustive = False  # Profile needs the whole text
+    pages_read = 0
+    for page_text in pages:
+        pages_read += 1
+        parts.append(page_text)
+        window = tail + page_text
+        window_start = length - len(tail)
+        length += len(page_text)
+        for match in HEADING.finditer(window, context):
+            if match.end() == len(window):
+                continue  # May continue on the next page; found again there
+            start = window_start + match.start()
+            first_heading.setdefault(heading_layer(match), start)
+            last_heading = max(last_heading, start)
+        if len(window) > 65:
+            tail, context = window[-65:], 1
+        else:
+            tail = window
+
+        if exhaustive or len(first_heading) < len(LAYERS):
+            continue
+        last_section = max(first_heading.values())
+        if last_heading > last_section or length >= last_section + _SECTION_SETTLE_CHARS:
+            analysis, self_contained = parse_report_sections("".join(parts))
+            if self_contained:
+                return analysis, pages_read
+            exhaustive = True
+
+    return parse_edna_report("".join(parts)), pages_read
+
+
+def _scan_edna_file(file_path: str) -> Tuple[Dict[str, Any], int, int]:
+    """Early-terminating analysis of a PDF (runs in an extraction process)
+
+    Returns (analysis, pages read, total pages).
+    """
+    with open(file_path, 'rb') as file:
+        pages = PyPDF2.PdfReader(file).pages
+        analysis, pages_read = scan_edna_pages(page.extract_text() for page in pages)
+        return analysis, pages_read, len(pages)
+
+
+def _run_in_child(sender, function, *args) -> None:
+    """Body of a single-use extraction process: send back (ok, result or error)"""
+    try:
+        outcome = (True, function(*args))
+    except Exception as e:
+        outcome = (False, e)
+    try:
+        sender.send(outcome)
+    except Exception as e:  # Unpicklable result or error
+        sender.send((False, RuntimeError(str(e))))
+    sender.close()
+
+
+def _wait_for_outcome(receiver, timeout: float) -> Optional[Tuple[bool, Any]]:
+    """Wait for a child's outcome; None if it took longer than ``timeout``
+
+    Runs in a thread and owns the receiving end, so the pipe is never closed
+    under a poll that is still running.
+    """
+    try:
+        if not receiver.poll(timeout):
+            return None
+        return receiver.recv()
+    except EOFError:  # Child killed (timeout elsewhere, shutdown, out of memory)
+        return False, RuntimeError("extraction process exited without a result")
+    finally:
+        receiver.close()
+
+
+def _process_context():
+    # "forkserver" forks each process from a small server that has this
+    # module preloaded: starting one takes milliseconds and never inherits
+    # the app's threads or sockets. "spawn" where forkserver is unavailable.
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+class UploadTooLargeError(Exception):
+    """Upload is bigger than the configured maximum"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File is too large (maximum is {round(max_bytes / (1024 * 1024), 1):g} MB)")
+        self.max_bytes = max_bytes
+
+
+# Bump when analyze_edna_results changes so cached analyses are recomputed
+ANALYSIS_VERSION = 3
+
+
+class SavedUpload(TypedDict):
+    file_id: str  # SHA-256 of the content: identical uploads share one file
+    file_path: str
+    size: int
+    sha256: str
+    duplicate: bool  # Content was already stored
+
 
 class PDFService:
-    def __init__(self, upload_dir: str = "uploads"):
+    def __init__(self, upload_dir: str = "uploads", workers: Optional[int] = None):
         self.upload_dir = upload_dir
         os.makedirs(upload_dir, exist_ok=True)
-    
+        self.workers = workers or settings.PDF_EXTRACT_WORKERS
+        # One process per PDF, at most ``workers`` at a time
+        self._slots = asyncio.Semaphore(self.workers)
+        self._processes: Set[multiprocessing.process.BaseProcess] = set()
+
+        # Analyses keyed by content hash; also written next to the PDF so
+        # they survive restarts and are shared by every worker
+        self._analysis_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.analysis_cache_size = settings.PDF_ANALYSIS_CACHE_SIZE
+        self.cache_counters = {
+            "uploads": 0,
+            "duplicate_uploads": 0,
+            "bytes_saved": 0,
+            "analysis_hits": 0,
+            "analysis_misses": 0,
+            "pages_parsed": 0,
+            "pages_skipped": 0  # Left unread by early-terminating analysis
+        }
+
+    async def save_upload(self, upload, max_bytes: Optional[int] = None,
+                          chunk_size: Optional[int] = None) -> SavedUpload:
+        """Copy an uploaded file to its content address in chunks, hashing it on the way
+
+        By the time this runs Starlette has received the whole request body
+        and spooled it to a temporary file; oversized bodies are stopped
+        while they arrive by the UploadSizeLimit middleware (main.py). The
+        copy holds one chunk in memory at a time and raises
+        UploadTooLargeError (removing the partial file) once the file itself
+        is over ``max_bytes``.
+        """
+        max_bytes = settings.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_BYTES
+
+        # Starlette already knows the size of a fully received part
+        if getattr(upload, "size", None) and upload.size > max_bytes:
+            raise UploadTooLargeError(max_bytes)
+
+        # Written under a temporary name, then moved to its content address
+        temp_path = os.path.join(self.upload_dir, f"{uuid.uuid4()}.part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as buffer:
+                while chunk := await upload.read(chunk_size):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLargeError(max_bytes)
+                    digest.update(chunk)
+                    buffer.write(chunk)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        sha256 = digest.hexdigest()
+        file_path = os.path.join(self.upload_dir, f"{sha256}.pdf")
+        duplicate = os.path.exists(file_path)
+        if duplicate:
+            os.remove(temp_path)
+            self.cache_counters["duplicate_uploads"] += 1
+            self.cache_counters["bytes_saved"] += size
+        else:
+            os.replace(temp_path, file_path)
+        self.cache_counters["uploads"] += 1
+
+        return SavedUpload(file_id=sha256, file_path=file_path, size=size, sha256=sha256, duplicate=duplicate)
+
+    def _analysis_path(self, sha256: str) -> str:
+        return os.path.join(self.upload_dir, f"{sha256}.analysis.json")
+
+    def _cached_analysis(self, sha256: str) -> Optional[Dict[str, Any]]:
+        analysis = self._analysis_cache.get(sha256)
+        if analysis is not None:
+            self._analysis_cache.move_to_end(sha256)
+            return analysis
+        try:
+            with open(self._analysis_path(sha256), encoding="utf-8") as cached:
+                entry = json.load(cached)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != ANALYSIS_VERSION:
+            return None
+        self._remember_analysis(sha256, entry["analysis"])
+        return entry["analysis"]
+
+    def _write_analysis(self, sha256: str, analysis: Dict[str, Any]) -> None:
+        """Write the sidecar under a temporary name, then move it into place
+
+        Other workers reading the same sidecar see either no file or a
+        complete one, never a half-written one.
+        """
+        temp_path = os.path.join(self.upload_dir, f"{uuid.uuid4()}.analysis.part")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as cached:
+                json.dump({"version": ANALYSIS_VERSION, "analysis": analysis}, cached)
+            os.replace(temp_path, self._analysis_path(sha256))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _remember_analysis(self, sha256: str, analysis: Dict[str, Any]) -> None:
+        self._analysis_cache[sha256] = analysis
+        self._analysis_cache.move_to_end(sha256)
+        while len(self._analysis_cache) > self.analysis_cache_size:
+            self._analysis_cache.popitem(last=False)
+
+    async def analyze_upload(self, saved: SavedUpload) -> Dict[str, Any]:
+        """E-DNA analysis of a saved upload, parsed at most once per distinct file"""
+        analysis = self._cached_analysis(saved["sha256"])
+        if analysis is not None:
+            self.cache_counters["analysis_hits"] += 1
+            return dict(analysis)  # Callers keep it as a profile; don't share the cached dict
+
+        self.cache_counters["analysis_misses"] += 1
+        try:
+            analysis = await self.scan_edna_async(saved["file_path"])
+        except Exception as e:  # Unreadable PDF: analyzed like before, never cached
+            return self.analyze_edna_results(f"Error reading PDF: {str(e)}")
+        self._remember_analysis(saved["sha256"], analysis)
+        await asyncio.to_thread(self._write_analysis, saved["sha256"], analysis)
+        return dict(analysis)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Upload dedupe and analysis cache numbers for the health endpoints"""
+        counters = self.cache_counters
+        lookups = counters["analysis_hits"] + counters["analysis_misses"]
+        return {
+            **counters,
+            "analysis_entries": len(self._analysis_cache),
+            "analysis_hit_ratio": round(counters["analysis_hits"] / lookups, 4) if lookups else 0.0
+        }
+
     def extract_text_from_pdf(self, file_path: str) -> str:
         """Extract text from PDF file"""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                return text
+            return "".join(iter_page_texts(file_path))
         except Exception as e:
             return f"Error reading PDF: {str(e)}"
-    
+
+    async def _run_isolated(self, function: Callable[..., Any], *args: Any, timeout: float) -> Any:
+        """Run ``function(*args)`` in a fresh process, killed after ``timeout`` seconds
+
+        Each PDF gets its own process, so a pathological file only ever
+        takes down the process reading it, never another upload's work.
+        """
+        async with self._slots:
+            context = _process_context()
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_run_in_child, args=(sender, function, *args), daemon=True)
+            process.start()
+            sender.close()
+            self._processes.add(process)
+            try:
+                outcome = await asyncio.to_thread(_wait_for_outcome, receiver, timeout)
+            finally:
+                # Also runs when the request is cancelled; the kill wakes the
+                # waiting thread
+                self._processes.discard(process)
+                if process.is_alive():
+                    process.kill()
+        if outcome is None:
+            raise TimeoutError(f"timed out after {timeout:g} seconds")
+        ok, result = outcome
+        if not ok:
+            raise result
+        return result
+
+    async def scan_edna_async(self, file_path: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Early-terminating E-DNA analysis in its own extraction process
+
+        Pages are parsed one at a time and parsing stops as soon as the
+        analysis is settled, so long labeled reports cost a page or two.
+        Raises if the PDF can't be read in ``timeout`` seconds.
+        """
+        timeout = settings.PDF_EXTRACT_TIMEOUT_SECONDS if timeout is None else timeout
+        analysis, pages_read, page_count = await self._run_isolated(
+            _scan_edna_file, file_path, timeout=timeout)
+        self.cache_counters["pages_parsed"] += pages_read
+        self.cache_counters["pages_skipped"] += page_count - pages_read
+        return analysis
+
+    def shutdown(self) -> None:
+        """Stop the extraction processes (called when the app shuts down)"""
+        for process in list(self._processes):
+            process.kill()
+
     def analyze_edna_results(self, pdf_text: str) -> dict:
-        """Analyze E-DNA quiz results from PDF text"""
-        # Look for key indicators in the PDF text
-        edna_type = "Unknown"
-        confidence = 0.0
-        
-        # Simple text analysis to determine E-DNA type
-        text_lower = pdf_text.lower()
-        
-        if "architect" in text_lower:
-            edna_type = "Architect"
-            confidence = 0.9
-        elif "alchemist" in text_lower:
-            edna_type = "Alchemist"
-            confidence = 0.9
-        elif "blurred" in text_lower:
-            edna_type = "Blurred"
-            confidence = 0.9
-        
-        return {
-            "edna_type": edna_type,
-            "confidence": confidence,
-            "full_text": pdf_text[:500] + "..." if len(pdf_text) > 500 else pdf_text
-        }
+        """Analyze E-DNA quiz results from PDF text into a six-layer profile"""
+        return parse_edna_report(pdf_text)
 
-pdf_service = PDFService()
+pdf_service = PDFService(settings.UPLOAD_DIR)
@@ -0,0 +1,190 @@
+# ============================================================================
+# PERSONAS - Hanif's and Fariza's instructions, built once
+# ============================================================================
+# Every Claude call starts with a long "system prompt" telling Claude to be
+# Hanif (The Architect) or Fariza (The Alchemist). Those instructions never
+# change, so they're written out ONCE here when the server starts, instead
+# of being rebuilt (both of them!) for every message.
+#
+# The system prompt is sent as separate blocks, from "never changes" to
+# "changes every turn":
+#
+#   1. the coach's instructions        - the same for every user
+#   2. the user's E-DNA profile        - the same for the whole conversation
+#   3. the summary of earlier messages - changes as the conversation grows
+#
+# Bedrock can cache a prompt's beginning (prompt caching): blocks marked with
+# "cache_control" are remembered for a few minutes, and the next request that
+# starts with exactly the same blocks is charged about a tenth of the price
+# for them. Putting the unchanging parts first lets as much as possible be
+# reused. Only some models support it, and each has a minimum prefix size
+# (1024 tokens or more), so the markers are off by default
+# (BEDROCK_PROMPT_CACHING) and removed again for any model that wouldn't
+# cache this prefix (see cached_prefix_tokens / without_cache_markers).
+#
+# The profile is written as one short line (see compact_profile) rather than
+# the whole profile dictionary.
+
+from typing import Any, Dict, List, Optional  # For type hints
+
+from app.services.edna_parser import format_profile  # One-line six-layer profile
+from app.services.langgraph.context import estimate_tokens  # Rough token count of a text
+
+CACHE_CONTROL = {"type": "ephemeral"}  # Bedrock's "remember the prompt up to here" marker
+
+
+class Persona:
+    """One coach: the fixed instructions plus what to say when there's no profile"""
+
+    def __init__(self, name: str, instructions: str, default_profile: str):
+        self.name = name
+        self.instructions = instructions
+        self.default_profile = default_profile
+
+
+# ============================================================================
+# THE COACHES - Written once, used for every message
+# ============================================================================
+
+ARCHITECT = Persona("architect", """You are Hanif Khan, "The Architect" from Brandscaling.
+
+PERSONALITY TRAITS:
+- Precise, calm, and strategic
+- You cut through complexity with exact, no-fluff communication
+- You always ask "What's the root problem here?"
+- You focus on systematic solutions and frameworks
+- You believe "Most problems are decisions avoided—not strategy missing"
+
+COMMUNICATION STYLE:
+- Direct and to-the-point
+- Use systematic thinking
+- Break down complex problems into clear steps
+- Focus on root causes, not symptoms
+- Provide actionable frameworks
+- Start responses with "**The root problem here:**" when identifying issues
+
+EXPERTISE:
+- Business scaling strategies
+- Performance optimization
+- Systematic process design
+- Strategic decision-making
+- Operational efficiency
+- Revenue optimization
+- Systems and frameworks
+
+RESPONSE FORMAT:
+- Start with identifying the core issue using "**The root problem here:**"
+- Provide numbered, systematic steps
+- Include specific, actionable advice
+- End with a strategic insight or framework
+- Keep responses focused and precise
+
+Tailor your advice to the user's E-DNA profile below.
+
+Remember: You are Hanif Khan. Respond as him, with his precise, strategic approach.""",
+    default_profile="Architect type - systematic, strategic thinker")
+
+ALCHEMIST = Persona("alchemist", """You are Fariza Javed, "The Alchemist" from Brandscaling.
+
+PERSONALITY TRAITS:
+- Warm, magnetic, and empowering
+- You sense what the market wants before it knows it wants it
+- You help founders align internal evolution with external brand presence
+- You believe "You can't scale what you haven't clarified"
+- You focus on authentic transformation and energetic alignment
+
+COMMUNICATION STYLE:
+- Warm and nurturing tone
+- Use transformational language
+- Focus on authentic alignment
+- Inspire depth and clarity
+- Provide intuitive insights
+- Often start with empathetic expressions like "*leans in*" or "Beautiful soul"
+
+EXPERTISE:
+- Personal brand development
+- Authentic scaling methods
+- Energy optimization
+- Creative manifestation
+- Purpose-profit alignment
+- Transformational leadership
+- Intuitive business guidance
+
+RESPONSE FORMAT:
+- Start with empathetic understanding and warm connection
+- Guide through transformational insights
+- Focus on authentic alignment and purpose
+- Provide creative, intuitive solutions
+- End with empowering affirmation
+- Use warm, inspiring language throughout
+
+Tailor your guidance to the user's E-DNA profile below.
+
+Remember: You are Fariza Javed. Respond as her, with her warm, transformational approach.""",
+    default_profile="Alchemist type - intuitive, transformational leader")
+
+PERSONAS = {persona.name: persona for persona in (ARCHITECT, ALCHEMIST)}
+
+
+def get_persona(personality: str) -> Persona:
+    """Fariza for "alchemist", Hanif for anything else (as before)"""
+    return PERSONAS.get(personality.lower(), ARCHITECT)
+
+
+# ============================================================================
+# COMPACT PROFILE - The user's E-DNA in one short line
+# ============================================================================
+
+def compact_profile(profile: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    The profile as one short line for the prompt (None = nothing useful)
+    Six-layer profiles (analyzed PDFs, scored quizzes) use their summary
+    line; older uploads only contribute their type - never the PDF text.
+    """
+    if not profile:
+        return None
+    if profile.get("profile_summary"):
+        return profile["profile_summary"]
+    if profile.get("core_type"):
+        return format_profile(profile)
+    edna_type = profile.get("edna_type")
+    if edna_type and edna_type != "Unknown":
+        confidence = profile.get("confidence")
+        return f"{edna_type} (confidence {confidence:.0%})" if isinstance(confidence, (int, float)) else edna_type
+    return None
+
+
+def system_blocks(personality: str, profile: Optional[Dict[str, Any]] = None,
+                  conversation_summary: Optional[str] = None, cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    The system prompt as Bedrock content blocks, unchanging parts first
+    With cache=True the coach's instructions and the profile are marked for
+    prompt caching.
+    """
+    persona = get_persona(personality)
+    blocks = [
+        {"type": "text", "text": persona.instructions},
+        {"type": "text", "text": f"USER'S E-DNA PROFILE: {compact_profile(profile) or persona.default_profile}"}
+    ]
+    if cache:
+        for block in blocks:
+            block["cache_control"] = CACHE_CONTROL
+    if conversation_summary:
+        blocks.append({"type": "text", "text": f"EARLIER IN THIS CONVERSATION:\n{conversation_summary}"})
+    return blocks
+
+
+def system_text(blocks: List[Dict[str, Any]]) -> str:
+    """The blocks as one string (for cache keys and token counts)"""
+    return "\n\n".join(block["text"] for block in blocks)
+
+
+def cached_prefix_tokens(blocks: List[Dict[str, Any]]) -> int:
+    """Estimated size of the blocks marked for prompt caching (0 if none are)"""
+    marked = [block["text"] for block in blocks if "cache_control" in block]
+    return estimate_tokens("".join(marked)) if marked else 0
+
+
+def without_cache_markers(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The same blocks with the prompt-caching markers taken off"""
+    return [{key: value for key, value in block.items() if key != "cache_control"} for block in blocks]
@@ -0,0 +1,169 @@
+# ============================================================================
+# QUESTION GRAPH - Serve the adaptive E-DNA quiz without a query per step
+# ============================================================================
+# Each EDNAQuestion stores its answer options and its branching rules as
+# JSON. Working out "which question comes next?" from the database would mean
+# loading that question and re-reading its JSON on every single answer.
+#
+# Instead, all active questions are loaded ONCE and compiled into a graph:
+# for every question, a list with the next question for each option. Finding
+# the next question is then two dictionary/list lookups.
+#
+# branching_logic format (option letters A, B, C... follow the options list;
+# a question ID of null ends the quiz):
+#
+#     {"A": 7, "B": 9, "default": 8}
+#
+# Options without a rule go to "default", and without a default to the next
+# active question by order_index. Rules pointing at a missing or inactive
+# question fall back the same way.
+#
+# The compiled graph is cached. At most every QUESTION_GRAPH_CHECK_SECONDS
+# one tiny query (how many questions, latest updated_at) checks whether a
+# question was edited, added or removed; if so the graph is rebuilt.
+
+import asyncio  # For letting only one request rebuild the graph
+import time  # For spacing out the "anything changed?" checks
+from datetime import datetime  # For type hints
+from typing import Any, Dict, List, Optional, Tuple  # For type hints
+
+from sqlalchemy import func, select  # For loading the questions
+
+from app.core.config import settings  # How often to check for edits
+from app.models.edna_models import EDNAQuestion  # The questions table
+
+END = None  # "Next question" value for the end of the quiz
+_DEFAULT_KEYS = ("default", "*")  # branching_logic keys for "any other answer"
+
+
+def _letter(index: int) -> str:
+    return chr(ord("A") + index)
+
+
+class CompiledQuestion:
+    """One question with its branching already worked out"""
+
+    __slots__ = ("id", "question_text", "question_type", "layer", "options", "next_ids", "_answers")
+
+    def __init__(self, question: Any, next_ids: Tuple[Optional[int], ...]):
+        self.id = question.id
+        self.question_text = question.question_text
+        self.question_type = question.question_type
+        self.layer = question.layer
+        self.options = list(question.options or [])
+        self.next_ids = next_ids  # Next question ID for each option (END = finished)
+        # Every way an answer can be given -> option index
+        self._answers: Dict[str, int] = {}
+        for index, option in enumerate(self.options):
+            self._answers[_letter(index)] = index
+            self._answers[_letter(index).lower()] = index
+            if isinstance(option, dict):
+                for key in ("letter", "text", "value"):
+                    if option.get(key):
+                        self._answers.setdefault(str(option[key]).strip(), index)
+            else:
+                self._answers.setdefault(str(option).strip(), index)
+
+    def option_index(self, answer: str) -> int:
+        """Option index for a letter, option text or option value"""
+        try:
+            return self._answers[answer.strip()]
+        except KeyError:
+            raise ValueError(f"{answer!r} is not an option of question {self.id}") from None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "question_text": self.question_text, "question_type": self.question_type,
+                "layer": self.layer, "options": self.options}
+
+
+class QuestionGraph:
+    """All active questions, compiled; never changed after it's built"""
+
+    def __init__(self, questions: List[Any], version: Tuple[int, Optional[datetime]] = (0, None)):
+        self.version = version
+        ordered = sorted(questions, key=lambda q: (q.order_index, q.id))
+        ids = [question.id for question in ordered]
+        following = dict(zip(ids, ids[1:] + [END]))  # Next by order_index
+        self.first_id: Optional[int] = ids[0] if ids else END
+        self.problems: List[str] = []  # Branching rules that had to be ignored
+
+        self.questions: Dict[int, CompiledQuestion] = {}
+        for question in ordered:
+            rules = question.branching_logic or {}
+            if not isinstance(rules, dict):
+                self.problems.append(f"question {question.id}: branching_logic is not an object")
+                rules = {}
+            fallback = following[question.id]
+            for key in _DEFAULT_KEYS:
+                if key in rules:
+                    fallback = self._target(question.id, key, rules[key], following[question.id], ids)
+            next_ids = tuple(
+                self._target(question.id, _letter(index), rules[_letter(index)], fallback, ids)
+                if _letter(index) in rules else fallback
+                for index in range(len(question.options or []))
+            )
+            self.questions[question.id] = CompiledQuestion(question, next_ids)
+
+    def _target(self, question_id: int, key: str, target: Any, fallback: Optional[int],
+                ids: List[int]) -> Optional[int]:
+        if target is END or target in ids:
+            return target
+        self.problems.append(f"question {question_id}: rule {key!r} points at unknown question {target!r}")
+        return fallback
+
+    def question(self, question_id: int) -> CompiledQuestion:
+        try:
+            return self.questions[question_id]
+        except KeyError:
+            raise KeyError(f"Question {question_id} is not an active quiz question") from None
+
+    def next_question(self, question_id: int, answer: str) -> Optional[CompiledQuestion]:
+        """The question after answering ``answer`` to ``question_id`` (None = quiz finished)"""
+        current = self.question(question_id)
+        next_id = current.next_ids[current.option_index(answer)]
+        return END if next_id is END else self.questions[next_id]
+
+
+async def _version(db) -> Tuple[int, Optional[datetime]]:
+    """(number of questions, latest updated_at): changes whenever a question does"""
+    count, latest = (await db.execute(
+        select(func.count(EDNAQuestion.id), func.max(EDNAQuestion.updated_at)))).one()
+    return count, latest
+
+
+class QuestionGraphCache:
+    """Keeps the compiled graph and rebuilds it when the questions change"""
+
+    def __init__(self, check_seconds: float = settings.QUESTION_GRAPH_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._graph: Optional[QuestionGraph] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.builds = 0  # How many times the graph was compiled
+
+    async def get(self, db) -> QuestionGraph:
+        """The current graph (a database check only every check_seconds)"""
+        graph = self._graph
+        if graph is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return graph
+        async with self._lock:
+            if self._graph is not None and time.monotonic() - self._checked_at < self.check_seconds:
+                return self._graph  # Another request just checked
+            version = await _version(db)
+            if self._graph is None or self._graph.version != version:
+                questions = (await db.scalars(
+                    select(EDNAQuestion).where(EDNAQuestion.is_active.is_(True)))).all()
+                self._graph = QuestionGraph(questions, version)
+                self.builds += 1
+                for problem in self._graph.problems:
+                    print(f"⚠️ Quiz branching ignored: {problem}")
+            self._checked_at = time.monotonic()
+            return self._graph
+
+    def invalidate(self) -> None:
+        """Rebuild on the next request (e.g. right after editing questions)"""
+        self._checked_at = 0.0
+
+
+# The one cache everyone shares
+question_graph_cache = QuestionGraphCache()
@@ -0,0 +1,200 @@
+# ============================================================================
+# QUIZ BATCH RESCORING - Recompute every stored quiz result in one go
+# ============================================================================
+# When the scoring rules (the quiz CSVs) change, every historical quiz has to
+# be scored again. Doing that one quiz at a time is fine for thousands of
+# quizzes but slow for millions, so this reads the answers in chunks, turns
+# each chunk into a NumPy matrix (quizzes x 22 questions) and scores the
+# whole chunk with array operations (QuizScorer.score_matrix). Results are
+# written out chunk by chunk, so memory stays flat however big the input is.
+#
+# Answers can come from:
+#   - a quiz_results_data.csv-style export (Q1_Answer ... Q22_Answer = A-D)
+#   - the edna_responses table (one row per answer, grouped by quiz session)
+#
+# Usage (from the Backend directory):
+#
+#   python -m app.services.quiz_batch --csv ../quiz_results_data.csv --output rescored.csv
+#   python -m app.services.quiz_batch --database-url sqlite:///edna.db
+#
+# Each output row says whether the type or subtype differs from what was
+# stored before ("Changed"), so a rules change can be reviewed before use.
+
+import argparse  # For the command line options
+import csv  # For reading exports and writing results
+import itertools  # For grouping answer rows by quiz session
+import sys  # For writing to the terminal
+import time  # For the summary line
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple  # For type hints
+
+import numpy  # Array maths for scoring a whole chunk at once
+
+from app.core.config import settings  # Default database
+from app.services.quiz_scoring import UNANSWERED, QuizScorer, get_quiz_scorer  # The compiled rule tables
+
+DEFAULT_CHUNK_ROWS = 20_000  # Quizzes scored per chunk (about 25 MB in flight)
+
+# One chunk: (identifying columns per quiz, previously stored (type, subtype)
+# per quiz or None, answer matrix)
+Chunk = Tuple[List[List[str]], List[Optional[Tuple[str, str]]], numpy.ndarray]
+
+
+class BatchStats:
+    """Running totals for the summary line"""
+
+    def __init__(self):
+        self.scored = 0
+        self.changed = 0
+        self.skipped = 0  # Rows whose answers couldn't be read
+
+
+def iter_csv_chunks(path: str, scorer: QuizScorer, stats: BatchStats,
+                    chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Chunk]:
+    """Read a quiz_results_data.csv-style export a chunk at a time"""
+    letters = {letter: option for option, letter in enumerate(scorer.option_letters)}
+    letters.update({letter.lower(): option for letter, option in list(letters.items())})
+    letters[""] = UNANSWERED
+    columns = [f"Q{question_id}_Answer" for question_id in scorer.question_ids]
+
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)  # Plain rows: much faster than DictReader on big exports
+        header = next(reader, [])
+        answer_at = [header.index(column) for column in columns]
+        key_at = [header.index(name) for name in ("Result_ID", "User_ID") if name in header]
+        previous_at = (header.index("Final_DNA_Type"), header.index("Subtype")) \
+            if "Final_DNA_Type" in header and "Subtype" in header else None
+        keys, previous, vectors = [], [], []
+        for row in reader:
+            try:
+                vector = [letters[row[index].strip()] for index in answer_at]
+            except KeyError:
+                # Not a plain letter: option text still works, anything else is skipped
+                try:
+                    vector = scorer.answer_vector({
+                        question_id: row[index] for question_id, index in zip(scorer.question_ids, answer_at)
+                        if row[index].strip()
+                    })
+                except ValueError:
+                    stats.skipped += 1
+                    continue
+            keys.append([row[index] for index in key_at])
+            previous.append((row[previous_at[0]].strip().lower(), row[previous_at[1]].strip())
+                            if previous_at else None)
+            vectors.append(vector)
+            if len(vectors) == chunk_rows:
+                yield keys, previous, numpy.array(vectors, dtype=numpy.int8)
+                keys, previous, vectors = [], [], []
+        if vectors:
+            yield keys, previous, numpy.array(vectors, dtype=numpy.int8)
+
+
+def iter_database_chunks(url: str, scorer: QuizScorer, stats: BatchStats,
+                         chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Chunk]:
+    """Stream the edna_responses table, one answer vector per quiz session"""
+    from sqlalchemy import create_engine, select  # Only needed for this source
+    from app.core.database import sync_database_url
+    from app.models.edna_models import EDNAProfile, EDNAResponse
+
+    # DATABASE_URL may name an async driver (sqlite+aiosqlite://...); this
+    # tool reads with a plain engine, so use the matching sync driver
+    engine = create_engine(sync_database_url(url))
+    responses = select(
+        EDNAResponse.quiz_session_id, EDNAResponse.user_id, EDNAResponse.question_id,
+        EDNAResponse.selected_option, EDNAResponse.option_value
+    ).order_by(EDNAResponse.quiz_session_id, EDNAResponse.id)
+
+    def stored_profiles(session_ids: List[str]) -> Dict[str, Tuple[str, str]]:
+        with engine.connect() as connection:
+            rows = connection.execute(
+                select(EDNAProfile.quiz_session_id, EDNAProfile.core_type, EDNAProfile.subtype)
+                .where(EDNAProfile.quiz_session_id.in_(session_ids)))
+            return {row.quiz_session_id: (row.core_type.lower(), row.subtype or "") for row in rows}
+
+    def chunk(keys, vectors) -> Chunk:
+        stored = {}
+        for start in range(0, len(keys), 10_000):  # Keep IN (...) lists a sensible size
+            stored.update(stored_profiles([session_id for session_id, _ in keys[start:start + 10_000]]))
+        return keys, [stored.get(session_id) for session_id, _ in keys], numpy.array(vectors, dtype=numpy.int8)
+
+    try:
+        with engine.connect() as connection:
+            # yield_per streams rows instead of loading the whole table
+            result = connection.execution_options(yield_per=10_000).execute(responses)
+            keys, vectors = [], []
+            for session_id, rows in itertools.groupby(result, key=lambda row: row.quiz_session_id):
+                rows = list(rows)
+                try:
+                    vectors.append(scorer.response_vector(rows))
+                except ValueError:
+                    stats.skipped += 1
+                    continue
+                keys.append([session_id, str(rows[0].user_id)])
+                if len(vectors) == chunk_rows:
+                    yield chunk(keys, vectors)
+                    keys, vectors = [], []
+            if vectors:
+                yield chunk(keys, vectors)
+    finally:
+        engine.dispose()
+
+
+def write_results(chunks: Iterator[Chunk], key_columns: List[str], scorer: QuizScorer,
+                  output: TextIO, stats: BatchStats) -> None:
+    """Score each chunk with NumPy and append its results to ``output``"""
+    writer = csv.writer(output)
+    score_columns = [f"{name.capitalize()}_Score" for name in scorer.types]
+    writer.writerow(key_columns + score_columns + [
+        "Final_DNA_Type", "Subtype", "Awareness_Percentage", "Overall_Score", "Changed"])
+    type_names = numpy.array(scorer.types, dtype=object)
+    subtype_names = numpy.array(scorer.subtypes + [""], dtype=object)  # Code -1 picks the ""
+
+    for keys, previous, matrix in chunks:
+        scores = scorer.score_matrix(matrix)
+        dna_types = type_names[scores["dna_type"]].tolist()
+        subtypes = subtype_names[scores["subtype"]].tolist()
+        for key, counts, dna_type, subtype, before in zip(
+                keys, scores["type_scores"].tolist(), dna_types, subtypes, previous):
+            changed = "" if before is None else str(before != (dna_type, subtype)).lower()
+            stats.changed += changed == "true"
+            writer.writerow(key + counts + [
+                dna_type, subtype, scorer.awareness_percentage, scorer.overall_score, changed])
+        stats.scored += len(keys)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rescore stored E-DNA quizzes with the current rule tables")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", help="quiz_results_data.csv-style export to rescore")
+    source.add_argument("--database-url", help="Database whose edna_responses to rescore (default: DATABASE_URL)")
+    parser.add_argument("--output", help="Where to write the results CSV (default: the terminal)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Quizzes scored at a time")
+    args = parser.parse_args(argv)
+
+    scorer = get_quiz_scorer()
+    stats = BatchStats()
+    if args.csv:
+        with open(args.csv, newline="", encoding="utf-8") as file:
+            fieldnames = next(csv.reader(file), [])
+        key_columns = [name for name in ("Result_ID", "User_ID") if name in fieldnames]
+        chunks = iter_csv_chunks(args.csv, scorer, stats, args.chunk_rows)
+    else:
+        url = args.database_url or settings.DATABASE_URL
+        if not url:
+            parser.error("give --csv, --database-url or set DATABASE_URL")
+        key_columns = ["Quiz_Session_ID", "User_ID"]
+        chunks = iter_database_chunks(url, scorer, stats, args.chunk_rows)
+
+    started = time.perf_counter()
+    output = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        write_results(chunks, key_columns, scorer, output, stats)
+    finally:
+        if args.output:
+            output.close()
+    elapsed = time.perf_counter() - started
+    print(f"Rescored {stats.scored} quizzes ({stats.changed} changed, {stats.skipped} skipped) "
+          f"in {elapsed:.2f}s ({stats.scored / elapsed if elapsed else 0:.0f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+# ============================================================================
+# QUIZ SCORING - Work out someone's E-DNA type straight from their answers
+# ============================================================================
+# The website's quiz scores answers with the rules written down in two CSV
+# files at the top of the repository:
+#
+#   quiz_questions_options.csv        - for every question, what each answer
+#                                       (A-D) counts towards: a type
+#                                       (architect, alchemist, blurred,
+#                                       neutral) and sometimes a subtype
+#   quiz_scoring_calculation_logic.csv - the rules: "4+ architect answers in
+#                                       Q1-Q6 = architect", which subtypes
+#                                       belong to which type, the defaults...
+#
+# Both files are read ONCE and turned into small lookup tables (lists of
+# numbers). Scoring a quiz is then just a few list lookups and additions, so
+# a profile costs microseconds instead of reading a PDF made elsewhere.
+#
+# The result is the same as the website's calculateDNAType/calculateSubtype:
+# subtypes only count when they belong to the type, the most common one wins
+# and a tie goes to the subtype that was picked first.
+
+import csv  # For reading the rule tables
+import re  # For reading rules like "architect_score >= 4"
+from functools import lru_cache  # For compiling the tables only once
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, TypedDict  # For type hints
+
+from app.core.config import settings  # Where the CSV files are
+from app.services.edna_parser import LAYERS, format_profile  # Same profile shape as analyzed PDFs
+
+UNANSWERED = -1  # Answer vector value for a skipped question
+
+
+class QuizScore(TypedDict):
+    dna_type: str  # architect, alchemist or blurred
+    subtype: str  # e.g. master-strategist
+    type_scores: Dict[str, int]  # How many type answers of each kind (Q1-Q6)
+    subtype_votes: int  # Answers for the winning subtype (0 = default subtype)
+    awareness_percentage: int
+    overall_score: int
+
+
+def _question_range(text: str) -> range:
+    """"Q13-Q22" -> range(13, 23)"""
+    match = re.fullmatch(r"Q(\d+)-Q(\d+)", text.strip())
+    if not match:
+        raise ValueError(f"Expected a question range like Q1-Q6, got {text!r}")
+    return range(int(match.group(1)), int(match.group(2)) + 1)
+
+
+class QuizScorer:
+    """
+    The quiz rule tables, compiled into lookup lists
+    Answers are given as a vector: one number per question in CSV order
+    (0 = option A, 1 = B, ...; UNANSWERED for skipped questions).
+    """
+
+    def __init__(self, questions_csv: str, scoring_csv: str):
+        # ====================================================================
+        # ANSWER OPTIONS - what every option of every question counts towards
+        # ====================================================================
+        with open(questions_csv, newline="", encoding="utf-8") as file:
+            reader = csv.DictReader(file)
+            self.option_letters = tuple(
+                match.group(1) for match in map(re.compile(r"Option_([A-Z])_Type$").match, reader.fieldnames)
+                if match)
+            question_rows = list(reader)
+
+        self.question_ids = [int(row["Question_ID"]) for row in question_rows]
+        self._index_of_question = {question_id: index for index, question_id in enumerate(self.question_ids)}
+        self.types: List[str] = []  # Type names; their position is the type's code
+        self.subtypes: List[str] = []  # Same for subtypes
+        self._option_type: List[Tuple[int, ...]] = []  # [question][option] -> type code
+        self._option_subtype: List[Tuple[int, ...]] = []  # [question][option] -> subtype code (or -1)
+        self._option_by_text: List[Dict[str, int]] = []  # [question] option text -> option
+        for row in question_rows:
+            types, subtypes = [], []
+            for letter in self.option_letters:
+                types.append(self._code(self.types, row[f"Option_{letter}_Type"].strip()))
+                subtype = row[f"Option_{letter}_Subtype"].strip()
+                subtypes.append(self._code(self.subtypes, subtype) if subtype else -1)
+            self._option_type.append(tuple(types))
+            self._option_subtype.append(tuple(subtypes))
+            self._option_by_text.append({
+                " ".join(row[f"Option_{letter}_Text"].split()): option
+                for option, letter in enumerate(self.option_letters)
+            })
+
+        # ====================================================================
+        # SCORING RULES - thresholds, valid subtypes, defaults
+        # ====================================================================
+        with open(scoring_csv, newline="", encoding="utf-8") as file:
+            rules = list(csv.DictReader(file))
+
+        self._type_rules: List[Tuple[int, int]] = []  # (type code, answers needed), checked in order
+        self._fallback_type: Optional[int] = None
+        self._default_subtype: Dict[int, int] = {}
+        valid_subtypes: Dict[int, List[int]] = {}
+        self.awareness_percentage = 0
+        self.overall_score = 0
+        type_questions = subtype_questions = None
+        for rule in rules:
+            kind, condition = rule["Calculation_Type"], rule["Condition"]
+            if kind == "DNA_Type_Calculation":
+                type_questions = _question_range(rule["Questions_Used"])
+                threshold = re.fullmatch(r"(\w+)_score\s*>=\s*(\d+)", condition.strip())
+                if threshold:
+                    self._type_rules.append((self._code(self.types, threshold.group(1)), int(threshold.group(2))))
+                self._fallback_type = self._code(self.types, rule["Default_Fallback"].strip())
+            elif kind == "Subtype_Calculation":
+                subtype_questions = _question_range(rule["Questions_Used"])
+                default_for = re.search(r"dnaType\s*=\s*(\w+)", condition)
+                if default_for:
+                    self._default_subtype[self._code(self.types, default_for.group(1))] = \
+                        self._code(self.subtypes, rule["Result"].strip())
+            elif kind == "Valid_Subtypes":
+                valid_subtypes[self._code(self.types, rule["Questions_Used"].strip())] = [
+                    self._code(self.subtypes, subtype.strip()) for subtype in condition.split(",")]
+            elif kind == "Awareness_Calculation":
+                self.awareness_percentage = int(rule["Result"])
+            elif kind == "Score_Calculation":
+                self.overall_score = int(rule["Result"])
+
+        if not self._type_rules or self._fallback_type is None or type_questions is None or subtype_questions is None:
+            raise ValueError(f"{scoring_csv} is missing the type or subtype calculation rules")
+        self._type_questions = tuple(self._index_of_question[q] for q in type_questions if q in self._index_of_question)
+        self._subtype_questions = tuple(
+            self._index_of_question[q] for q in subtype_questions if q in self._index_of_question)
+
+        # Per resulting type: [question][option] -> subtype code if it counts
+        # for that type, else -1 - so scoring never has to check validity
+        self._subtype_for_type: Dict[int, List[Tuple[int, ...]]] = {}
+        for type_code in range(len(self.types)):
+            valid = set(valid_subtypes.get(type_code, ()))
+            self._subtype_for_type[type_code] = [
+                tuple(code if code in valid else -1 for code in options) for options in self._option_subtype
+            ]
+
+    @staticmethod
+    def _code(names: List[str], name: str) -> int:
+        """Position of ``name`` in ``names``, adding it if it's new"""
+        name = name.lower()
+        if name not in names:
+            names.append(name)
+        return names.index(name)
+
+    def answer_vector(self, answers: Mapping[int, str]) -> List[int]:
+        """
+        Turn {question id: answer} into an answer vector
+        An answer is the option letter ("B") or the option's text.
+        Raises ValueError for unknown questions or answers.
+        """
+        vector = [UNANSWERED] * len(self.question_ids)
+        for question_id, answer in answers.items():
+            index = self._index_of_question.get(int(question_id))
+            if index is None:
+                raise ValueError(f"Unknown quiz question {question_id}")
+            vector[index] = self._option(index, answer)
+        return vector
+
+    def _option(self, index: int, answer: str) -> int:
+        answer = " ".join(str(answer).split())
+        if answer.upper() in self.option_letters:
+            return self.option_letters.index(answer.upper())
+        option = self._option_by_text[index].get(answer)
+        if option is None:
+            raise ValueError(f"Unknown answer {answer!r} for question {self.question_ids[index]}")
+        return option
+
+    def score_vector(self, vector: Sequence[int]) -> QuizScore:
+        """Score one answer vector into core type and subtype"""
+        if len(vector) != len(self.question_ids):
+            raise ValueError(f"Expected {len(self.question_ids)} answers, got {len(vector)}")
+
+        # Core type: count type answers, first rule whose threshold is met wins
+        counts = [0] * len(self.types)
+        for question in self._type_questions:
+            option = vector[question]
+            if option != UNANSWERED:
+                counts[self._option_type[question][option]] += 1
+        dna_type = next((code for code, needed in self._type_rules if counts[code] >= needed), self._fallback_type)
+
+        # Subtype: most common valid subtype; ties go to the one seen first
+        # (dicts keep insertion order)
+        subtype_table = self._subtype_for_type[dna_type]
+        votes: Dict[int, int] = {}
+        for question in self._subtype_questions:
+            option = vector[question]
+            if option != UNANSWERED and subtype_table[question][option] != -1:
+                subtype = subtype_table[question][option]
+                votes[subtype] = votes.get(subtype, 0) + 1
+        subtype, best = self._default_subtype.get(dna_type, -1), 0
+        for code, count in votes.items():
+            if count > best:
+                subtype, best = code, count
+
+        return QuizScore(
+            dna_type=self.types[dna_type],
+            subtype=self.subtypes[subtype] if subtype != -1 else "",
+            type_scores=dict(zip(self.types, counts)),
+            subtype_votes=best,
+            awareness_percentage=self.awareness_percentage,
+            overall_score=self.overall_score
+        )
+
+    def score_answers(self, answers: Mapping[int, str]) -> QuizScore:
+        """Score {question id: option letter or text}"""
+        return self.score_vector(self.answer_vector(answers))
+
+    def response_vector(self, responses: Iterable[Any]) -> List[int]:
+        """
+        Answer vector of a quiz session's EDNAResponse rows
+        selected_option holds the letter or the option text (option_value is
+        tried when it doesn't match). If a question was answered more than
+        once, the later row wins.
+        """
+        vector = [UNANSWERED] * len(self.question_ids)
+        for response in responses:
+            index = self._index_of_question.get(response.question_id)
+            if index is None:
+                raise ValueError(f"Unknown quiz question {response.question_id}")
+            try:
+                vector[index] = self._option(index, response.selected_option)
+            except ValueError:
+                if not response.option_value:
+                    raise
+                vector[index] = self._option(index, response.option_value)
+        return vector
+
+    def score_responses(self, responses: Iterable[Any]) -> QuizScore:
+        """Score a quiz session's EDNAResponse rows (see response_vector)"""
+        return self.score_vector(self.response_vector(responses))
+
+    def score_matrix(self, matrix: "numpy.ndarray") -> Dict[str, "numpy.ndarray"]:
+        """
+        Score many quizzes at once with NumPy array operations
+        ``matrix`` has one answer vector per row (quizzes x questions).
+        Returns arrays with one entry per row: "type_scores" (rows x
+        len(types) counts), "dna_type" and "subtype" (codes into
+        self.types / self.subtypes, -1 for no subtype) and "subtype_votes".
+        Same results as score_vector on each row.
+        """
+        import numpy  # Only needed for batch scoring
+
+        matrix = numpy.asarray(matrix)
+        if matrix.ndim != 2 or matrix.shape[1] != len(self.question_ids):
+            raise ValueError(f"Expected a quizzes x {len(self.question_ids)} answer matrix, got {matrix.shape}")
+        if matrix.size and (matrix.min() < UNANSWERED or matrix.max() >= len(self.option_letters)):
+            raise ValueError("Answer matrix holds an unknown option")
+        rows = matrix.shape[0]
+
+        # Core type: look every type answer up at once, count per type
+        questions = list(self._type_questions)
+        answers = matrix[:, questions]
+        option_types = numpy.array(self._option_type, dtype=numpy.int16)[questions]  # questions x options
+        types = numpy.where(answers != UNANSWERED, option_types[numpy.arange(len(questions)), answers], -1)
+        type_scores = numpy.stack([(types == code).sum(axis=1) for code in range(len(self.types))], axis=1)
+        dna_type = numpy.full(rows, self._fallback_type, dtype=numpy.int16)
+        for code, needed in reversed(self._type_rules):  # Reversed, so the first rule met is applied last
+            dna_type[type_scores[:, code] >= needed] = code
+
+        # Subtype: per type, count votes for every subtype and note the
+        # question each was first picked in; rank by votes, then earliest
+        questions = list(self._subtype_questions)
+        subtype = numpy.full(rows, -1, dtype=numpy.int16)
+        subtype_votes = numpy.zeros(rows, dtype=numpy.int16)
+        for type_code in range(len(self.types)):
+            selected = numpy.flatnonzero(dna_type == type_code)
+            if not len(selected):
+                continue
+            answers = matrix[selected][:, questions]
+            option_subtypes = numpy.array(self._subtype_for_type[type_code], dtype=numpy.int16)[questions]
+            picked = numpy.where(answers != UNANSWERED, option_subtypes[numpy.arange(len(questions)), answers], -1)
+            votes = numpy.zeros((len(selected), len(self.subtypes)), dtype=numpy.int16)
+            first_seen = numpy.full(votes.shape, len(questions), dtype=numpy.int16)
+            for position in reversed(range(len(questions))):  # Reversed, so the earliest pick is kept
+                quizzes = numpy.flatnonzero(picked[:, position] != -1)
+                codes = picked[quizzes, position]
+                votes[quizzes, codes] += 1  # One pick per quiz per question, so no repeated cells
+                first_seen[quizzes, codes] = position
+            rank = votes * (len(questions) + 1) + (len(questions) - first_seen)
+            winner = rank.argmax(axis=1)
+            best = votes[numpy.arange(len(selected)), winner]
+            subtype[selected] = numpy.where(best > 0, winner, self._default_subtype.get(type_code, -1))
+            subtype_votes[selected] = best
+
+        return {"type_scores": type_scores, "dna_type": dna_type, "subtype": subtype, "subtype_votes": subtype_votes}
+
+    def profile(self, score: QuizScore) -> Dict[str, Any]:
+        """
+        EDNAProfile-shaped dict for a score (same keys as an analyzed PDF)
+        The quiz settles the first two layers; the others stay empty.
+        """
+        profile: Dict[str, Any] = dict.fromkeys(LAYERS)
+        profile.update({f"{layer}_confidence": 0.0 for layer in LAYERS})
+        profile.update(
+            core_type=score["dna_type"].capitalize(),
+            core_type_confidence=1.0,
+            subtype=score["subtype"] or None,
+            subtype_confidence=(1.0 if score["subtype_votes"] else 0.5) if score["subtype"] else 0.0
+        )
+        confidences = [profile[f"{layer}_confidence"] for layer in LAYERS]
+        profile["overall_confidence"] = round(sum(confidences) / len(LAYERS), 3)
+        profile["completion_percentage"] = round(100 * sum(1 for c in confidences if c >= 0.5) / len(LAYERS), 1)
+        profile["edna_type"] = profile["core_type"]
+        profile["confidence"] = profile["core_type_confidence"]
+        profile["profile_summary"] = format_profile(profile)
+        return profile
+
+
+@lru_cache(maxsize=1)
+def get_quiz_scorer() -> QuizScorer:
+    """The scorer for the configured rule tables (compiled on first use)"""
+    return QuizScorer(settings.QUIZ_QUESTIONS_CSV, settings.QUIZ_SCORING_CSV)
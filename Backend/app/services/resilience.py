@@ -0,0 +1,254 @@
+# ============================================================================
+# RESILIENCE - Keep going when Bedrock is busy, give up quickly when it's down
+# ============================================================================
+# Bedrock sometimes says "slow down" (ThrottlingException) or "not right now"
+# (ServiceUnavailableException). Three things protect us:
+#
+#   1. RETRY WITH BACKOFF - a throttled call is tried again after a short,
+#      growing, random pause (0-0.5s, then 0-1s, 0-2s...). The randomness
+#      ("jitter") stops every waiting request retrying at the same instant.
+#
+#   2. CONCURRENCY LIMIT PER MODEL - at most N calls to one model at a time,
+#      so one busy model can't take every worker thread.
+#
+#   3. CIRCUIT BREAKER - after several calls in a row have failed, we stop
+#      calling the model for a while ("open") and fail straight away instead
+#      of making users wait through retries that won't work. After the pause
+#      one trial call is let through ("half-open"): if it works, everything
+#      goes back to normal ("closed"); if not, we pause again.
+#
+# When a call can't be made, UpstreamUnavailableError is raised; the API
+# answers it with 503 Service Unavailable and a Retry-After header.
+#
+# The counters for every model are in stats() (shown by the health endpoints).
+
+import asyncio  # For the concurrency limits and the pauses between retries
+import random  # For the jitter
+import time  # For timing the breaker's pause
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional  # For type hints
+
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+
+# Error codes that mean "try again later" (stream events spell them in camelCase)
+THROTTLING_CODES = {"ThrottlingException", "TooManyRequestsException"}
+UNAVAILABLE_CODES = {"ServiceUnavailableException", "ModelNotReadyException", "InternalServerException",
+                     "ModelTimeoutException", "ModelStreamErrorException"}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class UpstreamUnavailableError(Exception):
+    """Bedrock can't take this call right now (throttled, down, or circuit open)"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after  # Seconds the caller should wait before trying again
+
+
+def classify(exc: BaseException) -> Optional[str]:
+    """"throttled" or "unavailable" for errors worth retrying, None for anything else"""
+    if isinstance(exc, ClientError):
+        code = exc.response.get("Error", {}).get("Code", "")
+        code = code[:1].upper() + code[1:]
+        if code in THROTTLING_CODES:
+            return "throttled"
+        if code in UNAVAILABLE_CODES:
+            return "unavailable"
+        return None
+    if isinstance(exc, (BotoConnectionError, HTTPClientError)):  # Couldn't reach Bedrock, or it hung up
+        return "unavailable"
+    return None
+
+
+def backoff_delay(attempt: int, base_seconds: float, max_seconds: float, rng: random.Random = random) -> float:
+    """Pause before retry number ``attempt`` (0 = first retry): random, up to base x 2^attempt"""
+    return rng.uniform(0, min(max_seconds, base_seconds * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Stops calls after ``failure_threshold`` failures in a row, for ``reset_seconds``"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False  # Half-open lets exactly one call through
+        self.consecutive_failures = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+            self._state = HALF_OPEN
+            self._trial_running = False
+        return self._state
+
+    def allow(self) -> bool:
+        """May a call go ahead now?"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until calls are let through again"""
+        if self.state == OPEN:
+            return max(self.reset_seconds - (self._clock() - self._opened_at), 0.0)
+        return 0.0 if self.state == CLOSED else 1.0
+
+    def record_success(self) -> None:
+        self._state = CLOSED
+        self._trial_running = False
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self._state != OPEN:
+                self.times_opened += 1
+            self._state = OPEN
+            self._opened_at = self._clock()
+            self._trial_running = False
+
+    def release(self) -> None:
+        """The call ended without telling us anything about Bedrock's health"""
+        self._trial_running = False
+
+
+class ModelGuard:
+    """Concurrency limit, circuit breaker and counters for one model"""
+
+    def __init__(self, max_concurrency: int, breaker: CircuitBreaker):
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.breaker = breaker
+        self.in_flight = 0
+        self.counters = {"calls": 0, "successes": 0, "failures": 0, "rejected": 0,
+                         "retries": 0, "throttled": 0, "unavailable": 0}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.breaker.state, "in_flight": self.in_flight, "max_concurrency": self.max_concurrency,
+                "consecutive_failures": self.breaker.consecutive_failures,
+                "times_opened": self.breaker.times_opened,
+                "retry_after_seconds": round(self.breaker.retry_after(), 1), **self.counters}
+
+
+class BedrockResilience:
+    """Retries, per-model limits and circuit breakers around Bedrock calls"""
+
+    def __init__(self, max_retries: int = 3, backoff_base_seconds: float = 0.5, backoff_max_seconds: float = 8.0,
+                 max_concurrency_per_model: int = 16, failure_threshold: int = 5, reset_seconds: float = 30.0,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep, rng: Optional[random.Random] = None):
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.max_concurrency_per_model = max_concurrency_per_model
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._guards: Dict[str, ModelGuard] = {}
+
+    def guard(self, model_id: str) -> ModelGuard:
+        guard = self._guards.get(model_id)
+        if guard is None:
+            guard = self._guards[model_id] = ModelGuard(
+                self.max_concurrency_per_model, CircuitBreaker(self.failure_threshold, self.reset_seconds))
+        return guard
+
+    def _admit(self, model_id: str, guard: ModelGuard) -> None:
+        """Fail fast while the model's circuit is open"""
+        if not guard.breaker.allow():
+            guard.counters["rejected"] += 1
+            raise UpstreamUnavailableError(
+                f"{model_id} is temporarily unavailable (circuit open)", guard.breaker.retry_after())
+
+    def _failed_attempt(self, model_id: str, guard: ModelGuard, exc: Exception, kind: str,
+                        attempt: int, max_retries: int, final: bool) -> float:
+        """Count a retryable failure; raise if we're giving up, else return the pause before retrying"""
+        guard.counters[kind] += 1
+        if final or attempt >= max_retries or guard.breaker.state != CLOSED:
+            guard.breaker.record_failure()
+            guard.counters["failures"] += 1
+            retry_after = max(guard.breaker.retry_after(), self.backoff_base_seconds * 2 ** attempt)
+            raise UpstreamUnavailableError(f"{model_id} is {kind}: {exc}", retry_after) from exc
+        guard.counters["retries"] += 1
+        return backoff_delay(attempt, self.backoff_base_seconds, self.backoff_max_seconds, self._rng)
+
+    async def call(self, model_id: str, attempt: Callable[[], Awaitable[Any]],
+                   max_retries: Optional[int] = None) -> Any:
+        """
+        Run ``attempt()`` (one Bedrock call) with retries, the model's limit and its breaker
+        max_retries overrides the usual number of retries (e.g. 0 when there's
+        another model to fall back to).
+        """
+        guard = self.guard(model_id)
+        guard.counters["calls"] += 1
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for number in range(max_retries + 1):
+            self._admit(model_id, guard)
+            try:
+                async with guard.semaphore:
+                    guard.in_flight += 1
+                    try:
+                        result = await attempt()
+                    finally:
+                        guard.in_flight -= 1
+            except Exception as exc:
+                kind = classify(exc)
+                if kind is None:
+                    guard.breaker.release()
+                    raise
+                await self._sleep(self._failed_attempt(model_id, guard, exc, kind, number, max_retries, final=False))
+                continue
+            except BaseException:  # Cancelled
+                guard.breaker.release()
+                raise
+            guard.breaker.record_success()
+            guard.counters["successes"] += 1
+            return result
+
+    async def stream(self, model_id: str, open_stream: Callable[[], AsyncIterator[Any]],
+                     max_retries: Optional[int] = None) -> AsyncIterator[Any]:
+        """
+        Like call(), for streamed answers
+        A stream is only retried if it failed before its first piece - after
+        that the user has already seen part of the answer.
+        """
+        guard = self.guard(model_id)
+        guard.counters["calls"] += 1
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for number in range(max_retries + 1):
+            self._admit(model_id, guard)
+            started = False
+            try:
+                async with guard.semaphore:
+                    guard.in_flight += 1
+                    try:
+                        async for piece in open_stream():
+                            started = True
+                            yield piece
+                    finally:
+                        guard.in_flight -= 1
+            except Exception as exc:
+                kind = classify(exc)
+                if kind is None:
+                    guard.breaker.release()
+                    raise
+                await self._sleep(self._failed_attempt(model_id, guard, exc, kind, number, max_retries, final=started))
+                continue
+            except BaseException:  # Cancelled, or the listener went away
+                guard.breaker.release()
+                raise
+            guard.breaker.record_success()
+            guard.counters["successes"] += 1
+            return
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Counters and breaker state for every model used so far"""
+        return {model_id: guard.stats() for model_id, guard in self._guards.items()}
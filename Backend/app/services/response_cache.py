@@ -0,0 +1,103 @@
+# ============================================================================
+# RESPONSE CACHE - Remember Claude's answers to questions we've seen before
+# ============================================================================
+# Calling Claude takes seconds and costs money. When the exact same question
+# comes in again (same coach, same instructions, same user profile) we can
+# hand back the answer we got last time in microseconds instead.
+#
+# The cache forgets answers after a while (TTL) so coaching doesn't go stale,
+# and it only keeps a fixed number of answers (LRU: the least recently used
+# answer is dropped first) so it can't eat all the server's memory.
+
+import hashlib  # For turning long prompts into short fingerprints
+import json  # For turning the profile dict into stable text
+import time  # For knowing when an answer has expired
+from collections import OrderedDict  # A dict that remembers order (for LRU)
+from typing import Any, Dict, List, Optional, Tuple  # For type hints
+
+CacheKey = Tuple[str, str, str, str, str]
+
+
+class ResponseCache:
+    """
+    Time-limited, size-limited cache of Claude replies
+    Keeps hit/miss counters so we can see how much Claude work it saves.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries  # 0 turns the cache off
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, str]]" = OrderedDict()
+
+        # Counters for the health endpoints
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # Dropped because the cache was full
+        self.expirations = 0  # Dropped because they were too old
+
+    @staticmethod
+    def make_key(personality: str, system_prompt: str, message: str, profile: Optional[dict] = None,
+                 history: Optional[List[Dict[str, str]]] = None) -> CacheKey:
+        """
+        Build the lookup key for one request
+        The message is normalized (case and extra spaces ignored) so small
+        typing differences still count as the same question. The earlier
+        turns sent along with it are part of the key too - the same question
+        can deserve a different answer later in a conversation.
+        """
+        normalized_message = " ".join(message.casefold().split())
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        profile_hash = hashlib.sha256(
+            json.dumps(profile, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest() if profile else ""
+        history_hash = hashlib.sha256(
+            json.dumps(history, sort_keys=True).encode("utf-8")
+        ).hexdigest() if history else ""
+        return (personality.lower(), prompt_hash, normalized_message, profile_hash, history_hash)
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        """Return the cached reply, or None if we don't have a fresh one"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, reply = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)  # Mark as recently used
+        self.hits += 1
+        return reply
+
+    def set(self, key: CacheKey, reply: str) -> None:
+        """Remember a reply, dropping the least recently used one if full"""
+        if self.max_entries <= 0:
+            return
+
+        self._entries[key] = (time.monotonic(), reply)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Forget every cached reply (counters are kept)"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Numbers for the health endpoints"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
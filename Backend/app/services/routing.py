@@ -0,0 +1,134 @@
+# ============================================================================
+# KEYWORD ROUTER - Decide which coach a message is about, in one pass
+# ============================================================================
+# Hanif (Architect), Fariza (Alchemist) and the "ask both coaches" triggers
+# each have a list of keywords. Instead of checking every keyword one by one
+# against every message, all the lists are compiled ONCE into a single regular
+# expression shaped like a tree of letters (a trie). Reading the message a
+# single time then tells us which keywords appear and how many per coach.
+#
+# Matching rules are the same as the old `keyword in message.lower()` checks:
+# plain substring matches, each keyword counted at most once per message.
+
+import re  # Regular expressions (compiled pattern matching)
+from typing import Dict, FrozenSet, Iterable, List  # For type hints
+
+# ============================================================================
+# VOCABULARIES - The keywords for each coach (edit these to grow the lists)
+# ============================================================================
+ARCHITECT_KEYWORDS = [  # Hanif's keywords - business strategy and systems
+    "scale", "scaling", "systematic", "strategy", "framework", "process",
+    "optimization", "efficiency", "metrics", "analytics", "operations",
+    "growth", "revenue", "profit", "business model", "systems", "structure",
+    "planning", "performance", "data", "roi", "kpi", "funnel", "conversion"
+]
+
+ALCHEMIST_KEYWORDS = [  # Fariza's keywords - branding and personal development
+    "brand", "branding", "personal brand", "authentic", "purpose",
+    "vision", "creativity", "transformation", "energy", "alignment",
+    "intuition", "spiritual", "mindset", "beliefs", "values", "mission",
+    "manifestation", "soul", "heart", "passion", "calling", "identity"
+]
+
+COLLABORATION_KEYWORDS = [  # Requests that need both coaches at once
+    "complete strategy", "full business plan", "end-to-end", "holistic approach",
+    "both perspective", "comprehensive", "everything", "all aspects"
+]
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Turn a list of words into one regex shaped like a letter tree
+    e.g. ["brand", "branding", "beliefs"] -> b(?:eliefs|rand(?:ing)?)
+    Optional endings are greedy, so the longest keyword at a position wins.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # Marks "a keyword ends here"
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:  # A shorter keyword also ends here - the rest is optional
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class KeywordRouter:
+    """
+    Scores a message against several keyword vocabularies in a single scan
+    Build it once (it compiles the regex) and reuse it for every message.
+
+    For small vocabularies Python's built-in substring search is so fast that
+    a handful of `in` checks beats the regex, so below `regex_threshold`
+    keywords the router uses those instead (same results either way).
+    """
+
+    def __init__(self, vocabularies: Dict[str, Iterable[str]], regex_threshold: int = 200):
+        self.categories = list(vocabularies)
+
+        # Which categories each keyword belongs to
+        self._keyword_categories: Dict[str, List[str]] = {}
+        for category, words in vocabularies.items():
+            for word in words:
+                word = word.lower()
+                if word:
+                    self._keyword_categories.setdefault(word, []).append(category)
+
+        keywords = list(self._keyword_categories)
+        keyword_set = set(keywords)
+        self._keywords = keywords
+
+        # The scan finds the LONGEST keyword starting at each position. Shorter
+        # keywords starting at the same spot (e.g. "brand" for "branding") are
+        # its prefixes, so we precompute those "comes along for free" sets.
+        self._implied: Dict[str, FrozenSet[str]] = {
+            word: frozenset(word[:end] for end in range(1, len(word) + 1) if word[:end] in keyword_set)
+            for word in keywords
+        }
+
+        # Zero-width lookahead lets matches overlap ("branding" and "brand")
+        self._pattern = None
+        if keywords and len(keywords) >= regex_threshold:
+            self._pattern = re.compile("(?=(" + _trie_pattern(keywords) + "))")
+
+    def matched_keywords(self, message: str) -> FrozenSet[str]:
+        """All keywords that appear anywhere in the message"""
+        if self._pattern is None:  # Small vocabulary - plain substring checks
+            text = message.lower()
+            return frozenset(word for word in self._keywords if word in text)
+        found = set()
+        # findall runs entirely inside the regex engine; we only loop over the
+        # handful of DISTINCT longest matches afterwards
+        for word in set(self._pattern.findall(message.lower())):
+            found |= self._implied[word]
+        return frozenset(found)
+
+    def scan(self, message: str) -> Dict[str, int]:
+        """
+        Count how many different keywords from each category the message contains
+        Returns e.g. {"architect": 2, "alchemist": 0, "collaboration": 0}
+        """
+        scores = dict.fromkeys(self.categories, 0)
+        for word in self.matched_keywords(message):
+            for category in self._keyword_categories[word]:
+                scores[category] += 1
+        return scores
+
+
+# ============================================================================
+# SHARED ROUTER - One compiled router used by the AI service and workflows
+# ============================================================================
+keyword_router = KeywordRouter({
+    "architect": ARCHITECT_KEYWORDS,
+    "alchemist": ALCHEMIST_KEYWORDS,
+    "collaboration": COLLABORATION_KEYWORDS
+})
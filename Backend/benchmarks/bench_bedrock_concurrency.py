@@ -0,0 +1,67 @@
+"""
+Concurrent chat throughput against a local stub Bedrock server.
+
+Each stub call takes a fixed latency. With the old code path (boto3 called
+straight on the event loop) throughput stays flat at ~1/latency no matter how
+many requests are in flight; with the executor-backed path it grows with the
+number of in-flight requests up to BEDROCK_MAX_CONCURRENCY.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_bedrock_concurrency
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.stub_bedrock import StubBedrockServer, configure_environment
+
+
+async def _drive(call, in_flight: int, total: int) -> float:
+    """Issue ``total`` calls keeping ``in_flight`` outstanding; return calls/sec"""
+    queue = iter(range(total))
+
+    async def worker():
+        for _ in queue:
+            await call()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(in_flight)))
+    return total / (time.perf_counter() - started)
+
+
+async def main(latency: float, levels, per_level: int) -> None:
+    stub = StubBedrockServer(latency_seconds=latency).start()
+    configure_environment(stub, BEDROCK_MAX_CONCURRENCY=str(max(levels)))
+
+    from app.services.ai_service import ai_service
+
+    async def non_blocking_call():
+        await ai_service.chat_with_claude("Hello", "architect", has_uploaded_pdf=True, use_cache=False)
+
+    async def blocking_call():
+        # The previous implementation: synchronous boto3 on the event loop
+        response = ai_service.bedrock.invoke_model(modelId="anthropic.claude-stub", body="{}")
+        response["body"].read()
+
+    print(f"stub latency {latency * 1000:.0f} ms, {per_level} requests per level")
+    print(f"{'in-flight':>10} {'blocking req/s':>16} {'executor req/s':>16}")
+    try:
+        for in_flight in levels:
+            total = max(per_level, in_flight)
+            blocking = await _drive(blocking_call, in_flight, total)
+            non_blocking = await _drive(non_blocking_call, in_flight, total)
+            print(f"{in_flight:>10} {blocking:>16.1f} {non_blocking:>16.1f}")
+    finally:
+        ai_service.shutdown()
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.1, help="stub latency in seconds")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=32, help="requests per concurrency level")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.levels, args.requests))
@@ -0,0 +1,178 @@
+"""
+Fault injection: retries, circuit breaker and 503s against a throttling stub.
+
+The stub Bedrock server is told to fail on command, and each scenario checks
+how the resilience layer (app/services/resilience.py) reacts:
+
+1. a couple of throttled calls      -> retried with backoff, the user never sees it
+2. a throttled stream               -> retried before its first piece
+3. Bedrock keeps throttling         -> UpstreamUnavailableError after the retries
+4. ...for several calls in a row    -> circuit opens, later calls fail in ~0 ms
+                                       without reaching Bedrock
+5. Bedrock recovers                 -> one trial call after the pause closes it
+6. per-model limit                  -> never more calls in flight than allowed
+7. load with random throttling      -> success rate and latency, with and
+                                       without retries (breaker off in both)
+8. the HTTP API                     -> 503 with Retry-After, not an apology reply
+
+Every scenario asserts what it expects, so this doubles as a test.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_bedrock_faults
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.stub_bedrock import StubBedrockServer, configure_environment
+
+LIMIT = 4
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    print(f"{'ok  ' if ok else 'FAIL'} {name}{': ' + detail if detail else ''}")
+    assert ok, name
+
+
+async def load(ai_service, expected: str, calls: int, concurrency: int):
+    from app.services.resilience import UpstreamUnavailableError
+
+    latencies, failures = [], 0
+    queue = iter(range(calls))
+
+    async def worker():
+        nonlocal failures
+        for number in queue:
+            started = time.perf_counter()
+            try:
+                reply = await ai_service.chat_with_claude(f"Question {number}", "architect", has_uploaded_pdf=True)
+            except UpstreamUnavailableError:
+                failures += 1
+                continue
+            if reply != expected:
+                raise AssertionError(reply)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, failures
+
+
+async def main(fail_rate: float, calls: int, concurrency: int) -> None:
+    stub = StubBedrockServer(latency_seconds=0.02).start()
+    configure_environment(stub, RESPONSE_CACHE_MAX_ENTRIES="0", BEDROCK_MAX_RETRIES="3",
+                          BEDROCK_BACKOFF_BASE_SECONDS="0.05", BEDROCK_BACKOFF_MAX_SECONDS="0.4",
+                          BEDROCK_BREAKER_FAILURES="3", BEDROCK_BREAKER_RESET_SECONDS="1",
+                          BEDROCK_MODEL_MAX_CONCURRENCY=str(LIMIT))
+
+    from app.core.config import settings
+    from app.services.ai_service import ai_service
+    from app.services.resilience import BedrockResilience, UpstreamUnavailableError
+
+    model = settings.CLAUDE_MODEL_ID
+    guard = ai_service.resilience.guard(model)
+
+    async def chat(text="Hello"):
+        return await ai_service.chat_with_claude(text, "architect", has_uploaded_pdf=True)
+
+    try:
+        stub.fail(2)
+        reply = await chat()
+        check("1. throttled twice, then answered", reply == stub.reply_text and guard.counters["retries"] == 2,
+              f"{stub.errors_returned} throttles, {guard.counters['retries']} retries")
+
+        stub.fail(1)
+        pieces = [piece async for piece in ai_service.stream_chat_with_claude("Hi", "architect", has_uploaded_pdf=True)]
+        check("2. throttled stream retried", "".join(pieces) == stub.reply_text)
+
+        stub.fail(None)
+        served = stub.requests_served
+        started = time.perf_counter()
+        try:
+            await chat()
+            raised = None
+        except UpstreamUnavailableError as e:
+            raised = e
+        check("3. gives up after retries", raised is not None and stub.requests_served - served == 4,
+              f"{stub.requests_served - served} attempts in {(time.perf_counter() - started) * 1000:.0f} ms, "
+              f"retry after {raised.retry_after if raised else 0:.2f}s")
+
+        for _ in range(2):
+            try:
+                await chat()
+            except UpstreamUnavailableError:
+                pass
+        served = stub.requests_served
+        started = time.perf_counter()
+        try:
+            await chat()
+        except UpstreamUnavailableError as e:
+            raised = e
+        elapsed = (time.perf_counter() - started) * 1000
+        check("4. circuit open, fails fast", guard.breaker.state == "open" and stub.requests_served == served,
+              f"{elapsed:.2f} ms, no request sent, retry after {raised.retry_after:.2f}s")
+
+        stub.recover()
+        await asyncio.sleep(settings.BEDROCK_BREAKER_RESET_SECONDS)
+        check("5. half-open trial closes it", await chat() == stub.reply_text and guard.breaker.state == "closed",
+              f"opened {guard.breaker.times_opened}x")
+
+        peak = 0
+
+        async def watch():
+            nonlocal peak
+            while True:
+                peak = max(peak, guard.in_flight)
+                await asyncio.sleep(0.001)
+
+        watcher = asyncio.create_task(watch())
+        await asyncio.gather(*(chat(f"parallel {n}") for n in range(LIMIT * 3)))
+        watcher.cancel()
+        check("6. per-model limit", peak <= LIMIT, f"peak {peak} in flight, limit {LIMIT}")
+
+        print(f"\n7. {calls} calls, {concurrency} concurrent, {fail_rate:.0%} of requests throttled at random")
+        print(f"{'':>12} {'succeeded':>10} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, max_retries in (("no retries", 0), ("retries", settings.BEDROCK_MAX_RETRIES)):
+            # Same settings in both arms, breaker off: this compares retries
+            # alone (scenarios 4 and 5 cover the breaker)
+            resilience = BedrockResilience(
+                max_retries=max_retries, backoff_base_seconds=settings.BEDROCK_BACKOFF_BASE_SECONDS,
+                backoff_max_seconds=settings.BEDROCK_BACKOFF_MAX_SECONDS, max_concurrency_per_model=LIMIT,
+                failure_threshold=calls + 1, reset_seconds=settings.BEDROCK_BREAKER_RESET_SECONDS)
+            ai_service.resilience, original = resilience, ai_service.resilience
+            stub.fail_rate = fail_rate
+            try:
+                latencies, failures = await load(ai_service, stub.reply_text, calls, concurrency)
+            finally:
+                stub.recover()
+                ai_service.resilience = original
+            cuts = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else [0] * 19
+            print(f"{name:>12} {len(latencies) / calls:>10.0%} {cuts[9] * 1000:>8.0f} {cuts[18] * 1000:>8.0f}")
+            print(f"{'':>12} metrics: {resilience.stats()}")
+
+        # Last: the test client runs the app on its own event loop
+        from fastapi.testclient import TestClient
+        from app.api.bedrock import user_sessions
+        from app.main import app
+
+        user_sessions["anonymous"] = {"has_uploaded_pdf": True}
+        stub.fail(None)
+        with TestClient(app) as client:
+            response = client.post("/api/v1/chat/architect", json={"message": "How do I scale?"})
+        stub.recover()
+        check("8. API answers 503", response.status_code == 503 and "Retry-After" in response.headers,
+              f"{response.status_code}, Retry-After {response.headers.get('Retry-After')}")
+    finally:
+        ai_service.shutdown()
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fail-rate", type=float, default=0.3)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.fail_rate, args.calls, args.concurrency))
@@ -0,0 +1,88 @@
+"""
+Turn latency when both coaches answer: one after the other vs in parallel.
+
+Runs conversation turns through the orchestrator against the stub Bedrock
+server (each answer takes --latency seconds plus a little per word):
+
+* single      - one coach answers (the architect endpoint), for reference
+* sequential  - Hanif's collaboration prompt, then Fariza's, one after the other
+* parallel    - the graph's collaboration branch (both at once, then merged)
+
+Parallel should take about as long as a single answer - max(architect,
+alchemist) - rather than the two added together. Also checks the merged
+reply contains both coaches' sections.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_collaboration
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.stub_bedrock import StubBedrockServer, configure_environment
+
+QUESTION = "How do I scale my operations without losing what makes the business mine?"
+
+
+async def main(latency: float, turns: int) -> None:
+    stub = StubBedrockServer(latency_seconds=latency, token_delay_seconds=0.01).start()
+    configure_environment(stub, RESPONSE_CACHE_MAX_ENTRIES="0", CONVERSATION_STORE="memory")
+
+    from app.services.ai_service import ai_service
+    from app.services.langgraph.context import build_context
+    from app.services.langgraph.orchestrator import orchestrator
+    from app.services.langgraph.state import state_manager
+    from app.services.langgraph.workflows import workflow_engine
+
+    async def single(conversation_id: str) -> dict:
+        return await orchestrator.process_conversation(conversation_id, QUESTION, "architect")
+
+    async def sequential(conversation_id: str) -> dict:
+        """Both collaboration prompts, awaited one after the other"""
+        await state_manager.add_message(conversation_id, "user", QUESTION)
+        state = await state_manager.get_conversation(conversation_id)
+        context = build_context(state)
+        prompts = workflow_engine.get_collaboration_prompt(QUESTION, context["summary"] or "")
+        answers = [await ai_service.chat_with_claude(prompts[agent], agent, state["edna_profile"], True,
+                                                     history=context["history"], redirect=False)
+                   for agent in ("architect", "alchemist")]
+        await state_manager.add_message(conversation_id, "assistant", "\n\n---\n\n".join(answers), "both")
+        return {"success": True}
+
+    async def parallel(conversation_id: str) -> dict:
+        result = await orchestrator.process_conversation(conversation_id, QUESTION, None, collaboration=True)
+        assert result["collaboration_mode"] and result["agent"] == "both", result
+        assert "Hanif Khan" in result["response"] and "Fariza Javed" in result["response"], result["response"]
+        return result
+
+    print(f"stub: {latency * 1000:.0f} ms to first token + 10 ms per word; {turns} turns per mode\n")
+    print(f"{'mode':>11} {'mean ms':>8} {'p50 ms':>7} {'max ms':>7} {'vs single':>10}")
+    try:
+        baseline = None
+        for name, turn in (("single", single), ("sequential", sequential), ("parallel", parallel)):
+            conversation_id = await state_manager.create_conversation(user_id=1)
+            await state_manager.update_conversation_edna(conversation_id, {"edna_type": "Architect", "confidence": 0.9})
+            timings = []
+            for _ in range(turns):
+                started = time.perf_counter()
+                result = await turn(conversation_id)
+                timings.append(time.perf_counter() - started)
+                assert result["success"], result
+            mean = statistics.mean(timings)
+            baseline = baseline or mean
+            print(f"{name:>11} {mean * 1000:>8.0f} {statistics.median(timings) * 1000:>7.0f} "
+                  f"{max(timings) * 1000:>7.0f} {mean / baseline:>9.2f}x")
+    finally:
+        ai_service.shutdown()
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.turns))
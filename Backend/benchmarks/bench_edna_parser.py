@@ -0,0 +1,99 @@
+"""
+E-DNA report parsing: keyword analysis vs the structured six-layer parser.
+
+Builds a corpus of made-up reports (random six-layer profiles, some with
+"Layer N:" headings, filler before and after, a share with missing sections)
+and compares over the whole corpus:
+
+* keyword    - the old analysis: first of "architect", "alchemist", "blurred"
+               anywhere in the text, plus the first 500 characters for prompts
+* structured - parse_edna_report, one regex pass for all six layers
+
+Reports throughput, per-layer accuracy against the generated profiles and
+how many characters each analysis adds to a system prompt.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_edna_parser
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.sample_pdf import LAYERS, profile_lines, random_profile
+
+FILLER = "Line {}: strategy, systems and growth notes for your visual entrepreneurial profile."
+
+
+def keyword_analysis(text: str) -> dict:
+    """analyze_edna_results before the structured parser"""
+    text_lower = text.lower()
+    edna_type = next((k.capitalize() for k in ("architect", "alchemist", "blurred") if k in text_lower), "Unknown")
+    return {
+        "edna_type": edna_type,
+        "confidence": 0.9 if edna_type != "Unknown" else 0.0,
+        "full_text": text[:500] + "..." if len(text) > 500 else text
+    }
+
+
+def build_corpus(size: int, filler_lines: int, seed: int):
+    """(report text, expected profile) pairs; one in five reports lacks a layer"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        profile = random_profile(rng)
+        omit = [rng.choice(LAYERS[1:])] if rng.random() < 0.2 else []  # Anything but the core type
+        lines = profile_lines(profile, numbered=rng.random() < 0.5, omit=omit)
+        profile.update(dict.fromkeys(omit))
+        before = [FILLER.format(n) for n in range(rng.randint(0, filler_lines))]
+        after = [FILLER.format(n) for n in range(filler_lines)]
+        corpus.append(("\n".join(before + lines + after), profile))
+    return corpus
+
+
+def timed(fn, corpus, repeat: int):
+    best, results = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [fn(text) for text, _ in corpus]
+        best = min(best, time.perf_counter() - started)
+    return best, results
+
+
+def main(size: int, filler_lines: int, repeat: int, seed: int) -> None:
+    from app.services.edna_parser import parse_edna_report
+
+    corpus = build_corpus(size, filler_lines, seed)
+    megabytes = sum(len(text) for text, _ in corpus) / 1e6
+    keyword_time, keyword_results = timed(keyword_analysis, corpus, repeat)
+    parser_time, parser_results = timed(parse_edna_report, corpus, repeat)
+
+    print(f"{size} reports, {megabytes:.1f} MB of text")
+    print(f"{'analysis':>11} {'reports/s':>10} {'MB/s':>7} {'prompt chars':>13}")
+    for name, elapsed, results, prompt in (
+        ("keyword", keyword_time, keyword_results, lambda r: len(str(r))),
+        ("structured", parser_time, parser_results, lambda r: len(r["profile_summary"]))
+    ):
+        chars = sum(prompt(result) for result in results) / size
+        print(f"{name:>11} {size / elapsed:>10.0f} {megabytes / elapsed:>7.1f} {chars:>13.0f}")
+
+    print(f"\n{'layer':>16} {'keyword acc':>12} {'structured acc':>15}")
+    for layer in LAYERS:
+        structured = sum(result[layer] == profile[layer] for result, (_, profile) in zip(parser_results, corpus))
+        keyword = "-"
+        if layer == "core_type":
+            hits = sum(result["edna_type"] == profile["core_type"]
+                       for result, (_, profile) in zip(keyword_results, corpus))
+            keyword = f"{hits / size:.1%}"
+        print(f"{layer:>16} {keyword:>12} {structured / size:>15.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reports", type=int, default=2000)
+    parser.add_argument("--filler-lines", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.reports, args.filler_lines, args.repeat, args.seed)
@@ -0,0 +1,84 @@
+"""
+Keyword routing: per-keyword substring scans vs the compiled KeywordRouter.
+
+Compares the old approach (``keyword in message_lower`` for every keyword of
+every category) with ``KeywordRouter.scan`` over growing message lengths and
+vocabulary sizes, and checks both give identical scores. Large vocabularies
+are the real lists padded with synthetic marketing-style keywords.
+
+The "trie regex" column forces the compiled automaton for every size; the
+"router" column is what production uses (substring checks below the
+router's regex_threshold, the automaton above it).
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_keyword_router
+"""
+
+import argparse
+import random
+import string
+import timeit
+
+from app.services.routing import (
+    ALCHEMIST_KEYWORDS, ARCHITECT_KEYWORDS, COLLABORATION_KEYWORDS, KeywordRouter
+)
+
+
+def naive_scan(vocabularies, message):
+    message_lower = message.lower()
+    return {
+        category: sum(1 for keyword in words if keyword in message_lower)
+        for category, words in vocabularies.items()
+    }
+
+
+def grow_vocabularies(size: int, rng: random.Random):
+    """Pad each real list with synthetic keywords until it has ``size`` entries"""
+    grown = {}
+    for category, words in (("architect", ARCHITECT_KEYWORDS),
+                            ("alchemist", ALCHEMIST_KEYWORDS),
+                            ("collaboration", COLLABORATION_KEYWORDS)):
+        extra = set()
+        while len(words) + len(extra) < size:
+            extra.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12))))
+        grown[category] = list(words) + sorted(extra)
+    return grown
+
+
+def make_message(length: int, rng: random.Random) -> str:
+    filler = ["our", "team", "needs", "a", "clear", "plan", "for", "next", "quarter",
+              "brand", "growth", "soul", "metrics", "customers", "launch", "pricing"]
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(rng.choice(filler))
+    return " ".join(words)[:length]
+
+
+def main(lengths, sizes, repeat: int) -> None:
+    rng = random.Random(42)
+    print(f"{'vocab/cat':>10} {'msg chars':>10} {'naive us':>10} {'trie regex us':>14} {'router us':>10} {'speedup':>8}")
+
+    def best(fn):
+        return min(timeit.repeat(fn, number=repeat, repeat=3)) / repeat
+
+    for size in sizes:
+        vocabularies = grow_vocabularies(size, rng)
+        router = KeywordRouter(vocabularies)
+        automaton = KeywordRouter(vocabularies, regex_threshold=0)
+        for length in lengths:
+            message = make_message(length, rng)
+            assert naive_scan(vocabularies, message) == router.scan(message) == automaton.scan(message)
+            naive = best(lambda: naive_scan(vocabularies, message))
+            regex = best(lambda: automaton.scan(message))
+            routed = best(lambda: router.scan(message))
+            print(f"{size:>10} {length:>10} {naive * 1e6:>10.1f} {regex * 1e6:>14.1f} {routed * 1e6:>10.1f} {naive / routed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[200, 2000, 20000])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 300, 3000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.lengths, args.sizes, args.repeat)
@@ -0,0 +1,105 @@
+"""
+Chat latency when one model slows down: pinned to CLAUDE_MODEL_ID vs the model router.
+
+Three main models in three regions (all served by the stub Bedrock server,
+with different speeds) plus a cheaper "light" model. A steady stream of chat
+messages - some of them short ("Thanks!") - runs through three phases:
+
+1. normal     - every model answers at its usual speed
+2. slowdown   - the usual best model (CLAUDE_MODEL_ID) becomes very slow
+3. recovered  - it's back to normal
+
+for two setups:
+
+* pinned  - CLAUDE_MODEL_ID only, as before the router
+* routed  - ModelRouter over all of them (short turns to the light model)
+
+and reports p50 / p95 / p99 latency and where the calls went in each phase.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_model_routing
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from benchmarks.stub_bedrock import StubBedrockServer, configure_environment
+
+MAIN, SECOND, THIRD, LIGHT = "anthropic.claude-a", "anthropic.claude-b", "anthropic.claude-c", "anthropic.claude-light"
+SPEEDS = {MAIN: 0.06, SECOND: 0.08, THIRD: 0.1, LIGHT: 0.03}  # Seconds to first token
+QUESTION = "How should I scale my operations and improve revenue metrics next quarter?"
+
+
+async def run_phase(ai_service, seconds: float, concurrency: int, short_share: float, rng: random.Random):
+    """Closed-loop chat traffic for ``seconds``; returns the latency of every call"""
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            message = "Thanks, that helps!" if rng.random() < short_share else QUESTION
+            started = time.perf_counter()
+            reply = await ai_service.chat_with_claude(message, "architect", has_uploaded_pdf=True)
+            assert reply.startswith("**The root problem here:**"), reply
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def main(phase_seconds: float, slow_seconds: float, concurrency: int, short_share: float) -> None:
+    stub = StubBedrockServer().start()
+    stub.latency_by_model.update(SPEEDS)
+    configure_environment(stub, CLAUDE_MODEL_ID=MAIN, RESPONSE_CACHE_MAX_ENTRIES="0",
+                          BEDROCK_ROUTING_WINDOW_SECONDS=str(phase_seconds / 2),
+                          BEDROCK_MODEL_IDS=f"{SECOND}@eu-central-1,{THIRD}@eu-west-3", BEDROCK_LIGHT_MODEL_IDS=LIGHT)
+
+    from app.core.config import settings
+    from app.services.ai_service import ai_service
+    from app.services.model_router import ModelRouter, parse_endpoints
+    from app.services.resilience import BedrockResilience
+
+    setups = {
+        "pinned": ([settings.CLAUDE_MODEL_ID], []),
+        "routed": ([settings.CLAUDE_MODEL_ID, settings.BEDROCK_MODEL_IDS], [settings.BEDROCK_LIGHT_MODEL_IDS])
+    }
+    speeds = ", ".join(f"{model.split('.')[-1]} {speed * 1000:.0f}" for model, speed in SPEEDS.items())
+    print(f"models (ms to first token): {speeds}; "
+          f"{concurrency} users, {short_share:.0%} short turns, {phase_seconds:.0f}s per phase, "
+          f"claude-a slows to {slow_seconds * 1000:.0f} ms in phase 2\n")
+    print(f"{'setup':>7} {'phase':>10} {'calls':>6} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}  calls per model")
+    try:
+        for name, (main_specs, light_specs) in setups.items():
+            ai_service.resilience = BedrockResilience(max_concurrency_per_model=settings.BEDROCK_MODEL_MAX_CONCURRENCY)
+            ai_service.router = ModelRouter(
+                parse_endpoints(main_specs, settings.AWS_REGION),
+                parse_endpoints(light_specs, settings.AWS_REGION, light=True),
+                ai_service.resilience, window_seconds=settings.BEDROCK_ROUTING_WINDOW_SECONDS)
+            rng = random.Random(0)
+            for phase, main_speed in (("normal", SPEEDS[MAIN]), ("slowdown", slow_seconds),
+                                      ("recovered", SPEEDS[MAIN])):
+                stub.latency_by_model[MAIN] = main_speed
+                stub.served_by_model.clear()
+                latencies = await run_phase(ai_service, phase_seconds, concurrency, short_share, rng)
+                cuts = statistics.quantiles(latencies, n=100)
+                spread = " ".join(f"{model.split('.')[-1]}={count}" for model, count in sorted(stub.served_by_model.items()))
+                print(f"{name:>7} {phase:>10} {len(latencies):>6} {cuts[49] * 1000:>7.0f} {cuts[94] * 1000:>7.0f} "
+                      f"{cuts[98] * 1000:>7.0f}  {spread}")
+        print(f"\nrouter stats: {ai_service.router.stats()}")
+    finally:
+        ai_service.shutdown()
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--phase-seconds", type=float, default=4.0)
+    parser.add_argument("--slow-seconds", type=float, default=0.6)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--short-share", type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(main(args.phase_seconds, args.slow_seconds, args.concurrency, args.short_share))
@@ -0,0 +1,69 @@
+"""
+E-DNA analysis: full extraction vs early-terminating page scan.
+
+For generated reports of growing length (six-layer profile on page 1, like
+the real results PDFs), compares:
+
+* ``+=``    - the old extract_text_from_pdf loop, then analyze_edna_results
+* join      - iter_page_texts joined once, then analyze_edna_results
+* scan      - scan_edna_pages, which stops once every layer section is read
+
+and checks all three give the same analysis. Runs in-process (no worker
+pool) so only the parsing work is measured.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_pdf_early_termination
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import PyPDF2
+
+from benchmarks.sample_pdf import build_pdf, report_pages
+
+
+def concat_extract(file_path: str) -> str:
+    with open(file_path, 'rb') as file:
+        text = ""
+        for page in PyPDF2.PdfReader(file).pages:
+            text += page.extract_text()
+        return text
+
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(page_counts, repeat: int) -> None:
+    from app.services.pdf_service import iter_page_texts, pdf_service, scan_edna_pages
+
+    print(f"{'pages':>6} {'+= ms':>8} {'join ms':>8} {'scan ms':>8} {'pages read':>11} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for page_count in page_counts:
+            path = os.path.join(directory, f"report-{page_count}.pdf")
+            with open(path, "wb") as pdf:
+                pdf.write(build_pdf(report_pages(page_count, edna_type="Alchemist")))
+
+            concat_time, old = timed(lambda: pdf_service.analyze_edna_results(concat_extract(path)), repeat)
+            join_time, joined = timed(lambda: pdf_service.analyze_edna_results("".join(iter_page_texts(path))), repeat)
+            scan_time, (scanned, pages_read) = timed(lambda: scan_edna_pages(iter_page_texts(path)), repeat)
+            assert old == joined == scanned, (old, joined, scanned)
+            print(f"{page_count:>6} {concat_time * 1000:>8.1f} {join_time * 1000:>8.1f} {scan_time * 1000:>8.1f} "
+                  f"{pages_read:>11} {concat_time / scan_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.pages, args.repeat)
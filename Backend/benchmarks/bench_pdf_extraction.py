@@ -0,0 +1,74 @@
+"""
+PDF analysis: inline PyPDF2 parsing vs PDFService.scan_edna_async.
+
+While a generated report is analyzed, a ticker task wakes every 5 ms and
+records how late it was. That lateness is what every other user's request
+(chat, streaming tokens) feels during an upload. Inline parsing stalls the
+loop for the whole parse; the worker processes keep it responsive. The
+filler reports have no layer sections, so every page is read.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_pdf_extraction
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.sample_pdf import build_pdf, report_pages
+
+
+async def with_ticker(work):
+    """Run ``work()`` while measuring the event loop's worst wake-up delay"""
+    worst = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal worst
+        while running:
+            expected = time.perf_counter() + 0.005
+            await asyncio.sleep(0.005)
+            worst = max(worst, time.perf_counter() - expected)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    result = await work()
+    elapsed = time.perf_counter() - started
+    running = False
+    await task
+    return result, elapsed, worst
+
+
+async def main(page_counts) -> None:
+    from app.services.pdf_service import PDFService, iter_page_texts, scan_edna_pages
+
+    print(f"{'pages':>6} {'mode':>12} {'wall s':>8} {'worst loop stall ms':>20}")
+    with tempfile.TemporaryDirectory() as directory:
+        service = PDFService(directory)
+        for page_count in page_counts:
+            path = os.path.join(directory, f"report-{page_count}.pdf")
+            with open(path, "wb") as pdf:
+                pdf.write(build_pdf(report_pages(page_count)))
+
+            async def run_inline():
+                return scan_edna_pages(iter_page_texts(path))[0]
+
+            expected, elapsed, stall = await with_ticker(run_inline)
+            print(f"{page_count:>6} {'inline':>12} {elapsed:>8.3f} {stall * 1000:>20.1f}")
+
+            await service.scan_edna_async(path)  # Warm up: start the workers
+            analysis, elapsed, stall = await with_ticker(lambda: service.scan_edna_async(path, timeout=300))
+            assert analysis == expected
+            print(f"{page_count:>6} {'worker':>12} {elapsed:>8.3f} {stall * 1000:>20.1f}")
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 40, 200])
+    args = parser.parse_args()
+    asyncio.run(main(args.pages))
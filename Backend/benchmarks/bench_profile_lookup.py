@@ -0,0 +1,135 @@
+"""
+E-DNA profile lookups under concurrent load: pooled vs per-request connections.
+
+Fills a database with users, each with a profile, a quiz session and one
+answer per quiz question, then runs many concurrent "requests" (one session
+each, like the get_db dependency) and reports throughput and p50/p95 latency
+for:
+
+* profile by user      - pooled engine (create_database_engine) vs NullPool
+                         (a new connection for every request)
+* answers for a quiz   - with vs without the composite
+                         (quiz_session_id, question_id) index
+
+Defaults to a temporary SQLite file; pass --database-url to run against
+Postgres (needs asyncpg; its E-DNA tables are dropped and recreated).
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_profile_lookup
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+
+def fill(url: str, users: int, questions: int) -> None:
+    """Create the tables and bulk-insert the test rows (synchronously)"""
+    from app.models.edna_models import Base, EDNAProfile, EDNAQuestion, EDNAResponse, QuizSession
+
+    engine = create_engine(url.replace("+aiosqlite", "").replace("+asyncpg", ""))
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = random.Random(0)
+    with engine.begin() as connection:
+        connection.execute(insert(EDNAQuestion), [
+            {"id": q, "question_text": f"Question {q}", "question_type": "core_type", "layer": 1,
+             "options": ["A", "B", "C", "D"], "order_index": q} for q in range(1, questions + 1)])
+        connection.execute(insert(QuizSession), [
+            {"session_id": f"quiz-{user}", "user_id": user, "total_questions": questions,
+             "questions_answered": questions, "is_completed": True} for user in range(users)])
+        connection.execute(insert(EDNAProfile), [
+            {"user_id": user, "quiz_session_id": f"quiz-{user}", "core_type": rng.choice(["architect", "alchemist"]),
+             "core_type_confidence": 0.9, "subtype": "master-strategist", "learning_styles": ["visual"],
+             "overall_confidence": 0.8, "completion_percentage": 100.0} for user in range(users)])
+        for start in range(0, users, 2000):
+            connection.execute(insert(EDNAResponse), [
+                {"user_id": user, "quiz_session_id": f"quiz-{user}", "question_id": q,
+                 "selected_option": rng.choice("ABCD"), "response_time_ms": rng.randint(500, 9000)}
+                for user in range(start, min(start + 2000, users)) for q in range(1, questions + 1)])
+    engine.dispose()
+
+
+async def run(session_factory, query, users: int, requests: int, concurrency: int):
+    """``requests`` lookups from ``concurrency`` workers; returns (per second, latencies in ms)"""
+    rng = random.Random(1)
+    user_ids = [rng.randrange(users) for _ in range(requests)]
+    latencies = []
+
+    async def worker(ids):
+        for user_id in ids:
+            started = time.perf_counter()
+            async with session_factory() as session:
+                await query(session, user_id)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(user_ids[i::concurrency]) for i in range(concurrency)))
+    return requests / (time.perf_counter() - started), latencies
+
+
+def report(name: str, rate: float, latencies) -> None:
+    cuts = statistics.quantiles(latencies, n=20)
+    print(f"{name:>28} {rate:>9.0f} {cuts[9]:>8.2f} {cuts[18]:>8.2f}")
+
+
+async def main(url: str, users: int, questions: int, requests: int, concurrency: int) -> None:
+    from app.core.database import create_database_engine
+    from app.models.edna_models import EDNAProfile, EDNAResponse
+
+    started = time.perf_counter()
+    fill(url, users, questions)
+    print(f"{users} users, {users * questions} answers loaded in {time.perf_counter() - started:.1f}s; "
+          f"{requests} requests, {concurrency} concurrent\n")
+
+    async def profile(session, user_id):
+        found = await session.scalar(select(EDNAProfile).where(EDNAProfile.user_id == user_id))
+        assert found.user_id == user_id
+
+    async def answers(session, user_id):
+        rows = (await session.execute(
+            select(EDNAResponse.question_id, EDNAResponse.selected_option)
+            .where(EDNAResponse.quiz_session_id == f"quiz-{user_id}")
+            .order_by(EDNAResponse.question_id))).all()
+        assert len(rows) == questions
+
+    print(f"{'':>28} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    pooled = create_database_engine(url, pool_size=concurrency, max_overflow=0)
+    unpooled = create_database_engine(url, poolclass=NullPool)
+    try:
+        for name, engine in (("profile by user (pooled)", pooled), ("profile by user (NullPool)", unpooled)):
+            factory = async_sessionmaker(engine, expire_on_commit=False)
+            await run(factory, profile, users, concurrency * 4, concurrency)  # Warm up
+            report(name, *await run(factory, profile, users, requests, concurrency))
+
+        factory = async_sessionmaker(pooled, expire_on_commit=False)
+        report("answers for quiz (indexed)", *await run(factory, answers, users, requests, concurrency))
+        async with pooled.begin() as connection:
+            await connection.execute(text("DROP INDEX ix_edna_responses_session_question"))
+        slow_requests = max(concurrency, requests // 100)  # Full table scans: run fewer
+        report("answers for quiz (no index)", *await run(factory, answers, users, slow_requests, concurrency))
+    finally:
+        await pooled.dispose()
+        await unpooled.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="Database to use (default: a temporary SQLite file)")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--questions", type=int, default=22)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.database_url or "sqlite+aiosqlite:///" + os.path.join(directory, "edna.db")
+        asyncio.run(main(url, args.users, args.questions, args.requests, args.concurrency))
@@ -0,0 +1,161 @@
+"""
+Prompt size and input cost per message: rebuilt f-string prompts vs
+precompiled persona templates with Bedrock prompt caching.
+
+Plays conversations turn by turn (history and summary picked by
+build_context, as the orchestrator does) for three kinds of profile - an
+old upload (type plus 500 characters of PDF text), a six-layer profile and
+none - and compares, per message sent to Claude:
+
+* before - both coaches' prompts rebuilt with the raw profile dict in them,
+           summary appended, no caching
+* after  - persona templates plus the compact profile line; the same prompt
+           without caching, and with caching simulated the way Bedrock
+           bills it: a prefix seen before (within the cache lifetime) costs
+           0.1x, writing a new prefix 1.25x, and prefixes under the minimum
+           cacheable size aren't cached at all
+
+Tokens are estimated at ~4 characters each (langgraph/context.py's
+estimate_tokens); "cost" is in input-token equivalents. Also times building
+the system prompt.
+
+Run from the Backend directory (--min-cache-tokens 256 shows what caching
+saves once the unchanging prefix is big enough to be cached):
+
+    python -m benchmarks.bench_prompt_tokens
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import time
+
+from benchmarks.sample_pdf import profile_lines, random_profile
+
+CACHE_WRITE, CACHE_READ = 1.25, 0.1  # Bedrock's price multipliers for cached input
+
+
+def legacy_system_prompt(personality: str, profile, summary) -> str:
+    """_build_system_prompt + _add_conversation_summary before persona templates"""
+    from app.services.personas import ALCHEMIST, ARCHITECT
+
+    prompts = {}
+    for persona in (ARCHITECT, ALCHEMIST):  # Both were built on every call
+        instructions = persona.instructions.replace(
+            "\n\nTailor your advice to the user's E-DNA profile below.", "").replace(
+            "\n\nTailor your guidance to the user's E-DNA profile below.", "")
+        prompts[persona.name] = instructions.replace(
+            "RESPONSE FORMAT:", f"USER'S E-DNA PROFILE: {profile if profile else persona.default_profile}\n\nRESPONSE FORMAT:")
+    prompt = prompts["alchemist" if personality == "alchemist" else "architect"]
+    return f"{prompt}\n\nEARLIER IN THIS CONVERSATION:\n{summary}" if summary else prompt
+
+
+def segments(system, history, message):
+    """The request as (text, ends at a cache breakpoint) pieces, in order"""
+    pieces = []
+    if isinstance(system, str):
+        pieces.append((system, False))
+    else:
+        pieces.extend((block["text"], "cache_control" in block) for block in system)
+    pieces.extend((turn["content"], False) for turn in history)
+    pieces.append((message, False))
+    return pieces
+
+
+class SimulatedPromptCache:
+    """Bills a request the way Bedrock prompt caching does"""
+
+    def __init__(self, min_tokens: int):
+        self.min_tokens = min_tokens
+        self.prefixes = set()
+
+    def bill(self, pieces, estimate_tokens):
+        total = read = written = 0
+        digest = hashlib.sha256()
+        breakpoints = []
+        for text, breakpoint in pieces:
+            total += estimate_tokens(text)
+            digest.update(text.encode("utf-8"))
+            if breakpoint:
+                breakpoints.append((digest.hexdigest(), total))
+        for key, tokens in reversed(breakpoints):
+            if key in self.prefixes:
+                read = tokens
+                break
+        if breakpoints and breakpoints[-1][1] >= self.min_tokens:
+            written = breakpoints[-1][1] - read
+            self.prefixes.update(key for key, tokens in breakpoints if tokens >= self.min_tokens)
+        return total, (total - read - written) + CACHE_WRITE * written + CACHE_READ * read
+
+
+def conversation(rng: random.Random, turns: int):
+    """Alternating user / coach messages of realistic lengths"""
+    words = "scale offer pricing brand team systems launch audience funnel clarity energy revenue".split()
+    for turn in range(turns):
+        yield " ".join(rng.choice(words) for _ in range(rng.randint(12, 40))) + "?"
+        yield " ".join(rng.choice(words) for _ in range(rng.randint(80, 220))) + "."
+
+
+def main(conversations: int, turns: int, min_cache_tokens: int) -> None:
+    from app.services.edna_parser import parse_edna_report
+    from app.services.langgraph.context import build_context, estimate_tokens
+    from app.services.personas import system_blocks, system_text
+
+    rng = random.Random(0)
+    report = "\n".join(profile_lines(random_profile(rng))) + "\n" + "Your results in detail. " * 60
+    profiles = {
+        "old upload": {"edna_type": "Architect", "confidence": 0.9, "full_text": report[:500] + "..."},
+        "six-layer": parse_edna_report(report),
+        "none": None
+    }
+
+    print(f"{conversations} conversations x {turns} messages, min cacheable prefix {min_cache_tokens} tokens\n")
+    print(f"{'profile':>11} {'prompt':>15} {'system tok':>11} {'input tok':>10} {'cost':>8} {'vs before':>10}")
+    for name, profile in profiles.items():
+        totals = {"before": [0, 0, 0], "after": [0, 0, 0], "after+cache": [0, 0, 0]}
+        for number in range(conversations):
+            personality = "architect" if number % 2 else "alchemist"
+            cache = SimulatedPromptCache(min_cache_tokens)
+            messages = []
+            replies = conversation(random.Random(number), turns)
+            for message in replies:
+                messages.append({"role": "user", "content": message})
+                context = build_context({"messages": messages, "conversation_summary":
+                                         "The user wants to scale their offer. " * (len(messages) // 20)
+                                         if len(messages) > 20 else None})
+                legacy = legacy_system_prompt(personality, profile, context["summary"])
+                blocks = system_blocks(personality, profile, context["summary"])
+                for mode, system, billed in (("before", legacy, None),
+                                             ("after", system_text(blocks), None),
+                                             ("after+cache", blocks, cache)):
+                    pieces = segments(system, context["history"], message)
+                    tokens = sum(estimate_tokens(text) for text, _ in pieces)
+                    cost = billed.bill(pieces, estimate_tokens)[1] if billed else tokens
+                    totals[mode][0] += estimate_tokens(system if isinstance(system, str) else system_text(system))
+                    totals[mode][1] += tokens
+                    totals[mode][2] += cost
+                messages.append({"role": "assistant", "content": next(replies)})
+        requests = conversations * turns
+        before_cost = totals["before"][2] / requests
+        for mode, (system_tokens, tokens, cost) in totals.items():
+            print(f"{name:>11} {mode:>15} {system_tokens / requests:>11.0f} {tokens / requests:>10.0f} "
+                  f"{cost / requests:>8.0f} {cost / requests / before_cost:>9.0%}")
+
+    profile = profiles["six-layer"]
+    for name, build in (("before", lambda: legacy_system_prompt("architect", profile, None)),
+                        ("after", lambda: json.dumps(system_blocks("architect", profile)))):
+        started = time.perf_counter()
+        for _ in range(20000):
+            build()
+        print(f"\nbuild system prompt ({name}): {(time.perf_counter() - started) / 20000 * 1e6:.1f} us", end="")
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", type=int, default=40)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--min-cache-tokens", type=int, default=1024)
+    args = parser.parse_args()
+    main(args.conversations, args.turns, args.min_cache_tokens)
@@ -0,0 +1,112 @@
+"""
+Next quiz question: database lookup per step vs the compiled question graph.
+
+Fills a temporary SQLite database with questions (options plus branching
+rules that skip ahead), then walks random quizzes from the first question to
+the end two ways:
+
+* query  - per step, load the current question, read its branching JSON and,
+           when no rule applies, query the next question by order_index
+* graph  - question_graph_cache.get() (a database check at most every few
+           seconds) and QuestionGraph.next_question, two lookups
+
+and checks both walks visit the same questions. Also reports how long
+compiling the graph takes.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_question_graph
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import insert, select
+
+
+def questions(count: int, rng: random.Random):
+    rows = []
+    for q in range(1, count + 1):
+        rules = {}
+        if q + 2 <= count and rng.random() < 0.5:
+            rules[rng.choice("ABCD")] = q + 2  # Skip a question
+        if q == count - 1:
+            rules["default"] = None  # Some answers end the quiz a question early
+            rules["A"] = count
+        rows.append({"id": q, "question_text": f"Question {q}", "question_type": "core_type", "layer": 1 + q % 6,
+                     "options": [f"Option {letter}" for letter in "ABCD"], "branching_logic": rules,
+                     "order_index": q})
+    return rows
+
+
+async def query_next(db, question_id: int, answer: str):
+    """Resolve one step straight from the database"""
+    from app.models.edna_models import EDNAQuestion
+
+    question = await db.get(EDNAQuestion, question_id, populate_existing=True)
+    rules = question.branching_logic or {}
+    index = "ABCD".index(answer)
+    if index >= len(question.options):
+        raise ValueError(answer)
+    for key in (answer, "default", "*"):
+        if key in rules:
+            return rules[key]
+    return await db.scalar(
+        select(EDNAQuestion.id).where(EDNAQuestion.is_active.is_(True), EDNAQuestion.order_index > question.order_index)
+        .order_by(EDNAQuestion.order_index, EDNAQuestion.id).limit(1))
+
+
+async def main(counts, walks: int) -> None:
+    from app.core.database import Database
+    from app.models.edna_models import EDNAQuestion
+    from app.services.question_graph import QuestionGraph, QuestionGraphCache
+
+    print(f"{'questions':>9} {'compile ms':>11} {'mode':>6} {'us/step':>9} {'steps/s':>9}")
+    for count in counts:
+        with tempfile.TemporaryDirectory() as directory:
+            database = Database("sqlite+aiosqlite:///" + os.path.join(directory, "edna.db"))
+            await database.create_tables()
+            rng = random.Random(count)
+            async with database.session() as db:
+                await db.execute(insert(EDNAQuestion), questions(count, rng))
+                await db.commit()
+                loaded = (await db.scalars(select(EDNAQuestion))).all()
+                started = time.perf_counter()
+                QuestionGraph(loaded)
+                compile_ms = (time.perf_counter() - started) * 1000
+
+            answers = [[rng.choice("ABCD") for _ in range(count)] for _ in range(walks)]
+            cache = QuestionGraphCache(check_seconds=5)
+            paths = {}
+            for mode in ("query", "graph"):
+                steps = 0
+                started = time.perf_counter()
+                async with database.session() as db:
+                    for walk, picks in enumerate(answers):
+                        path = [1]
+                        while path[-1] is not None:
+                            answer = picks[len(path) - 1]
+                            if mode == "query":
+                                path.append(await query_next(db, path[-1], answer))
+                            else:
+                                graph = await cache.get(db)
+                                following = graph.next_question(path[-1], answer)
+                                path.append(following.id if following else None)
+                            steps += 1
+                        paths.setdefault(walk, path)
+                        assert paths[walk] == path, (walk, paths[walk], path)
+                micros = (time.perf_counter() - started) / steps * 1e6
+                print(f"{count:>9} {compile_ms:>11.2f} {mode:>6} {micros:>9.1f} {1e6 / micros:>9.0f}")
+            await database.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--questions", type=int, nargs="+", default=[22, 200])
+    parser.add_argument("--walks", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.questions, args.walks))
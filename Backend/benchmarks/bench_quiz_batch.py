@@ -0,0 +1,93 @@
+"""
+Batch quiz rescoring: one quiz at a time vs NumPy chunks.
+
+For a random answer matrix (some answers skipped), compares:
+
+* loop   - QuizScorer.score_vector on every row (timed on a sample and
+           extrapolated, it is too slow to run on millions)
+* numpy  - QuizScorer.score_matrix a chunk at a time
+
+and checks both agree on the sample. Then rescores a generated
+quiz_results_data.csv-style export end to end with the quiz_batch CLI
+pipeline (read, score, write) and reports its peak traced memory, which
+depends on the chunk size, not the export size.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_quiz_batch
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy
+
+
+def main(rows: int, csv_rows: int, chunk_rows: int, sample: int) -> None:
+    from app.services.quiz_batch import BatchStats, iter_csv_chunks, write_results
+    from app.services.quiz_scoring import get_quiz_scorer
+
+    scorer = get_quiz_scorer()
+    rng = numpy.random.default_rng(0)
+    options = len(scorer.option_letters)
+    matrix = rng.integers(0, options, size=(rows, len(scorer.question_ids)), dtype=numpy.int8)
+    matrix[rng.random(matrix.shape) < 0.05] = -1  # Skipped questions
+
+    started = time.perf_counter()
+    loop_results = [scorer.score_vector(vector) for vector in matrix[:sample].tolist()]
+    loop_rate = sample / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for start in range(0, rows, chunk_rows):
+        scores = scorer.score_matrix(matrix[start:start + chunk_rows])
+        if start == 0:
+            for index, expected in enumerate(loop_results[:chunk_rows]):
+                subtype = scores["subtype"][index]
+                assert scorer.types[scores["dna_type"][index]] == expected["dna_type"]
+                assert (scorer.subtypes[subtype] if subtype >= 0 else "") == expected["subtype"]
+    numpy_rate = rows / (time.perf_counter() - started)
+
+    print(f"{rows} quizzes, chunks of {chunk_rows}")
+    print(f"{'mode':>6} {'quizzes/s':>11} {'time for all':>13}")
+    print(f"{'loop':>6} {loop_rate:>11.0f} {rows / loop_rate:>12.1f}s  (extrapolated from {sample})")
+    print(f"{'numpy':>6} {numpy_rate:>11.0f} {rows / numpy_rate:>12.1f}s  ({numpy_rate / loop_rate:.0f}x)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quiz_results.csv")
+        letters = numpy.array(scorer.option_letters + ("",))  # -1 picks ""
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Result_ID", "User_ID"] + [f"Q{q}_Answer" for q in scorer.question_ids]
+                            + ["Final_DNA_Type", "Subtype"])
+            for index, vector in enumerate(letters[matrix[:csv_rows]].tolist()):
+                writer.writerow([index, f"user-{index}"] + vector + ["blurred", "overthinker"])
+
+        def rescore(stats: BatchStats) -> None:
+            with open(os.devnull, "w", newline="") as output:
+                write_results(iter_csv_chunks(path, scorer, stats, chunk_rows), ["Result_ID", "User_ID"],
+                              scorer, output, stats)
+
+        stats = BatchStats()
+        started = time.perf_counter()
+        rescore(stats)
+        elapsed = time.perf_counter() - started
+        tracemalloc.start()  # Separate run: tracing slows everything down
+        rescore(BatchStats())
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"\nCSV export, {stats.scored} quizzes ({os.path.getsize(path) / 1e6:.0f} MB): {elapsed:.1f}s "
+              f"({stats.scored / elapsed:.0f}/s), {stats.changed} changed, peak {peak / 1e6:.0f} MB traced")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--csv-rows", type=int, default=200_000)
+    parser.add_argument("--chunk-rows", type=int, default=20_000)
+    parser.add_argument("--sample", type=int, default=20_000)
+    args = parser.parse_args()
+    main(args.rows, args.csv_rows, args.chunk_rows, args.sample)
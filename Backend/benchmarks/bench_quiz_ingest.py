@@ -0,0 +1,98 @@
+"""
+Quiz submission: one insert per answer vs the bulk submit endpoint.
+
+For quizzes of growing length, saves sessions of answers two ways:
+
+* per-answer - one INSERT (and flush) per answer, then the QuizSession
+               aggregates updated in a separate statement
+* bulk       - store_submission, the /edna/quiz/submit handler: one
+               executemany for all answers plus the session row
+
+and reports milliseconds and database statements per submission. Uses a
+temporary SQLite file by default; against a networked database every
+statement is also a round trip, so the gap grows.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_quiz_ingest
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import event, select, update
+
+
+async def per_answer(db, request) -> None:
+    """What saving a quiz looks like without the bulk endpoint"""
+    from app.models.edna_models import EDNAResponse, QuizSession
+
+    db.add(QuizSession(session_id=request.quiz_session_id, user_id=request.user_id,
+                       total_questions=len(request.answers)))
+    await db.flush()
+    times = []
+    for answer in request.answers:
+        db.add(EDNAResponse(user_id=request.user_id, quiz_session_id=request.quiz_session_id,
+                            question_id=answer.question_id, selected_option=answer.selected_option,
+                            response_time_ms=answer.response_time_ms))
+        await db.flush()
+        times.append(answer.response_time_ms)
+        await db.execute(update(QuizSession).where(QuizSession.session_id == request.quiz_session_id)
+                         .values(questions_answered=len(times), average_response_time_ms=sum(times) / len(times)))
+    await db.execute(update(QuizSession).where(QuizSession.session_id == request.quiz_session_id)
+                     .values(completion_rate=1.0, is_completed=True, completed_at=datetime.utcnow(),
+                             total_time_seconds=round(sum(times) / 1000)))
+    await db.commit()
+
+
+async def main(lengths, submissions: int, directory: str) -> None:
+    from app.api.edna import QuizAnswer, QuizSubmissionRequest, store_submission
+    from app.core.database import Database
+    from app.models.edna_models import EDNAQuestion, EDNAResponse
+
+    database = Database("sqlite+aiosqlite:///" + os.path.join(directory, "edna.db"))
+    await database.create_tables()
+    async with database.session() as db:  # Answers must be to questions the quiz has
+        db.add_all(EDNAQuestion(id=q, question_text=f"Question {q}", question_type="core_type", layer=1,
+                                options=["A", "B", "C", "D"], order_index=q) for q in range(1, max(lengths) + 1))
+        await db.commit()
+    statements = [0]
+    event.listen(database.engine.sync_engine, "before_cursor_execute",
+                 lambda *args: statements.__setitem__(0, statements[0] + 1))
+    rng = random.Random(0)
+
+    print(f"{'questions':>9} {'mode':>11} {'ms/quiz':>8} {'statements':>11}")
+    for length in lengths:
+        for name, save in (("per-answer", per_answer), ("bulk", store_submission)):
+            timings = []
+            statements[0] = 0
+            for number in range(submissions):
+                request = QuizSubmissionRequest(
+                    user_id=number, quiz_session_id=f"{name}-{length}-{number}", total_questions=length,
+                    answers=[QuizAnswer(question_id=q, selected_option=rng.choice("ABCD"),
+                                        response_time_ms=rng.randint(500, 9000)) for q in range(1, length + 1)])
+                started = time.perf_counter()
+                async with database.session() as db:
+                    await save(db, request)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"{length:>9} {name:>11} {statistics.median(timings):>8.2f} {statements[0] / submissions:>11.0f}")
+
+    async with database.session() as db:  # Both ways stored every answer
+        stored = len((await db.execute(select(EDNAResponse.id))).all())
+    assert stored == 2 * submissions * sum(lengths), stored
+    await database.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[22, 50, 100, 200])
+    parser.add_argument("--submissions", type=int, default=50)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(main(args.lengths, args.submissions, directory))
@@ -0,0 +1,92 @@
+"""
+E-DNA profile from quiz answers vs from a results PDF.
+
+Checks the QuizScorer against every stored result in quiz_results_data.csv
+(rows in the legacy answer format are skipped), then times, per profile:
+
+* vector    - QuizScorer.score_vector on a precomputed answer vector
+* answers   - score_answers on {question: letter}
+* responses - score_responses on EDNAResponse-like rows
+* pdf       - the upload route: parse a one-page generated report PDF with
+              scan_edna_pages (no worker pool)
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_quiz_scoring
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.sample_pdf import build_pdf, report_pages
+
+
+def per_call(fn, items, repeat: int) -> float:
+    """Best time per call over ``repeat`` rounds, in microseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, (time.perf_counter() - started) / len(items))
+    return best * 1e6
+
+
+def main(results_csv: str, quizzes: int, repeat: int) -> None:
+    from app.services.pdf_service import iter_page_texts, scan_edna_pages
+    from app.services.quiz_scoring import get_quiz_scorer
+
+    started = time.perf_counter()
+    scorer = get_quiz_scorer()
+    print(f"rule tables compiled in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    matched = skipped = 0
+    with open(results_csv, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            answers = {q: row[f"Q{q}_Answer"] for q in scorer.question_ids if row[f"Q{q}_Answer"]}
+            try:
+                score = scorer.score_answers(answers)
+            except ValueError:
+                skipped += 1
+                continue
+            assert (score["dna_type"], score["subtype"]) == (row["Final_DNA_Type"], row["Subtype"]), row["Result_ID"]
+            matched += 1
+    print(f"stored results reproduced: {matched} (skipped {skipped} legacy rows)\n")
+
+    rng = random.Random(0)
+    letters = scorer.option_letters
+    answer_sets = [{q: rng.choice(letters) for q in scorer.question_ids} for _ in range(quizzes)]
+    vectors = [scorer.answer_vector(answers) for answers in answer_sets]
+    response_sets = [
+        [SimpleNamespace(question_id=q, selected_option=letter, option_value=None) for q, letter in answers.items()]
+        for answers in answer_sets
+    ]
+
+    timings = [
+        ("vector", per_call(scorer.score_vector, vectors, repeat)),
+        ("answers", per_call(scorer.score_answers, answer_sets, repeat)),
+        ("responses", per_call(scorer.score_responses, response_sets, repeat))
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "report.pdf")
+        with open(path, "wb") as pdf:
+            pdf.write(build_pdf(report_pages(1)))
+        timings.append(("pdf", per_call(lambda p: scan_edna_pages(iter_page_texts(p)), [path] * 20, repeat)))
+
+    print(f"{'route':>10} {'us/profile':>11} {'profiles/s':>11}")
+    for name, micros in timings:
+        print(f"{name:>10} {micros:>11.1f} {1e6 / micros:>11.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--results-csv", default=os.path.join("..", "quiz_results_data.csv"))
+    parser.add_argument("--quizzes", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.results_csv, args.quizzes, args.repeat)
@@ -0,0 +1,63 @@
+"""
+Time-to-first-token: buffered chat_with_claude vs stream_chat_with_claude.
+
+The stub waits ``--latency`` before the first token and ``--token-delay``
+between tokens, roughly like Claude writing a long answer. The buffered call
+can only return after the last token; the streamed call hands over the first
+delta as soon as it arrives.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_stream_ttft
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.stub_bedrock import StubBedrockServer, configure_environment
+
+
+async def main(latency: float, token_delay: float, words: int, rounds: int) -> None:
+    reply = " ".join(f"word{i}" for i in range(words))
+    stub = StubBedrockServer(latency_seconds=latency, token_delay_seconds=token_delay, reply_text=reply).start()
+    configure_environment(stub, RESPONSE_CACHE_MAX_ENTRIES="0")  # Every round reaches the stub
+
+    from app.services.ai_service import ai_service
+
+    buffered, first_token, stream_total = [], [], []
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            await ai_service.chat_with_claude("Hello", "architect", has_uploaded_pdf=True)
+            buffered.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            first = None
+            async for _delta in ai_service.stream_chat_with_claude("Hello", "architect", has_uploaded_pdf=True):
+                if first is None:
+                    first = time.perf_counter() - started
+            first_token.append(first)
+            stream_total.append(time.perf_counter() - started)
+    finally:
+        ai_service.shutdown()
+        stub.stop()
+
+    def ms(values):
+        return f"{statistics.median(values) * 1000:8.1f} ms"
+
+    print(f"{words} tokens, {latency * 1000:.0f} ms to first token, {token_delay * 1000:.0f} ms/token, {rounds} rounds (median)")
+    print(f"buffered response      {ms(buffered)}")
+    print(f"streamed first token   {ms(first_token)}")
+    print(f"streamed last token    {ms(stream_total)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.token_delay, args.words, args.rounds))
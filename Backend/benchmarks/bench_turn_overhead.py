@@ -0,0 +1,107 @@
+"""
+Orchestration overhead per turn as conversations grow to 1,000 messages.
+
+Fills conversations with N earlier messages (all kept in the live state:
+CONVERSATION_HOT_MESSAGES=0, the worst case), then runs turns through
+BrandscalingOrchestrator.process_conversation against the stub Bedrock
+server and reports, per turn:
+
+* overhead   - time spent outside the Claude call (graph, state, context,
+               summary), measured by timing ai_service.chat_with_claude
+* lookups    - conversation store get() calls
+* allocated  - peak memory allocated while the turn runs (tracemalloc)
+
+All three should stay flat as N grows.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_turn_overhead
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.stub_bedrock import StubBedrockServer, configure_environment
+
+QUESTION = "How do I scale my operations next quarter?"
+
+
+async def main(lengths, turns: int) -> None:
+    stub = StubBedrockServer(latency_seconds=0.0).start()
+    configure_environment(stub, RESPONSE_CACHE_MAX_ENTRIES="0", CONVERSATION_STORE="memory",
+                          CONVERSATION_HOT_MESSAGES="0")
+
+    from app.services.ai_service import ai_service
+    from app.services.langgraph.orchestrator import orchestrator
+    from app.services.langgraph.state import state_manager
+
+    claude_seconds = 0.0
+    chat_with_claude = ai_service.chat_with_claude
+
+    async def timed_chat(*args, **kwargs):
+        nonlocal claude_seconds
+        started = time.perf_counter()
+        try:
+            return await chat_with_claude(*args, **kwargs)
+        finally:
+            claude_seconds += time.perf_counter() - started
+
+    ai_service.chat_with_claude = timed_chat
+
+    lookups = 0
+    store_get = state_manager.store.get
+
+    async def counted_get(conversation_id):
+        nonlocal lookups
+        lookups += 1
+        return await store_get(conversation_id)
+
+    state_manager.store.get = counted_get
+
+    print(f"{turns} turns per conversation length\n")
+    print(f"{'messages':>9} {'overhead us':>12} {'p95 us':>8} {'lookups':>8} {'allocated KB':>13}")
+    try:
+        for length in lengths:
+            conversation_id = await state_manager.create_conversation(user_id=1)
+            await state_manager.update_conversation_edna(conversation_id, {"edna_type": "Architect", "confidence": 0.9})
+            for number in range(length // 2):
+                await state_manager.add_message(conversation_id, "user", f"Question {number} about my pricing and funnel?")
+                await state_manager.add_message(conversation_id, "assistant", "Here is a framework. " * 40, "architect")
+            await state_manager.get_conversation_summary(conversation_id)
+
+            overheads, allocations, turn_lookups = [], [], []
+            for number in range(turns + turns // 5):
+                traced = number >= turns  # Memory is measured on separate turns (tracing slows them down)
+                claude_seconds, lookups = 0.0, 0
+                if traced:
+                    tracemalloc.start()
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = await orchestrator.process_conversation(conversation_id, QUESTION, "architect")
+                elapsed = time.perf_counter() - started
+                assert result["success"] and result["response"] == stub.reply_text, result
+                if traced:
+                    allocations.append(tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                else:
+                    overheads.append(elapsed - claude_seconds)
+                    turn_lookups.append(lookups)
+            cuts = statistics.quantiles(overheads, n=20)
+            print(f"{length:>9} {statistics.median(overheads) * 1e6:>12.0f} {cuts[18] * 1e6:>8.0f} "
+                  f"{statistics.median(turn_lookups):>8.0f} {statistics.median(allocations) / 1024:>13.1f}")
+    finally:
+        ai_service.shutdown()
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--turns", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.turns))
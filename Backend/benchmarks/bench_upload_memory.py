@@ -0,0 +1,77 @@
+"""
+Upload memory: ``await file.read()`` + one write vs PDFService.save_upload.
+
+Each case wraps a temporary file of the given size in a Starlette UploadFile
+(what FastAPI hands the endpoints), saves it both ways into a scratch
+directory and records the peak Python heap allocation with tracemalloc. The
+old path peaks at roughly the file size; the streamed path stays at about one
+UPLOAD_CHUNK_BYTES chunk whatever the size. Hashing happens in both cases so
+the comparison is like for like.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_upload_memory
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+import tracemalloc
+
+from starlette.datastructures import UploadFile
+
+
+async def read_whole(upload: UploadFile, directory: str) -> None:
+    with open(os.path.join(directory, "whole.pdf"), "wb") as buffer:
+        content = await upload.read()
+        hashlib.sha256(content).hexdigest()
+        buffer.write(content)
+
+
+async def measure(save, source_path: str, directory: str):
+    with open(source_path, "rb") as source:
+        upload = UploadFile(source, filename="report.pdf")
+        tracemalloc.start()
+        started = time.perf_counter()
+        await save(upload, directory)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak, elapsed
+
+
+async def main(sizes_mb, chunk_kb: int) -> None:
+    from app.services.pdf_service import PDFService
+
+    mib = 1024 * 1024
+    print(f"{'file MB':>8} {'read() peak MB':>15} {'streamed peak MB':>17} {'read() s':>9} {'streamed s':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        service = PDFService(directory)
+
+        async def streamed(upload, _directory):
+            saved = await service.save_upload(upload, max_bytes=max(sizes_mb) * mib + 1,
+                                              chunk_size=chunk_kb * 1024)
+            os.remove(saved["file_path"])
+
+        for size_mb in sizes_mb:
+            source_path = os.path.join(directory, f"source-{size_mb}.bin")
+            with open(source_path, "wb") as source:
+                for _ in range(size_mb):
+                    source.write(os.urandom(mib))
+
+            whole_peak, whole_time = await measure(read_whole, source_path, directory)
+            stream_peak, stream_time = await measure(streamed, source_path, directory)
+            print(f"{size_mb:>8} {whole_peak / mib:>15.1f} {stream_peak / mib:>17.2f} "
+                  f"{whole_time:>9.3f} {stream_time:>11.3f}")
+            os.remove(source_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--chunk-kb", type=int, default=1024)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes_mb, args.chunk_kb))
@@ -0,0 +1,138 @@
+"""
+Tiny dependency-free PDF writer for the PDF benchmarks.
+
+Produces a valid multi-page PDF whose pages contain the given lines of text in
+Helvetica, so PyPDF2 parses and extracts them like a real report. Also makes
+up six-layer E-DNA profiles and the report lines describing them.
+"""
+
+import random
+from typing import Any, Dict, List, Optional, Sequence
+
+LAYERS = ["core_type", "subtype", "learning_styles", "neurodiversity", "mindset", "meta_beliefs"]
+SUBTYPES = {
+    "Architect": ["master-strategist", "systemised-builder", "internal-analyzer", "ultimate-strategist"],
+    "Alchemist": ["visionary-oracle", "magnetic-perfectionist", "energetic-empath", "ultimate-alchemist"],
+    "Blurred": ["overthinker", "performer", "self-forsaker", "self-betrayer"]
+}
+LEARNING_STYLES = ["visual", "auditory", "kinesthetic", "reading/writing", "social", "solitary", "logical"]
+NEURODIVERSITY = ["ADHD", "dyslexia", "dyspraxia", "dyscalculia", "autism"]
+MINDSETS = ["growth", "fixed", "high risk tolerance", "low risk tolerance", "abundance", "scarcity"]
+BELIEFS = [
+    "Success means freedom over my time",
+    "Systems matter more than motivation",
+    "My brand should feel like me",
+    "Money follows clarity",
+    "Done is better than perfect",
+    "Every setback is data"
+]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages: Sequence[Sequence[str]]) -> bytes:
+    """Return the bytes of a PDF with one page per list of text lines"""
+    objects: List[bytes] = []
+    page_count = len(pages)
+    font_id = 3
+    first_page_id = 4
+
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{first_page_id + 2 * i} 0 R" for i in range(page_count))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {page_count} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for index, lines in enumerate(pages):
+        content_id = first_page_id + 2 * index + 1
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode())
+        commands = ["BT", "/F1 10 Tf", "12 TL", "40 760 Td"]
+        for line in lines:
+            commands.append(f"({_escape(line)}) Tj T*")
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+    return bytes(out)
+
+
+def random_profile(rng: random.Random) -> Dict[str, Any]:
+    """A made-up profile: the expected parse of its profile_lines"""
+    core_type = rng.choice(list(SUBTYPES))
+    return {
+        "core_type": core_type,
+        "subtype": rng.choice(SUBTYPES[core_type]),
+        "learning_styles": rng.sample(LEARNING_STYLES, rng.randint(1, 3)),
+        "neurodiversity": rng.sample(NEURODIVERSITY, rng.randint(0, 2)) or None,
+        "mindset": rng.sample(MINDSETS, rng.randint(1, 2)),
+        "meta_beliefs": rng.sample(BELIEFS, rng.randint(1, 4))
+    }
+
+
+def profile_lines(profile: Dict[str, Any], numbered: bool = False, omit: Sequence[str] = ()) -> List[str]:
+    """The six layer sections of a report, optionally as "Layer N: ..." headings
+
+    Layers named in ``omit`` are left out, like in an incomplete report.
+    """
+    def words(values: Optional[List[str]]) -> str:
+        return ", ".join(value.capitalize() if value.islower() else value for value in values or [])
+
+    sections = {
+        "core_type": ("Your core E-DNA type", profile["core_type"],
+                      ["How you make decisions, build and lead comes from this core wiring."]),
+        "subtype": ("E-DNA Subtype", profile["subtype"].replace("-", " ").title(),
+                    ["Your subtype shows how the core type expresses itself under pressure."]),
+        "learning_styles": ("Learning Styles", words(profile["learning_styles"]), []),
+        "neurodiversity": ("Neurodiversity", words(profile["neurodiversity"]) or "None reported", []),
+        "mindset": ("Mindset", words(profile["mindset"]),
+                    ["Mindset shapes how you respond when a launch does not go to plan."]),
+        "meta_beliefs": ("Meta-Beliefs", "", [f"- {belief}" for belief in profile["meta_beliefs"]])
+    }
+    lines = []
+    for number, (layer, (title, value, body)) in enumerate(sections.items(), start=1):
+        if layer in omit:
+            continue
+        lines.append(f"{f'Layer {number}: ' if numbered else ''}{title}: {value}".rstrip())
+        lines.extend(body)
+    return lines
+
+
+def report_pages(page_count: int, lines_per_page: int = 50, edna_type: str = "Architect",
+                 profile: Optional[Dict[str, Any]] = None) -> List[List[str]]:
+    """Filler pages shaped a little like an E-DNA results report
+
+    The six-layer profile is on page 1, like the real results PDFs.
+    """
+    profile = profile or {
+        "core_type": edna_type,
+        "subtype": SUBTYPES[edna_type][0],
+        "learning_styles": ["visual"],
+        "neurodiversity": None,
+        "mindset": ["growth"],
+        "meta_beliefs": BELIEFS[:2]
+    }
+    pages = []
+    for page in range(page_count):
+        lines = [f"E-DNA Results - page {page + 1}"]
+        if page == 0:
+            lines.extend(profile_lines(profile))
+        lines.extend(
+            f"Line {line}: strategy, systems and growth notes for your entrepreneurial profile."
+            for line in range(lines_per_page)
+        )
+        pages.append(lines)
+    return pages
@@ -0,0 +1,197 @@
+"""
+Local stand-in for the Bedrock runtime API, used by the benchmarks.
+
+It answers ``POST /model/{modelId}/invoke`` with a Claude-shaped JSON body and
+``POST /model/{modelId}/invoke-with-response-stream`` with an AWS event stream
+of ``content_block_delta`` events, so the real boto3 client can be pointed at
+it through ``BEDROCK_ENDPOINT_URL`` without touching AWS.
+
+Timing model: ``latency_seconds`` elapses before the first token, then each
+word of ``reply_text`` takes ``token_delay_seconds``. The non-streaming route
+only answers once the whole reply would have been generated.
+``latency_by_model`` gives some model ids a different first-token latency
+(change it while running to make a "model" slow down).
+
+Faults on command: ``fail(count, status)`` makes the next ``count`` requests
+(all of them if None) fail straight away - 429 ThrottlingException by default,
+503 ServiceUnavailableException with ``status=503`` - until ``recover()``;
+``fail_rate`` throttles that share of requests at random.
+"""
+
+import base64
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class StubBedrockServer:
+    """Threaded HTTP server that imitates bedrock-runtime invoke_model"""
+
+    def __init__(self, latency_seconds: float = 0.2, token_delay_seconds: float = 0.0,
+                 reply_text: str = "**The root problem here:** stub reply."):
+        self.latency_seconds = latency_seconds
+        self.token_delay_seconds = token_delay_seconds
+        self.reply_text = reply_text
+        self.latency_by_model = {}
+        self.served_by_model = {}
+        self.requests_served = 0
+        self.errors_returned = 0
+        self.fail_rate = 0.0
+        self._failures_left: Optional[int] = 0  # None = fail everything
+        self._failure_status = 429
+        self._random = random.Random(0)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubBedrockServer":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                model_id = unquote(self.path.split("/")[2]) if self.path.count("/") >= 3 else ""
+                stub._count(model_id)
+                status = stub._take_failure()
+                if status:
+                    code = "ThrottlingException" if status == 429 else "ServiceUnavailableException"
+                    body = json.dumps({"message": f"{code} injected by the stub"}).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("x-amzn-ErrorType", f"{code}:http://internal.amazon.com/coral/com.amazon.bedrock/")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                time.sleep(stub.latency_by_model.get(model_id, stub.latency_seconds))
+                tokens = stub.reply_tokens()
+
+                if self.path.endswith("/invoke-with-response-stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    self._write_chunk(encode_chunk_event({"type": "message_start"}))
+                    for index, token in enumerate(tokens):
+                        if index:
+                            time.sleep(stub.token_delay_seconds)
+                        self._write_chunk(encode_chunk_event({
+                            "type": "content_block_delta",
+                            "index": 0,
+                            "delta": {"type": "text_delta", "text": token}
+                        }))
+                    self._write_chunk(encode_chunk_event({"type": "message_stop"}))
+                    self.wfile.write(b"0\r\n\r\n")
+                elif self.path.endswith("/invoke"):
+                    time.sleep(stub.token_delay_seconds * max(len(tokens) - 1, 0))
+                    body = json.dumps({
+                        "id": "msg_stub",
+                        "type": "message",
+                        "role": "assistant",
+                        "content": [{"type": "text", "text": stub.reply_text}],
+                        "stop_reason": "end_turn",
+                        "usage": {"input_tokens": 10, "output_tokens": 10}
+                    }).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def reply_tokens(self):
+        words = self.reply_text.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    def fail(self, count: Optional[int] = None, status: int = 429) -> None:
+        """Fail the next ``count`` requests (None = every request until recover())"""
+        with self._lock:
+            self._failures_left = count
+            self._failure_status = status
+
+    def recover(self) -> None:
+        with self._lock:
+            self._failures_left = 0
+            self.fail_rate = 0.0
+
+    def _count(self, model_id: str) -> None:
+        with self._lock:
+            self.requests_served += 1
+            self.served_by_model[model_id] = self.served_by_model.get(model_id, 0) + 1
+
+    def _take_failure(self) -> Optional[int]:
+        """HTTP status to fail this request with, or None to answer it"""
+        with self._lock:
+            if self._failures_left is None or self._failures_left > 0:
+                if self._failures_left:
+                    self._failures_left -= 1
+                self.errors_returned += 1
+                return self._failure_status
+            if self.fail_rate and self._random.random() < self.fail_rate:
+                self.errors_returned += 1
+                return 429
+            return None
+
+
+def _encode_header(name: str, value: str) -> bytes:
+    name_bytes, value_bytes = name.encode(), value.encode()
+    # type 7 = string
+    return struct.pack(">B", len(name_bytes)) + name_bytes + struct.pack(">BH", 7, len(value_bytes)) + value_bytes
+
+
+def encode_chunk_event(event: dict) -> bytes:
+    """Encode one Bedrock ``chunk`` event in the AWS event stream framing"""
+    payload = json.dumps({"bytes": base64.b64encode(json.dumps(event).encode()).decode()}).encode()
+    headers = (_encode_header(":event-type", "chunk")
+               + _encode_header(":content-type", "application/json")
+               + _encode_header(":message-type", "event"))
+    total_length = 12 + len(headers) + len(payload) + 4
+    prelude = struct.pack(">II", total_length, len(headers))
+    message = prelude + struct.pack(">I", zlib.crc32(prelude)) + headers + payload
+    return message + struct.pack(">I", zlib.crc32(message))
+
+
+def configure_environment(stub: StubBedrockServer, **extra: str) -> None:
+    """Point app settings at the stub; must run before importing app modules"""
+    import os
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "stub")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "stub")
+    os.environ.setdefault("CLAUDE_MODEL_ID", "anthropic.claude-stub")
+    os.environ["BEDROCK_ENDPOINT_URL"] = stub.url
+    os.environ.update(extra)